@@ -0,0 +1,61 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Generator of the benchmark instances of the SUALBSP-2 solvers
+
+# This file contains:
+# 	-The generator of the fixed small, medium and large instance sets in
+#	 code/models/benchmark-instances/, kept so they can be reproduced
+#	-Each instance uses its own seed (100 + position + 10*n) with Python's
+#	 random module:
+#		-task times uniform on 1..20
+#		-a precedence (i,j), i < j, with probability 0.25/(1 + (j-i)/3)
+#		-forward and backward setup times uniform on 0..1.5*(smallest task
+#		 time), for every pair
+#	 These are smaller and denser than the instances of generate-instances.py,
+#	 so the benchmark's large set is still solvable by every model
+
+# Example call from the command line:
+#	python generate-benchmark-instances.py ../models/benchmark-instances
+
+# Packages
+import os
+import sys
+import random
+
+# instances of each set, as (number of tasks, number of stations)
+INSTANCE_SETS = [('small', [(8,2), (10,3), (12,3)]),
+				 ('medium', [(15,3), (18,4), (20,4)]),
+				 ('large', [(24,5), (28,5), (30,6)])]
+
+def generate_instance(filename, numTasks, numStations, seed, density=0.25, alpha=0.5):
+	rng = random.Random(seed)
+	procList = [ rng.randint(1, 20) for i in range(numTasks) ]
+	precList = [ (i,j) for i in range(numTasks) for j in range(i+1, numTasks)
+				 if rng.random() < density/(1 + (j-i)/3) ]
+	maxSetup = max(1, int(alpha*min(procList)*3))
+	lines = ['<number of tasks>', str(numTasks), '', '<task times>']
+	lines += [ '{} {}'.format(i+1, procList[i]) for i in range(numTasks) ]
+	lines += ['', '<precedence relations>']
+	lines += [ '{},{}'.format(i+1, j+1) for (i,j) in precList ]
+	lines += ['', '<setup times forward>']
+	lines += [ '{},{}:{}'.format(i+1, j+1, rng.randint(0, maxSetup))
+			   for i in range(numTasks) for j in range(numTasks) if i != j ]
+	lines += ['', '<setup times backward>']
+	lines += [ '{},{}:{}'.format(i+1, j+1, rng.randint(0, maxSetup))
+			   for i in range(numTasks) for j in range(numTasks) ]
+	lines += ['', '<end>', '', '<optimal SALBP-1 value>', str(numStations), '']
+	os.makedirs(os.path.dirname(filename), exist_ok=True)
+	with open(filename, 'w') as f:
+		f.write('\n'.join(lines))
+
+# Script to generate the benchmark instances
+if __name__ == '__main__':
+	outputDir = sys.argv[1] if len(sys.argv) > 1 else 'benchmark-instances'
+	for size, specs in INSTANCE_SETS:
+		for instNum, (numTasks, numStations) in enumerate(specs):
+			filename = os.path.join(outputDir, size,
+									'synthetic_n{}_k{}_{:02d}.alb'.format(numTasks, numStations, instNum))
+			generate_instance(filename, numTasks, numStations, 100 + instNum + 10*numTasks)
+			print(filename)
+
+# EOF #
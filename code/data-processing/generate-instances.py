@@ -0,0 +1,156 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Synthetic instance generator for the SUALBSP-2
+
+# This file contains:
+# 	-A generator of .alb instances in the format of the converted SBF data
+#	 sets, readable by AssemblyLineInstance.import_instance_data
+#	-Control over the number of tasks, the order strength of the precedence
+#	 graph, the setup times (alpha, as in the SBF data sets), the number of
+#	 stations and the seed, for scaling studies beyond n = 297
+
+# Example call from the command line:
+#	python generate-instances.py -n 500 1000 2000 -os 0.3 -a 0.50 -k 20 -ni 3
+# Explanation:
+#	This writes 3 instances for each of n = 500, 1000 and 2000 tasks, with
+#	order strength 0.3, setup times of up to half the smallest task time
+#	and 20 stations, to synthetic-data-sets/Type-2-alpha0.50/
+
+# Packages
+import os
+import sys
+import argparse
+import numpy as np
+
+# initilise settings for argument parser
+parser = argparse.ArgumentParser()
+parser.add_argument('-n', '--num-tasks', type=int, nargs='+', default=[100],
+					help='Number(s) of tasks')
+parser.add_argument('-os', '--order-strength', type=float, default=0.3,
+					help='Target order strength of the precedence graph, in [0,1]')
+parser.add_argument('-a', '--alpha', type=float, default=0.5,
+					help='Setup times are at most alpha times the task times, as in the SBF data sets')
+parser.add_argument('-sd', '--setup-distribution', type=str, default='sbf',
+					help="Distribution of the setup times. Options include: 'sbf'(default), "
+						 "uniform on [0, alpha*(smallest task time)], and 'pairwise', uniform on "
+						 "[0, alpha*(smaller task time of the pair)]")
+parser.add_argument('-k', '--num-stations', type=int, default=None,
+					help='Number of stations (default: one per 25 tasks)')
+parser.add_argument('-pt', '--task-times', type=int, nargs=2, default=[1, 100],
+					help='Smallest and largest task time')
+parser.add_argument('-ni', '--num-instances', type=int, default=1,
+					help='Number of instances of each size')
+parser.add_argument('-s', '--seed', type=int, default=0, help='Seed of the first instance')
+parser.add_argument('-o', '--output-dir', type=str, default=None,
+					help='Output directory (default: synthetic-data-sets/Type-2-alpha<alpha>/)')
+args = parser.parse_args()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# PRECEDENCE GRAPH
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+def descendants(numTasks, arcs):
+	# bitset of all (transitive) successors of each task, for a topologically numbered graph
+	succ = [ [] for i in range(numTasks) ]
+	for (i,j) in arcs:
+		succ[i].append(j)
+	desc = [0]*numTasks
+	for i in reversed(range(numTasks)):
+		for j in succ[i]:
+			desc[i] |= desc[j] | (1 << j)
+	return succ, desc
+
+def order_strength(numTasks, desc):
+	if numTasks < 2:
+		return 0
+	return sum([ d.bit_count() for d in desc ]) / (numTasks*(numTasks-1)/2)
+
+def generate_precedences(rng, numTasks, targetOS):
+	# arc (i,j), i < j, is present if its random key is below p. The graph only
+	# grows with p, so p is found by bisection on the order strength
+	keys = rng.random((numTasks, numTasks))
+	upper = np.triu(np.ones((numTasks, numTasks), dtype=bool), 1)
+	lo, hi = 0.0, 1.0
+	for it in range(40):
+		p = (lo + hi)/2
+		arcs = np.argwhere(upper & (keys < p)).tolist()
+		succ, desc = descendants(numTasks, arcs)
+		if order_strength(numTasks, desc) < targetOS:
+			lo = p
+		else:
+			hi = p
+	arcs = np.argwhere(upper & (keys < hi)).tolist()
+	succ, desc = descendants(numTasks, arcs)
+	# remove transitive arcs, as in the SALBP data sets
+	precList = []
+	for i in range(numTasks):
+		reach = 0
+		for j in succ[i]:
+			reach |= desc[j]
+		precList += [ (i,j) for j in sorted(succ[i]) if not (reach >> j) & 1 ]
+	return precList, desc, order_strength(numTasks, desc)
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# SETUP TIMES
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+def generate_setups(rng, procList):
+	numTasks = len(procList)
+	if args.setup_distribution == 'sbf':
+		bound = np.full((numTasks, numTasks), np.floor(args.alpha*min(procList)))
+	elif args.setup_distribution == 'pairwise':
+		proc = np.array(procList)
+		bound = np.floor(args.alpha*np.minimum.outer(proc, proc))
+	else:
+		sys.exit('\n\nError: Unknown setup distribution {}.\n'.format(args.setup_distribution))
+	forwSU = np.floor(rng.random((numTasks, numTasks))*(bound + 1)).astype(int)
+	backSU = np.floor(rng.random((numTasks, numTasks))*(bound + 1)).astype(int)
+	return forwSU, backSU
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# OUTPUT
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+def write_instance(filename, procList, precList, desc, forwSU, backSU, numStations):
+	numTasks = len(procList)
+	with open(filename, 'w') as f:
+		f.write('<number of tasks>\n{}\n\n'.format(numTasks))
+		f.write('<task times>\n')
+		f.write(''.join([ '{} {}\n'.format(i+1, procList[i]) for i in range(numTasks) ]))
+		f.write('\n<precedence relations>\n')
+		f.write(''.join([ '{},{}\n'.format(i+1, j+1) for (i,j) in precList ]))
+		# j can only follow i within a cycle if j is not a predecessor of i
+		f.write('\n<setup times forward>\n')
+		for i in range(numTasks):
+			f.write(''.join([ '{},{}:{}\n'.format(i+1, j+1, forwSU[i,j]) for j in range(numTasks)
+							  if j != i and not (desc[j] >> i) & 1 ]))
+		# the last task i of a cycle can only be followed by j if i is not a predecessor of j
+		f.write('\n<setup times backward>\n')
+		for i in range(numTasks):
+			f.write(''.join([ '{},{}:{}\n'.format(i+1, j+1, backSU[i,j]) for j in range(numTasks)
+							  if not (desc[i] >> j) & 1 ]))
+		f.write('\n<end>\n\n<optimal SALBP-1 value>\n{}\n'.format(numStations))
+
+def generate_instance(numTasks, seed, outputDir):
+	rng = np.random.default_rng(seed)
+	procList = [ int(t) for t in rng.integers(args.task_times[0], args.task_times[1] + 1, numTasks) ]
+	precList, desc, OS = generate_precedences(rng, numTasks, args.order_strength)
+	forwSU, backSU = generate_setups(rng, procList)
+	if args.num_stations is None:
+		numStations = max(2, round(numTasks/25))
+	else:
+		numStations = args.num_stations
+	filename = os.path.join(outputDir, 'synthetic_n{}_k{}_{:02d}.alb'.format(numTasks, numStations, seed))
+	write_instance(filename, procList, precList, desc, forwSU, backSU, numStations)
+	print('{}: {} precedences, order strength {:.3f}'.format(filename, len(precList), OS))
+
+# Script to generate the requested instances
+if __name__ == '__main__':
+	if args.output_dir is None:
+		outputDir = 'synthetic-data-sets/Type-2-alpha{:.2f}/'.format(args.alpha)
+	else:
+		outputDir = args.output_dir
+	os.makedirs(outputDir, exist_ok=True)
+
+	for numTasks in args.num_tasks:
+		for seed in range(args.seed, args.seed + args.num_instances):
+			generate_instance(numTasks, seed, outputDir)
+
+# EOF #
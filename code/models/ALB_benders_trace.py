@@ -0,0 +1,100 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Per-iteration trace of the Benders decomposition
+
+# This file contains:
+# 	-A record of each Benders iteration: master time, nodes and size, the lower
+#	 and upper bounds, the deterministic work used so far, and the number of cuts
+#	 of each type added
+#	-A record of each station sub-problem within an iteration: solve time,
+#	 overhead, nodes, and whether the assignment was a cache hit
+#	-Each finished iteration is written as one JSON line, so the trace of a run
+#	 which is killed at its time limit is still complete up to that point
+
+# Packages
+import json
+
+# names of the cut counters of the Solver, as they appear in the trace
+CUT_COUNTERS = {'numNoGoods': 'NG',
+				'numGlobalLB': 'GLB',
+				'numGlobalUB': 'GUB',
+				'numInfAssCutsSimple': 'IC',
+				'numInfAssCutsSmart': 'IC2',
+				'numInfAssCutsSmartest': 'IC3',
+				'numInfAssCutsAnalytic': 'IC4',
+				'numMultiCuts': 'MC',
+				'numLogicCuts': 'LC'}
+
+# Class defining the trace of a single Benders run
+class BendersTrace:
+	def __init__(self, traceFile=None):
+		self.records = []
+		self.current = None
+		if traceFile is not None:
+			self.file = open(traceFile, 'w')
+		else:
+			self.file = None
+
+	def cut_counts(self, solver):
+		# counters of cuts which are not in use hold '-'
+		return { name: getattr(solver, counter) for counter, name in CUT_COUNTERS.items()
+				 if isinstance(getattr(solver, counter), int) }
+
+	def start_iteration(self, solver, start):
+		# an iteration left open by a break (e.g. a timeout) is closed first
+		self.end_iteration(solver)
+		self.current = {'iter': solver.bendersIter,
+						'start': round(start, 4),
+						'stations': []}
+		self.cutCountsBefore = self.cut_counts(solver)
+
+	def record_master(self, solver):
+		if self.current is None:
+			return
+		model = solver.model
+		self.current.update({'masterTime': round(solver.master_times[-1], 4),
+							 'masterStatus': model.status,
+							 'masterNodes': int(model.nodecount),
+							 'masterConstrs': model.NumConstrs,
+							 'masterVars': model.NumVars,
+							 'LB': solver.curCycleTime})
+
+	def record_station(self, solver, k, cached, solveTime, overhead, nodes):
+		if self.current is None:
+			return
+		self.current['stations'].append({'station': k,
+										 'tasks': len(solver.taskAssignment[k]),
+										 'cached': cached,
+										 'solveTime': round(solveTime, 4),
+										 'overhead': round(overhead, 4),
+										 'nodes': nodes,
+										 'load': solver.curStationLoad[k],
+										 'feasible': solver.stationFeasible[k],
+										 'satisfies': solver.stationSatisfiesCurCycleTime[k]})
+
+	def end_iteration(self, solver):
+		if self.current is None:
+			return
+		cutCounts = self.cut_counts(solver)
+		self.current['cuts'] = { name: cutCounts[name] - self.cutCountsBefore[name] for name in cutCounts }
+		self.current['UB'] = solver.bestCycleTimeUB
+		self.current['work'] = round(solver.workUsed, 4)
+		if solver.gap:
+			self.current['gap'] = solver.gap[-1]
+		self.current['SPtime'] = round(sum([ station['solveTime'] + station['overhead']
+											 for station in self.current['stations'] ]), 4)
+		self.current['cacheHits'] = sum([ station['cached'] for station in self.current['stations'] ])
+		# keep the per-station records at the end of the line
+		self.current['stations'] = self.current.pop('stations')
+		self.records.append(self.current)
+		if self.file is not None:
+			self.file.write(json.dumps(self.current) + '\n')
+			self.file.flush()
+		self.current = None
+
+	def close(self):
+		if self.file is not None:
+			self.file.close()
+			self.file = None
+
+# EOF #
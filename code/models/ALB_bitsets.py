@@ -0,0 +1,119 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Compact set structures for the SUALBSP-2 instance data
+
+# This file contains:
+# 	-Rows of packed bitsets (one Python int per row) replacing lists of
+#	 Python sets, e.g. the allowed followers of each task
+#	-Read-only set-like views of a single row, so existing callers can keep
+#	 iterating, testing membership and using the set methods
+#	-CSR style adjacency arrays for the precedence relations
+
+# Packages
+import numpy as np
+from collections.abc import Set
+
+def bits_to_list(bits):
+	# indices of the set bits, in ascending order
+	if bits == 0:
+		return []
+	packed = np.frombuffer(bits.to_bytes((bits.bit_length() + 7)//8, 'little'), dtype=np.uint8)
+	return np.flatnonzero(np.unpackbits(packed, bitorder='little')).tolist()
+
+def list_to_bits(items):
+	bits = 0
+	for i in items:
+		bits |= 1 << i
+	return bits
+
+# Class defining a read-only set-like view of one bitset row
+class BitsetView(Set):
+	__slots__ = ('bits',)
+
+	def __init__(self, bits):
+		self.bits = bits
+
+	def __contains__(self, i):
+		return i >= 0 and (self.bits >> i) & 1 == 1
+
+	def __iter__(self):
+		return iter(bits_to_list(self.bits))
+
+	def __len__(self):
+		return self.bits.bit_count()
+
+	def __repr__(self):
+		return 'BitsetView({})'.format(set(self))
+
+	@classmethod
+	def _from_iterable(cls, it):
+		# results of the set operators are ordinary sets
+		return set(it)
+
+	# the non-operator methods of set, for callers written against lists of sets
+	def union(self, *others):
+		return set(self).union(*others)
+
+	def intersection(self, *others):
+		return set(self).intersection(*others)
+
+	def difference(self, *others):
+		return set(self).difference(*others)
+
+	def issubset(self, other):
+		return self <= set(other)
+
+# Class defining a list of bitsets over the same universe
+class BitsetRows:
+	__slots__ = ('rows',)
+
+	def __init__(self, rows):
+		self.rows = rows
+
+	@classmethod
+	def from_sets(cls, sets):
+		return cls([ list_to_bits(s) for s in sets ])
+
+	@classmethod
+	def from_matrix(cls, matrix):
+		# rows of a 2D boolean array
+		packed = np.packbits(matrix, axis=1, bitorder='little')
+		return cls([ int.from_bytes(row.tobytes(), 'little') for row in packed ])
+
+	def to_matrix(self, numBits):
+		numBytes = (numBits + 7)//8
+		packed = np.frombuffer(b''.join([ row.to_bytes(numBytes, 'little') for row in self.rows ]),
+							   dtype=np.uint8).reshape(len(self.rows), numBytes)
+		return np.unpackbits(packed, axis=1, count=numBits, bitorder='little').astype(bool)
+
+	def transpose(self, numBits):
+		return BitsetRows.from_matrix(self.to_matrix(numBits).T)
+
+	def __getitem__(self, i):
+		return BitsetView(self.rows[i])
+
+	def __iter__(self):
+		return (BitsetView(row) for row in self.rows)
+
+	def __len__(self):
+		return len(self.rows)
+
+# Class defining CSR style adjacency arrays: the neighbours of node i are
+# indices[indptr[i]:indptr[i+1]]
+class CSRAdjacency:
+	__slots__ = ('indptr', 'indices')
+
+	def __init__(self, numNodes, edges):
+		edges = np.array(edges, dtype=np.int32).reshape(-1, 2)
+		order = np.lexsort((edges[:,1], edges[:,0]))
+		self.indices = edges[order,1].copy()
+		self.indptr = np.zeros(numNodes + 1, dtype=np.int32)
+		np.cumsum(np.bincount(edges[:,0], minlength=numNodes), out=self.indptr[1:])
+
+	def neighbours(self, i):
+		return self.indices[self.indptr[i]:self.indptr[i+1]].tolist()
+
+	def degree(self, i):
+		return int(self.indptr[i+1] - self.indptr[i])
+
+# EOF #
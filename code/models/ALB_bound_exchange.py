@@ -0,0 +1,104 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Bound exchange between concurrently running SUALBSP-2 solvers
+
+# This file contains:
+# 	-A file based bound exchange through which any number of solvers, started
+#	 independently, publish and poll the best known cycle time
+#	-A Gurobi callback for the monolithic MIPs which publishes their incumbents
+#	 and tightens their cycle time upper bound mid-solve
+
+# Packages
+import os
+import time
+import fcntl
+
+NO_INCUMBENT = float('inf')
+
+# Class defining the file based exchange. The file holds a single number, the best
+# cycle time published so far, and is only ever rewritten with a smaller value
+class FileBoundExchange:
+	def __init__(self, path, pollInterval=0.5):
+		self.path = path
+		self.pollInterval = pollInterval
+		self.lastPoll = 0
+		self.lastModified = None
+		self.bestCycleTimeUB = NO_INCUMBENT
+		# create the file if we are the first solver to use it
+		open(self.path, 'a').close()
+
+	def read_bound(self, f):
+		f.seek(0)
+		try:
+			return float(f.read().strip())
+		except ValueError:
+			return NO_INCUMBENT
+
+	def publish_incumbent(self, cycleTime):
+		if cycleTime >= self.bestCycleTimeUB:
+			return
+		with open(self.path, 'r+') as f:
+			fcntl.flock(f, fcntl.LOCK_EX)
+			self.bestCycleTimeUB = min(self.read_bound(f), cycleTime)
+			f.seek(0)
+			f.truncate()
+			f.write('{}\n'.format(self.bestCycleTimeUB))
+			f.flush()
+			fcntl.flock(f, fcntl.LOCK_UN)
+
+	def poll_upper_bound(self):
+		# rate limited so polling from inside a callback costs (almost) nothing
+		now = time.time()
+		if now - self.lastPoll < self.pollInterval:
+			return self.bestCycleTimeUB
+		self.lastPoll = now
+		# only re-read the file if another solver has written to it
+		modified = os.stat(self.path).st_mtime_ns
+		if modified != self.lastModified:
+			self.lastModified = modified
+			with open(self.path, 'r') as f:
+				fcntl.flock(f, fcntl.LOCK_SH)
+				self.bestCycleTimeUB = min(self.bestCycleTimeUB, self.read_bound(f))
+				fcntl.flock(f, fcntl.LOCK_UN)
+		return self.bestCycleTimeUB
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# GUROBI CALLBACK
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+def callback_exchange_bounds(model, where):
+	# The model must have the following attributes attached:
+	#	_channel:		portfolio incumbent channel (or None)
+	#	_exchange:		bound exchange (or None)
+	#	_cycleTime:		cycle time variable
+	#	_cycleTimeUB:	current upper bound on the cycle time
+	# (gurobipy is only imported by the solvers, never by the portfolio itself)
+	from gurobipy import GRB
+	if where == GRB.Callback.MIPSOL:
+		cycleTime = round(model.cbGet(GRB.Callback.MIPSOL_OBJ))
+		if model._exchange is not None:
+			sharedUB = model._exchange.poll_upper_bound()
+			if sharedUB < model._cycleTimeUB:
+				model._cycleTimeUB = sharedUB
+			if cycleTime > model._cycleTimeUB:
+				# another solver already has a better solution, reject this one
+				model.cbLazy(model._cycleTime <= model._cycleTimeUB)
+				return
+			model._exchange.publish_incumbent(cycleTime)
+		if model._channel is not None:
+			model._channel.publish_incumbent(cycleTime)
+			model._channel.publish_lower_bound(model.cbGet(GRB.Callback.MIPSOL_OBJBND))
+	elif where == GRB.Callback.MIPNODE:
+		if model._exchange is None:
+			return
+		if model.cbGet(GRB.Callback.MIPNODE_STATUS) != GRB.OPTIMAL:
+			return
+		# tighten the cycleTimeUB constraint for the rest of the tree search
+		sharedUB = model._exchange.poll_upper_bound()
+		if sharedUB < model._cycleTimeUB:
+			model._cycleTimeUB = sharedUB
+			model.cbLazy(model._cycleTime <= sharedUB)
+	elif where == GRB.Callback.MIP:
+		if model._channel is not None and model._channel.stop_requested():
+			model.terminate()
+
+# EOF #
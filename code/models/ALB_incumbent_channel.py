@@ -0,0 +1,130 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Shared incumbent channel for the SUALBSP-2 portfolio
+
+# This file contains:
+# 	-A small shared-memory block through which solvers racing on the same
+#	 instance publish their incumbent cycle times and lower bounds
+#	-The channel doubles as a bound exchange (see ALB_bound_exchange.py)
+
+# Packages
+import struct
+from multiprocessing import shared_memory, resource_tracker
+
+# Layout of the shared block:
+#	header: number of slots, stop flag
+#	slot:	incumbent cycle time, lower bound, status
+HEADER_FORMAT = '<ii'
+SLOT_FORMAT = '<ddi4x'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+SLOT_SIZE = struct.calcsize(SLOT_FORMAT)
+
+# slot status values
+STATUS_RUNNING = 0
+STATUS_OPTIMAL = 1
+STATUS_FINISHED = 2
+
+NO_INCUMBENT = float('inf')
+
+# Class defining the incumbent channel. Each solver owns one slot and is the only
+# process writing to it, so no locking is needed between the racing processes
+class IncumbentChannel:
+	def __init__(self, name=None, slot=None, numSlots=0):
+		self.slot = slot
+		if name is None:
+			# create a new channel (done by the portfolio)
+			self.shm = shared_memory.SharedMemory(create=True, size=HEADER_SIZE + numSlots*SLOT_SIZE)
+			self.owner = True
+			struct.pack_into(HEADER_FORMAT, self.shm.buf, 0, numSlots, 0)
+			for s in range(numSlots):
+				struct.pack_into(SLOT_FORMAT, self.shm.buf, self.slot_offset(s),
+								 NO_INCUMBENT, 0.0, STATUS_RUNNING)
+		else:
+			# attach to an existing channel (done by each solver)
+			self.shm = shared_memory.SharedMemory(name=name)
+			self.owner = False
+			# stop the resource tracker of this process from removing the portfolio's block
+			try:
+				resource_tracker.unregister(self.shm._name, 'shared_memory')
+			except (AttributeError, KeyError):
+				pass
+		self.name = self.shm.name
+		self.numSlots = struct.unpack_from(HEADER_FORMAT, self.shm.buf, 0)[0]
+
+	def slot_offset(self, s):
+		return HEADER_SIZE + s*SLOT_SIZE
+
+	def read_slot(self, s):
+		return struct.unpack_from(SLOT_FORMAT, self.shm.buf, self.slot_offset(s))
+
+	def write_slot(self, incumbent, lowerBound, status):
+		struct.pack_into(SLOT_FORMAT, self.shm.buf, self.slot_offset(self.slot),
+						 incumbent, lowerBound, status)
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	# SOLVER SIDE
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	def publish_incumbent(self, cycleTime):
+		# only ever improve this solver's incumbent
+		incumbent, lowerBound, status = self.read_slot(self.slot)
+		if cycleTime < incumbent:
+			self.write_slot(cycleTime, lowerBound, status)
+
+	def publish_lower_bound(self, cycleTimeLB):
+		incumbent, lowerBound, status = self.read_slot(self.slot)
+		if cycleTimeLB > lowerBound:
+			self.write_slot(incumbent, cycleTimeLB, status)
+
+	def publish_finished(self, cycleTime, optimal):
+		incumbent, lowerBound, status = self.read_slot(self.slot)
+		if cycleTime is not None and cycleTime > 0:
+			incumbent = min(incumbent, cycleTime)
+		if optimal:
+			self.write_slot(incumbent, incumbent, STATUS_OPTIMAL)
+		else:
+			self.write_slot(incumbent, lowerBound, STATUS_FINISHED)
+
+	def poll_upper_bound(self):
+		# best incumbent of any solver, used to tighten this solver's upper bound
+		return self.best_incumbent()[0]
+
+	def stop_requested(self):
+		return struct.unpack_from(HEADER_FORMAT, self.shm.buf, 0)[1] == 1
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	# PORTFOLIO SIDE
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	def request_stop(self):
+		struct.pack_into(HEADER_FORMAT, self.shm.buf, 0, self.numSlots, 1)
+
+	def best_incumbent(self):
+		# returns (cycle time, slot) of the best incumbent over all solvers
+		best = (NO_INCUMBENT, None)
+		for s in range(self.numSlots):
+			incumbent = self.read_slot(s)[0]
+			if incumbent < best[0]:
+				best = (incumbent, s)
+		return best
+
+	def best_lower_bound(self):
+		return max([ self.read_slot(s)[1] for s in range(self.numSlots) ] + [0.0])
+
+	def optimal_slot(self):
+		# returns the first solver to have proven optimality, otherwise None
+		for s in range(self.numSlots):
+			if self.read_slot(s)[2] == STATUS_OPTIMAL:
+				return s
+		return None
+
+	def closed_by_bounds(self):
+		# the best incumbent is also optimal once it meets the best lower bound,
+		# even though no single solver has proven it
+		incumbent, s = self.best_incumbent()
+		return s is not None and incumbent <= self.best_lower_bound()
+
+	def close(self):
+		self.shm.close()
+		if self.owner:
+			self.shm.unlink()
+
+# EOF #
@@ -4,17 +4,20 @@
 
 # This file contains:
 # 	-Classes and methods for storing intance data for the type-2 SUALBSP
+#	-The task relations are stored as packed bitsets and CSR arrays (see
+#	 ALB_bitsets.py and ALB_precedence_graph.py) rather than lists of sets, so
+#	 large instances stay small in memory and are quick to pickle to worker
+#	 processes
 
 # Packages
 import sys
-import pdb 
-import time
 # import itertools
 import csv
-import argparse
 import numpy as np
-import networkx as nx
-from gurobipy import *
+
+# User-defined Functionality
+from ALB_bitsets import BitsetRows
+from ALB_precedence_graph import PrecedenceDAG
 
 # Define globals constants
 if sys.platform == "win32":
@@ -28,6 +31,12 @@ elif sys.platform == "linux" or sys.platform == "linux2":
 
 # Class defining the instance of the overall assembly line
 class AssemblyLineInstance:
+	__slots__ = ('instDir', 'instFilename', 'numTasks', 'tasks', 'procList', 'precList', 'numPrecs',
+				 'precedences', 'altPrecList', 'forwSU', 'backSU', 'numStations', 'stations',
+				 'precGraph', 'feasibleStations', 'feasibleTasks',
+				 'allPredecessors', 'allSuccessors', 'followForw', 'precedeForw', 'followBack',
+				 'precedeBack', 'minCycleTime', 'maxCycleTime', 'bigM')
+
 	def __init__(self, instDir, instFilename):
 		if instDir is None or instFilename is None:
 			return None
@@ -46,12 +55,7 @@ class AssemblyLineInstance:
 		self.create_feasible_task_sets()
 
 		# find all predecessors and successors of each task
-		self.allPredecessors = []
-		for i in self.tasks:
-			self.allPredecessors.append(self.find_all_predecessors(i,set()))
-		self.allSuccessors = []
-		for i in self.tasks:
-			self.allSuccessors.append(self.find_all_successors(i,set()))
+		self.create_transitive_closure()
 
 		# pdb.set_trace()
 		# construct lists of sets defining allowed following and preceding of tasks
@@ -135,7 +139,9 @@ class AssemblyLineInstance:
 
 			# store precedence relations in an alternative manner
 			# pdb.set_trace()
-			self.altPrecList = [set([j for (idash,j) in self.precList if i==idash]) for i in self.tasks]
+			self.altPrecList = BitsetRows.from_sets([ [] for i in self.tasks ])
+			for (i,j) in self.precList:
+				self.altPrecList.rows[i] |= 1 << j
 
 			# read in forward setup times
 			forwardSetups = []
@@ -203,12 +209,10 @@ class AssemblyLineInstance:
 			self.backSU = self.forwSU
 
 	def create_precedence_graph(self):
-		# initialise the graph
-		self.precGraph = nx.DiGraph()
-		self.precGraph.add_nodes_from(self.tasks)
-		# add non-trivial edges
-		for prec in self.precList:
-			self.precGraph.add_edge(prec[0],prec[1])
+		self.precGraph = PrecedenceDAG(self.tasks, self.precList)
+
+	def create_transitive_closure(self):
+		self.allSuccessors, self.allPredecessors = self.precGraph.transitive_closure()
 
 	def calculate_cycle_time_minimum_naive(self):
 		# assuming tasks can be perfectly divided across stations
@@ -228,44 +232,78 @@ class AssemblyLineInstance:
 
 	def create_feasible_station_sets(self):
 		# naively define each task to be possibly assigned any station
-		self.feasibleStations = [ set(self.stations) for i in self.tasks ]
+		allStations = (1 << self.numStations) - 1
+		self.feasibleStations = BitsetRows([ allStations for i in self.tasks ])
 
 	def create_feasible_task_sets(self):
 		# naively define each stations to be possibly assigned any task
-		self.feasibleTasks = [ set(self.tasks) for i in self.stations ]
+		allTasks = (1 << self.numTasks) - 1
+		self.feasibleTasks = BitsetRows([ allTasks for k in self.stations ])
 
 	def construct_sets_of_allowed_followers_and_preceders_for_each_task(self):
-		self.followForw = [ (   set(self.tasks)
-								 - (self.allSuccessors[i] - set(self.precGraph.successors(i)) )
-								 - self.allPredecessors[i])
-								 - set([i])
-								for i in self.tasks ]
-		self.precedeForw = [ set([ j for j in self.tasks 
-									 if i in self.followForw[j] ])
-								for i in self.tasks ]
-		self.followBack = [ set(self.tasks) - self.allSuccessors[i]
-								for i in self.tasks ]
-		self.precedeBack = [ set([ j for j in self.tasks 
-									 if i in self.followBack[j] ])
-								for i in self.tasks ]
-
-	def find_all_successors(self, node, allSuccessors):
-		# (Recursive function)
-		# finds all successors of a given node
-		for succ in self.precGraph.successors(node):
-			if succ not in allSuccessors:
-				allSuccessors.add(succ)
-				self.find_all_successors(succ, allSuccessors)
-		return allSuccessors
-
-	def find_all_predecessors(self, node, allPredecessors):
-		# (Recursive function)
-		# finds all predecessors of a given node
-		for pred in self.precGraph.predecessors(node):
-			if pred not in allPredecessors:
-				allPredecessors.add(pred)
-				self.find_all_predecessors(pred, allPredecessors)
-		return allPredecessors
+		# j may directly follow i unless j is a predecessor of i, or a successor of i
+		# through other tasks
+		allTasks = (1 << self.numTasks) - 1
+		self.followForw = BitsetRows([ allTasks
+									   & ~(self.allSuccessors.rows[i] & ~self.altPrecList.rows[i])
+									   & ~self.allPredecessors.rows[i]
+									   & ~(1 << i)
+									   for i in self.tasks ])
+		self.precedeForw = self.followForw.transpose(self.numTasks)
+		self.followBack = BitsetRows([ allTasks & ~self.allSuccessors.rows[i] for i in self.tasks ])
+		self.precedeBack = self.followBack.transpose(self.numTasks)
+
+	def minimum_setups(self):
+		# the cheapest allowed forward and backward setups into and out of each
+		# task, as arrays (forwardIn, backwardIn, forwardOut, backwardOut). A task
+		# with no allowed forward setup into (out of) it is always the first (last)
+		# of its station, so its backward setup is used instead
+		forwAllowed = self.followForw.to_matrix(self.numTasks)
+		backAllowed = self.followBack.to_matrix(self.numTasks)
+		forwSU = np.where(forwAllowed, self.forwSU, np.inf)
+		backSU = np.where(backAllowed, self.backSU, np.inf)
+		backwardIn = backSU.min(axis=0)
+		backwardOut = backSU.min(axis=1)
+		forwardIn = np.minimum(forwSU.min(axis=0), np.where(forwAllowed.any(axis=0), np.inf, backwardIn))
+		forwardOut = np.minimum(forwSU.min(axis=1), np.where(forwAllowed.any(axis=1), np.inf, backwardOut))
+		return forwardIn, backwardIn, forwardOut, backwardOut
+
+	def insertion_setups(self, i, tasks):
+		# the change in a station's setups when task i is inserted into its
+		# sequence of the given tasks: forward between any two of them, or at the
+		# end or start, next to the backward setup from the last to the first
+		tasks = np.asarray(tasks, dtype=np.int64)
+		between = (  self.forwSU[tasks,i][:,None] + self.forwSU[i,tasks][None,:]
+				   - self.forwSU[np.ix_(tasks,tasks)])
+		atEnd = (  self.forwSU[tasks,i][:,None] + self.backSU[i,tasks][None,:]
+				 - self.backSU[np.ix_(tasks,tasks)])
+		atStart = (  self.backSU[tasks,i][:,None] + self.forwSU[i,tasks][None,:]
+				   - self.backSU[np.ix_(tasks,tasks)])
+		offDiagonal = ~np.eye(len(tasks), dtype=bool)
+		return np.concatenate((between[offDiagonal], atEnd.ravel(), atStart.ravel()))
+
+	def setups_satisfy_triangle_inequality(self):
+		# whether adding a task never decreases a station's load. It does when
+		# taking task i out of any allowed sequence never lengthens it: the setup
+		# which skips i is at most those into and out of i plus its processing
+		# time, between two tasks, at the end or at the start of the sequence
+		forwAllowed = self.followForw.to_matrix(self.numTasks)
+		backAllowed = self.followBack.to_matrix(self.numTasks)
+		forwSU = np.asarray(self.forwSU, dtype=float)
+		backSU = np.asarray(self.backSU, dtype=float)
+		procTimes = np.asarray(self.procList, dtype=float)
+		forw = (forwSU, forwAllowed)
+		back = (backSU, backAllowed)
+		for i in self.tasks:
+			others = np.arange(self.numTasks) != i
+			# (setup into i, setup out of i, setup skipping i)
+			for (into, outOf, skip) in [(forw, forw, forw), (forw, back, back), (back, forw, back)]:
+				allowed = (  skip[1] & (into[1][:,i] & others)[:,None]
+						   & (outOf[1][i,:] & others)[None,:])
+				viaTask = into[0][:,i][:,None] + procTimes[i] + outOf[0][i,:][None,:]
+				if np.any(allowed & (skip[0] > viaTask)):
+					return False
+		return True
 
 	def is_instance_obviousl_infeasible(self):
 		return False
@@ -0,0 +1,76 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Precedence graph for the SUALBSP-2
+
+# This file contains:
+# 	-A minimal directed acyclic graph of the precedence relations, stored as
+#	 CSR adjacency arrays, replacing the networkx DiGraph of the instance and
+#	 of every station sub-problem
+#	-Topological order, transitive closure (as packed bitsets) and the
+#	 sub-graph induced by a subset of tasks, optionally relabelled
+
+# Packages
+from ALB_bitsets import BitsetRows, CSRAdjacency
+
+# Class defining the precedence graph over the given (integer) task labels
+class PrecedenceDAG:
+	__slots__ = ('nodes', 'position', 'succAdj', 'predAdj')
+
+	def __init__(self, nodes, edges):
+		self.nodes = list(nodes)
+		self.position = { node: p for p, node in enumerate(self.nodes) }
+		positionEdges = [ (self.position[i], self.position[j]) for (i,j) in edges ]
+		self.succAdj = CSRAdjacency(len(self.nodes), positionEdges)
+		self.predAdj = CSRAdjacency(len(self.nodes), [ (q,p) for (p,q) in positionEdges ])
+
+	def __len__(self):
+		return len(self.nodes)
+
+	def successors(self, node):
+		return [ self.nodes[q] for q in self.succAdj.neighbours(self.position[node]) ]
+
+	def predecessors(self, node):
+		return [ self.nodes[q] for q in self.predAdj.neighbours(self.position[node]) ]
+
+	def edges(self):
+		return [ (self.nodes[p], self.nodes[q]) for p in range(len(self.nodes))
+				 for q in self.succAdj.neighbours(p) ]
+
+	def topological_order(self):
+		# Kahn's algorithm, returning positions
+		numPreds = [ self.predAdj.degree(p) for p in range(len(self.nodes)) ]
+		order = [ p for p in range(len(self.nodes)) if numPreds[p] == 0 ]
+		for p in order:
+			for q in self.succAdj.neighbours(p):
+				numPreds[q] -= 1
+				if numPreds[q] == 0:
+					order.append(q)
+		if len(order) != len(self.nodes):
+			raise ValueError('The precedence relations contain a cycle')
+		return order
+
+	def transitive_closure(self):
+		# all successors and all predecessors of each node, one row per node in
+		# the order of nodes, with the bits indexed by the node labels
+		order = self.topological_order()
+		successors = [0]*len(self.nodes)
+		for p in reversed(order):
+			for q in self.succAdj.neighbours(p):
+				successors[p] |= successors[q] | (1 << self.nodes[q])
+		predecessors = [0]*len(self.nodes)
+		for p in order:
+			for q in self.predAdj.neighbours(p):
+				predecessors[p] |= predecessors[q] | (1 << self.nodes[q])
+		return BitsetRows(successors), BitsetRows(predecessors)
+
+	def induced_subdag(self, nodes, labels=None):
+		# the graph on the given nodes with the relations between them, where the
+		# i-th node is relabelled labels[i] if labels are given
+		if labels is None:
+			labels = nodes
+		relabel = { node: label for node, label in zip(nodes, labels) }
+		edges = [ (relabel[i], relabel[self.nodes[q]]) for i in nodes
+				  for q in self.succAdj.neighbours(self.position[i]) if self.nodes[q] in relabel ]
+		return PrecedenceDAG(labels, edges)
+
+# EOF #
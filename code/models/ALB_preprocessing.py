@@ -0,0 +1,145 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Preprocessing of the SUALBSP-2 instances for the MIP models
+
+# This file contains:
+# 	-A greedy line balance in a precedence feasible order of the tasks, whose
+#	 cycle time is an upper bound for the instance
+#	-Station windows of each task under that upper bound: task i needs its
+#	 predecessors (and itself) in the stations up to its own, so it cannot be
+#	 assigned before station
+#		ceil((p[i] + sum of p of the predecessors of i) / UB) - 1
+#	 and similarly not after numStations - ceil((p[i] + sum of p of the
+#	 successors of i) / UB)
+#	-Restriction of the feasible stations, feasible tasks and allowed
+#	 followers of the instance to the windows, so the models create no
+#	 variables for tasks which can never share a station, and per pair big-M
+#	 values from the windows
+#	-Reduced cost fixing of the binary variables from the LP relaxation
+
+# Example use (before the model is built):
+#	windows = preprocess_instance(inst)
+#	...
+#	numFixed = fix_by_reduced_costs(model, windows.cycleTimeUB)
+
+# Packages
+import numpy as np
+
+# User-defined Packages
+from ALB_bitsets import BitsetRows
+
+# the earliest and latest station of each task, under the cycle time upper bound
+class StationWindows:
+	def __init__(self, cycleTimeUB, earliest, latest):
+		self.cycleTimeUB = cycleTimeUB
+		self.earliest = earliest
+		self.latest = latest
+
+	def share_station(self):
+		# whether tasks i and j have a station in common, as a boolean matrix
+		return (  np.maximum.outer(self.earliest, self.earliest)
+				<= np.minimum.outer(self.latest, self.latest))
+
+	def station_gap(self, i, j):
+		# the largest value of (station of j) - (station of i)
+		return int(self.latest[j] - self.earliest[i])
+
+def station_time(inst, sequence):
+	# processing, forward setups along the sequence and the backward setup
+	return (  sum([ inst.procList[i] for i in sequence ])
+			+ sum([ inst.forwSU[i][j] for i, j in zip(sequence[:-1], sequence[1:]) ])
+			+ inst.backSU[sequence[-1]][sequence[0]])
+
+def precedence_feasible_order(inst):
+	# the input order if it respects the precedences (as most data sets do),
+	# otherwise a topological order of the precedence graph
+	if all(i < j for (i,j) in inst.precList):
+		return list(inst.tasks)
+	return [ inst.precGraph.nodes[p] for p in inst.precGraph.topological_order() ]
+
+def greedy_line_balance(inst, order, cycleTime):
+	# fill the stations in order, opening the next station when the next task
+	# would exceed the cycle time. Returns the stations or None if more than
+	# numStations are needed
+	stations = [[]]
+	for i in order:
+		if stations[-1] and station_time(inst, stations[-1] + [i]) > cycleTime:
+			stations.append([])
+		stations[-1].append(i)
+		if station_time(inst, stations[-1]) > cycleTime or len(stations) > inst.numStations:
+			return None
+	return stations
+
+def heuristic_cycle_time(inst):
+	# binary search for the least cycle time the greedy balance achieves
+	order = precedence_feasible_order(inst)
+	best = inst.maxCycleTime
+	low, high = int(inst.minCycleTime), int(inst.maxCycleTime)
+	while low <= high:
+		cycleTime = (low + high)//2
+		stations = greedy_line_balance(inst, order, cycleTime)
+		if stations is None:
+			low = cycleTime + 1
+		else:
+			best = min(best, max([ station_time(inst, sequence) for sequence in stations ]))
+			high = cycleTime - 1
+	return best
+
+def station_windows(inst, cycleTimeUB):
+	procTimes = np.array(inst.procList)
+	predLoad = inst.allPredecessors.to_matrix(inst.numTasks) @ procTimes + procTimes
+	succLoad = inst.allSuccessors.to_matrix(inst.numTasks) @ procTimes + procTimes
+	earliest = np.ceil(predLoad/cycleTimeUB).astype(np.int64) - 1
+	latest = inst.numStations - np.ceil(succLoad/cycleTimeUB).astype(np.int64)
+	return StationWindows(cycleTimeUB, np.maximum(earliest, 0), np.minimum(latest, inst.numStations - 1))
+
+def preprocess_instance(inst, cycleTimeUB=None):
+	# restrict the instance to the station windows under the given (or the
+	# heuristic) cycle time upper bound, which also becomes its maxCycleTime
+	if cycleTimeUB is None:
+		cycleTimeUB = heuristic_cycle_time(inst)
+	cycleTimeUB = min(cycleTimeUB, inst.maxCycleTime)
+	windows = station_windows(inst, cycleTimeUB)
+	inst.maxCycleTime = cycleTimeUB
+	stationNums = np.arange(inst.numStations)
+	feasible = ((stationNums[None,:] >= windows.earliest[:,None])
+				& (stationNums[None,:] <= windows.latest[:,None]))
+	inst.feasibleStations = BitsetRows.from_matrix(feasible)
+	inst.feasibleTasks = BitsetRows.from_matrix(feasible.T)
+	# tasks which never share a station cannot follow each other
+	shared = BitsetRows.from_matrix(windows.share_station())
+	inst.followForw = BitsetRows([ row & mask for row, mask in zip(inst.followForw.rows, shared.rows) ])
+	inst.precedeForw = inst.followForw.transpose(inst.numTasks)
+	inst.followBack = BitsetRows([ row & mask for row, mask in zip(inst.followBack.rows, shared.rows) ])
+	inst.precedeBack = inst.followBack.transpose(inst.numTasks)
+	return windows
+
+def fix_by_reduced_costs(model, cycleTimeUB):
+	# solve the LP relaxation, and fix each binary variable whose reduced cost
+	# would push the objective above the upper bound if it changed its value.
+	# Returns the number of variables fixed
+	from gurobipy import GRB
+	model.update()
+	if model.NumQConstrs > 0:
+		# no reduced costs for the bilinear constraints of the SCBF
+		return 0
+	relaxed = model.relax()
+	relaxed.setParam('OutputFlag', 0)
+	relaxed.optimize()
+	if relaxed.Status != GRB.OPTIMAL:
+		return 0
+	bound = relaxed.ObjVal
+	numFixed = 0
+	for var, relaxedVar in zip(model.getVars(), relaxed.getVars()):
+		if var.VType != GRB.BINARY:
+			continue
+		if relaxedVar.X < 0.5 and bound + relaxedVar.RC > cycleTimeUB + 1e-6:
+			var.UB = 0
+			numFixed += 1
+		elif relaxedVar.X > 0.5 and bound - relaxedVar.RC > cycleTimeUB + 1e-6:
+			var.LB = 1
+			numFixed += 1
+	relaxed.dispose()
+	return numFixed
+
+# EOF #
@@ -0,0 +1,163 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Profiling hooks for the SUALBSP-2 solvers
+
+# This file contains:
+# 	-A registry of timed phases (master solve, sub-problem initialisation and
+#	 solve, cut generation, instance preprocessing). Methods are only wrapped
+#	 when profiling is switched on, so an unprofiled run pays nothing
+#	-Optional per-phase cProfile/pyinstrument snapshots
+#	-A sampling profiler writing collapsed stacks per phase, the input format of
+#	 flamegraph.pl and speedscope
+
+# Packages
+import sys
+import json
+import time
+import signal
+import functools
+import cProfile
+
+PROFILE_MODES = ['timers', 'cprofile', 'pyinstrument', 'stacks']
+
+# the methods of each class which are timed as phases
+BENDERS_PHASES = {'AssemblyLineInstance': ['__init__', 'import_instance_data'],
+				  'Station': ['initialise_MIP', 'solve_MIP', 'initialise_CP', 'solve_CP'],
+				  'Solver': ['initialise', 'solve_master_problem', 'solve_sub_problem', 'add_nogood_cut',
+							 'add_logic_cut_infeasible_assignment',
+							 'add_infer_cut_infeasible_assignment_simple',
+							 'add_infer_cut_infeasible_assignment_smart',
+							 'add_infer_cut_infeasible_assignment_smartest',
+							 'add_infer_cut_infeasible_assignment_analytic', 'analytic_infer_cut_bound',
+							 'add_multi_cuts_sub_assignments', 'add_global_bounds']}
+
+# Class defining the registry of timed phases
+class PhaseProfiler:
+	def __init__(self, mode='timers', outputPrefix='profile', sampleInterval=0.001):
+		if mode not in PROFILE_MODES:
+			sys.exit('\n\nError: Unknown profiling mode {}. Options include: {}\n'.format(
+					 mode, ', '.join(PROFILE_MODES)))
+		self.mode = mode
+		self.outputPrefix = outputPrefix
+		self.sampleInterval = sampleInterval
+		# phase name -> [calls, inclusive time, exclusive time]
+		self.timers = {}
+		# stack of [phase name, start time, time spent in nested phases]
+		self.stack = []
+		self.snapshots = {}
+		self.samples = {}
+		if mode == 'pyinstrument':
+			try:
+				import pyinstrument
+			except ImportError:
+				sys.exit('\n\nError: pyinstrument is not installed, use -prof cprofile instead.\n')
+			self.pyinstrument = pyinstrument
+		elif mode == 'stacks':
+			signal.signal(signal.SIGPROF, self.take_sample)
+			signal.setitimer(signal.ITIMER_PROF, sampleInterval, sampleInterval)
+
+	def instrument(self, cls, methods):
+		# replace the given methods of cls with timed wrappers
+		for method in methods:
+			if hasattr(cls, method):
+				setattr(cls, method, self.wrap(getattr(cls, method), '{}.{}'.format(cls.__name__, method)))
+
+	def wrap(self, func, phase):
+		@functools.wraps(func)
+		def timed(*args, **kwargs):
+			self.enter(phase)
+			try:
+				return func(*args, **kwargs)
+			finally:
+				self.exit()
+		return timed
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	# PHASES
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	def enter(self, phase):
+		# snapshots are exclusive to the innermost phase, so pause the enclosing one
+		if self.stack:
+			self.pause_snapshot(self.stack[-1][0])
+		self.stack.append([phase, time.perf_counter(), 0])
+		self.resume_snapshot(phase)
+
+	def exit(self):
+		phase, start, nested = self.stack[-1]
+		self.pause_snapshot(phase)
+		self.stack.pop()
+		elapsed = time.perf_counter() - start
+		timer = self.timers.setdefault(phase, [0, 0, 0])
+		timer[0] += 1
+		timer[1] += elapsed
+		timer[2] += elapsed - nested
+		if self.stack:
+			self.stack[-1][2] += elapsed
+			self.resume_snapshot(self.stack[-1][0])
+
+	def resume_snapshot(self, phase):
+		if self.mode == 'cprofile':
+			if phase not in self.snapshots:
+				self.snapshots[phase] = cProfile.Profile()
+			self.snapshots[phase].enable()
+		elif self.mode == 'pyinstrument':
+			if phase not in self.snapshots:
+				self.snapshots[phase] = self.pyinstrument.Profiler()
+			self.snapshots[phase].start()
+
+	def pause_snapshot(self, phase):
+		if self.mode == 'cprofile':
+			self.snapshots[phase].disable()
+		elif self.mode == 'pyinstrument':
+			self.snapshots[phase].stop()
+
+	def take_sample(self, signum, frame):
+		# one collapsed stack per sample: the phases, then the python frames outside them
+		stack = []
+		while frame is not None:
+			# leave out the wrappers of this module
+			if frame.f_code.co_filename != __file__:
+				stack.append('{}:{}'.format(frame.f_code.co_filename.split('/')[-1], frame.f_code.co_name))
+			frame = frame.f_back
+		phases = [ phase for phase, start, nested in self.stack ] or ['(no phase)']
+		key = ';'.join(phases + stack[::-1])
+		self.samples[key] = self.samples.get(key, 0) + 1
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	# OUTPUT METHODS
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	def write_snapshots(self):
+		# the phase timers are always written, e.g. for the benchmark harness
+		files = ['{}.json'.format(self.outputPrefix)]
+		with open(files[-1], 'w') as f:
+			json.dump({ phase: {'calls': calls, 'inclusive': inclusive, 'exclusive': exclusive}
+						for phase, (calls, inclusive, exclusive) in self.timers.items() }, f, indent=1)
+		if self.mode == 'stacks':
+			signal.setitimer(signal.ITIMER_PROF, 0, 0)
+			files.append('{}.collapsed'.format(self.outputPrefix))
+			with open(files[-1], 'w') as f:
+				for key in sorted(self.samples):
+					f.write('{} {}\n'.format(key, self.samples[key]))
+		for phase, snapshot in self.snapshots.items():
+			if self.mode == 'cprofile':
+				files.append('{}_{}.prof'.format(self.outputPrefix, phase))
+				snapshot.dump_stats(files[-1])
+			elif self.mode == 'pyinstrument':
+				files.append('{}_{}.html'.format(self.outputPrefix, phase))
+				with open(files[-1], 'w') as f:
+					f.write(snapshot.output_html())
+		return files
+
+	def print_report(self, totalRuntime):
+		print('\n! ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ ')
+		print('! \tPROFILE ({}) '.format(self.mode))
+		print('! {:<58} {:>7} {:>10} {:>10}'.format('Phase', 'Calls', 'Incl.', 'Excl.'))
+		for phase, (calls, inclusive, exclusive) in sorted(self.timers.items(), key=lambda t: -t[1][1]):
+			print('! {:<58} {:>7} {:>10.4f} {:>10.4f}'.format(phase, calls, inclusive, exclusive))
+		# whatever is not inside a phase is the python overhead around them
+		outside = totalRuntime - sum([ exclusive for calls, inclusive, exclusive in self.timers.values() ])
+		print('! {:<58} {:>7} {:>10.4f} {:>10.4f}'.format('(outside phases)', '', outside, outside))
+		for f in self.write_snapshots():
+			print('! Wrote {}'.format(f))
+
+# EOF #
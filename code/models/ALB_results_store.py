@@ -0,0 +1,179 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Results store for the SUALBSP-2 experiments
+
+# This file contains:
+# 	-The naming conventions shared by the experiment scripts (model, search and
+#	 creator abbreviations, and the columns of the summary results)
+#	-An append-only SQLite store to which every solver run adds one record holding
+#	 the instance metadata, the configuration, the summary results and the
+#	 per-iteration trace. SQLite's locking makes concurrent runs safe
+#	-The configuration key of a run: its options which differ from the model's
+#	 defaults, so runs of different configurations are kept apart
+
+# Packages
+import os
+import re
+import json
+import time
+
+MODEL_ABRV = {'sualbsp2_fsbf': 'FSBF',
+			  'sualbsp2_ssbf': 'SSBF',
+			  'sualbsp2_scbf': 'SCBF',
+			  'sualbsp2_benders': 'BD'}
+
+SEARCH_ABRV = {'default_s': 'def',
+			   'start_s': 's',
+			   'startpair_s': 'sp',
+			   'start_Then_startpair': 'sTsp',
+			   'startpair_Then_start': 'spTs',
+			   'priority_input_order': 'priio',
+			   'priority_smallest': 'pris',
+			   'priority_smallest_largest': 'prisl',
+			   'priority_first_fail': 'priff',
+			   'io_Then_startpair': 'ioSeq',
+			   's_Then_startpair': 'sSeq',
+			   'sl_Then_startpair': 'slSeq',
+			   'ff_Then_startpair': 'ffSeq',
+			   'na': 'na'}
+
+# list of creator's names for each class of data
+CREATOR_LIST = {1: ['bowman8', 'jackson', 'jaeschke', 'mansoor', 'mertens', 'mitchell'], # n in [0,21]
+				2: ['buxey', 'roszieg', 'sawyer30', 'heskia'], # n in [25,30]
+				3: ['lutz1', 'gunther', 'kilbrid', 'hahn', 'warnecke'], # n in [32,58]
+				4: ['tonge', 'wee-mag', 'arc83'], # n in [70,83]
+				5: ['lutz2', 'lutz3', 'mukherje'], # n in [89,94]
+				6: ['arc111', 'barthold', 'barthol2'], # n in [111,148]
+				7: ['scholl']} # n = 297
+
+# columns of the summary results written by each type of model
+BENDERS_COLUMNS = ['feasible', 'optimal', 'cycle', 'gap', 'runtime', 'inittime', 'RMPtime', 'SPtime',
+				   'SPsolvetime', 'SPoverheadtime', 'iters', 'nodes', 'RMPnodes', 'SPnodes', 'cuts',
+				   'numNG', 'numGLB', 'numGUB', 'numIC', 'numIC2', 'numIC3', 'numLC', 'numIC4', 'numMC']
+MIP_COLUMNS = ['feasible', 'optimal', 'cycle', 'gap', 'runtime', 'nodes']
+
+RESULT_COLUMN_TYPES = {'feasible': 'INTEGER', 'optimal': 'INTEGER', 'cycle': 'REAL', 'gap': 'REAL',
+					   'runtime': 'REAL', 'inittime': 'REAL', 'RMPtime': 'REAL', 'SPtime': 'REAL',
+					   'SPsolvetime': 'REAL', 'SPoverheadtime': 'REAL', 'iters': 'INTEGER',
+					   'nodes': 'INTEGER', 'RMPnodes': 'INTEGER', 'SPnodes': 'INTEGER', 'cuts': 'INTEGER',
+					   'numNG': 'INTEGER', 'numGLB': 'INTEGER', 'numGUB': 'INTEGER', 'numIC': 'INTEGER',
+					   'numIC2': 'INTEGER', 'numIC3': 'INTEGER', 'numLC': 'INTEGER', 'numIC4': 'INTEGER',
+					   'numMC': 'INTEGER'}
+
+# options which only change the output or the budget of a run, and so are left
+# out of its configuration key
+RUN_ONLY_OPTIONS = ['quiet', 'very_quiet', 'statistics', 'check_solution', 'human_readable',
+					'experiment_token', 'results_db', 'trace', 'profile', 'portfolio_channel',
+					'portfolio_slot', 'bound_exchange', 'time_limit', 'work_limit', 'threads',
+					'thread_limit', 'thread_budget', 'max_iterations']
+
+# options of the Benders solvers already in the cut_type, spsolver and search of a run
+BENDERS_KEYED_OPTIONS = ['nogoods', 'global_bounds', 'infer_cuts', 'smart_infer_cuts',
+						 'smartest_infer_cuts', 'logic_cuts', 'sub_problem_solver', 'cp_search']
+
+CREATE_RUNS_TABLE = """
+	CREATE TABLE IF NOT EXISTS runs (
+		id INTEGER PRIMARY KEY AUTOINCREMENT,
+		created TEXT,
+		instance TEXT,
+		class INTEGER,
+		alpha TEXT,
+		creator TEXT,
+		n INTEGER,
+		m INTEGER,
+		model TEXT,
+		spsolver TEXT,
+		search TEXT,
+		cut_type TEXT,
+		config TEXT,
+		flags TEXT,
+		{},
+		trace TEXT
+	)""".format(',\n\t\t'.join([ '{} {}'.format(column, RESULT_COLUMN_TYPES[column])
+								for column in BENDERS_COLUMNS ]))
+
+CREATE_RUNS_INDEX = """
+	CREATE INDEX IF NOT EXISTS runs_configuration
+	ON runs (model, spsolver, class, alpha, creator, search, cut_type, config)"""
+
+# columns added since the first stores were made, with their types
+ADDED_COLUMNS = [('config', 'TEXT'), ('numIC4', 'INTEGER'), ('numMC', 'INTEGER')]
+
+def configuration_key(flags, defaults, keyedOptions=()):
+	# the options which differ from the model's defaults, other than the run-only
+	# options and those already in the key of the run, e.g.
+	# 'analytic_infer_cuts=True master_problem_type=sched'. Empty for the defaults
+	return ' '.join([ '{}={}'.format(option, flags[option]) for option in sorted(flags)
+					  if option not in RUN_ONLY_OPTIONS and option not in keyedOptions
+					  and flags[option] != defaults.get(option) ])
+
+def instance_metadata(filename):
+	# recover the class, alpha and creator of an instance from its path,
+	# e.g. Type-2-SBF2/Type-2-alpha0.50/heskia_01.alb
+	match = re.search(r'alpha([0-9]+\.[0-9]+)', filename)
+	alpha = match.group(1) if match else None
+	# take the longest matching creator so e.g. lutz1 and lutz2 are told apart
+	basename = os.path.basename(filename).lower()
+	classNum, creator = None, None
+	for c in CREATOR_LIST:
+		for name in CREATOR_LIST[c]:
+			if basename.startswith(name) and (creator is None or len(name) > len(creator)):
+				classNum, creator = c, name
+	return classNum, alpha, creator
+
+# Class defining the results store
+class ResultsStore:
+	def __init__(self, dbFile, timeout=60):
+		import sqlite3
+		self.dbFile = dbFile
+		# wait for other runs holding the lock rather than failing
+		self.connection = sqlite3.connect(dbFile, timeout=timeout)
+		self.connection.execute('PRAGMA journal_mode=WAL')
+		with self.connection:
+			self.connection.execute(CREATE_RUNS_TABLE)
+			# a store made before a column was added gains it, NULL for its earlier runs
+			existing = [ row[1] for row in self.connection.execute('PRAGMA table_info(runs)') ]
+			for column, columnType in ADDED_COLUMNS:
+				if column not in existing:
+					self.connection.execute('ALTER TABLE runs ADD COLUMN "{}" {}'.format(column, columnType))
+			self.connection.execute(CREATE_RUNS_INDEX)
+
+	def add_run(self, inst, model, SPsolver, search, cutType, config, flags, results, trace=None):
+		# config is the configuration key of the run (see configuration_key), and
+		# results maps the summary column names to their values, where '-' (cut not
+		# used) is stored as NULL
+		classNum, alpha, creator = instance_metadata(inst.instFilename)
+		record = {'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+				  'instance': inst.instFilename,
+				  'class': classNum,
+				  'alpha': alpha,
+				  'creator': creator,
+				  'n': inst.numTasks,
+				  'm': inst.numStations,
+				  'model': model,
+				  'spsolver': SPsolver,
+				  'search': search,
+				  'cut_type': cutType,
+				  'config': config,
+				  'flags': json.dumps(flags, sort_keys=True),
+				  # numpy scalars of the trace (e.g. node counts) are stored as python numbers
+				  'trace': json.dumps(trace, default=lambda value: value.item())}
+		for column, value in results.items():
+			if value == '-':
+				record[column] = None
+			elif hasattr(value, 'item'):
+				# numpy scalars
+				record[column] = value.item()
+			else:
+				record[column] = value
+		columns = list(record.keys())
+		with self.connection:
+			self.connection.execute('INSERT INTO runs ({}) VALUES ({})'.format(
+									','.join([ '"{}"'.format(c) for c in columns ]),
+									','.join([ '?' for c in columns ])),
+									[ record[c] for c in columns ])
+
+	def close(self):
+		self.connection.close()
+
+# EOF #
@@ -0,0 +1,75 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Solver configuration and results for the SUALBSP-2 models
+
+# This file contains:
+# 	-The configuration of a solve, passed to the Solver of each model in place
+#	 of the module globals which were set from the command line arguments
+#	-The result of a solve, as returned by solve() of each model, so one
+#	 process can solve many instances without re-importing Gurobi each time
+
+# Example use as a library:
+#	import sualbsp2_benders
+#	config = sualbsp2_benders.make_config(global_bounds=True, smartest_infer_cuts=True, quiet=True)
+#	result = sualbsp2_benders.solve('InstancePath/InstanceFile.alb', config)
+#	print(result.cycleTime, result.optimal)
+
+# Class defining the options of a solve. The attributes are the destinations of
+# the model's command line arguments (e.g. config.sub_problem_solver), so the
+# config of a command line run is just its parsed arguments without the file
+class SolverConfig:
+	def __init__(self, parser, **options):
+		# start from the command line defaults of the model
+		for action in parser._actions:
+			if action.dest not in ('help', 'file'):
+				setattr(self, action.dest, action.default)
+		for option, value in options.items():
+			if not hasattr(self, option):
+				raise ValueError('Unknown solver option {}'.format(option))
+			setattr(self, option, value)
+		if self.very_quiet:
+			self.quiet = True
+
+	@classmethod
+	def from_args(cls, parser, args):
+		return cls(parser, **{ option: value for option, value in vars(args).items() if option != 'file' })
+
+	def __repr__(self):
+		return 'SolverConfig({})'.format(', '.join([ '{}={!r}'.format(option, value)
+													 for option, value in sorted(vars(self).items()) ]))
+
+# Class defining the outcome of a solve: the summary results, keyed by the
+# columns of the results store, and the line balance if one was found
+class SolveResult:
+	def __init__(self, summary, taskAssignment=None, startTimes=None, stationLoads=None):
+		self.summary = summary
+		self.feasible = summary['feasible'] == 1
+		self.optimal = summary['optimal'] == 1
+		self.cycleTime = summary['cycle']
+		self.runtime = summary['runtime']
+		self.taskAssignment = taskAssignment
+		self.startTimes = startTimes
+		self.stationLoads = stationLoads
+
+	def __repr__(self):
+		return 'SolveResult(cycleTime={}, feasible={}, optimal={}, runtime={})'.format(
+			   self.cycleTime, self.feasible, self.optimal, self.runtime)
+
+	def to_dict(self):
+		# plain python values only (no sets or numpy scalars), e.g. for JSON
+		result = {'summary': { column: plain_value(value) for column, value in self.summary.items() }}
+		if self.taskAssignment is not None:
+			result['taskAssignment'] = [ sorted(plain_value(i) for i in tasks) for tasks in self.taskAssignment ]
+		if self.startTimes is not None:
+			result['startTimes'] = [ [ plain_value(t) for t in starts ] for starts in self.startTimes ]
+		if self.stationLoads is not None:
+			result['stationLoads'] = [ plain_value(load) for load in self.stationLoads ]
+		return result
+
+def plain_value(value):
+	# numpy scalars have item(), python numbers and strings are kept as they are
+	if hasattr(value, 'item'):
+		return value.item()
+	return value
+
+# EOF #
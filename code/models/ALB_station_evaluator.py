@@ -0,0 +1,73 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Exact evaluation of small station loads for the SUALBSP-2
+
+# This file contains:
+# 	-A dynamic program over the subsets of a station's tasks giving its
+#	 minimum load: the processing times, the forward setups along a
+#	 precedence feasible sequence and the backward setup from its last task
+#	 to its first. Each first task of the sequence is tried in turn, and the
+#	 forward setups into every next task are taken for all last tasks at once
+#	-Used to evaluate the sub-assignments of a station for the multi-cuts of
+#	 the Benders solvers, without building another sub-problem
+
+# Example use:
+#	load = station_load(inst, tasks)
+
+# Packages
+import numpy as np
+
+# User-defined Packages
+from ALB_bitsets import list_to_bits
+
+# the largest station evaluated, as the program takes 2^n steps per first task
+EVALUATOR_TASK_LIMIT = 10
+
+def station_load(inst, tasks):
+	# the minimum load of a station with the given tasks, or None if the
+	# station is too large to evaluate (or has no feasible sequence)
+	tasks = sorted(tasks)
+	n = len(tasks)
+	if n == 0:
+		return 0
+	if n > EVALUATOR_TASK_LIMIT:
+		return None
+	index = np.array(tasks, dtype=np.int64)
+	procTimes = np.array([ inst.procList[i] for i in tasks ])
+	forwSU = np.asarray(inst.forwSU)[np.ix_(index, index)]
+	backSU = np.asarray(inst.backSU)[np.ix_(index, index)]
+	# the predecessors of each task within the station, as bitsets over 0..n-1
+	taskBits = list_to_bits(tasks)
+	predMasks = []
+	for i in tasks:
+		preds = inst.allPredecessors.rows[i] & taskBits
+		predMasks.append(list_to_bits([ a for a, j in enumerate(tasks) if (preds >> j) & 1 ]))
+
+	best = np.inf
+	full = (1 << n) - 1
+	for first in range(n):
+		if predMasks[first] != 0:
+			continue
+		# finish[mask, last]: least time to process the tasks in mask, starting
+		# with first and ending with last
+		finish = np.full((full + 1, n), np.inf)
+		finish[1 << first, first] = procTimes[first]
+		for mask in range(1 << first, full + 1):
+			if not (mask >> first) & 1:
+				continue
+			row = finish[mask]
+			if not np.isfinite(row).any():
+				continue
+			arrival = np.min(row[:,None] + forwSU, axis=0) + procTimes
+			for j in range(n):
+				if (mask >> j) & 1 or predMasks[j] & ~mask:
+					continue
+				nextMask = mask | (1 << j)
+				if arrival[j] < finish[nextMask, j]:
+					finish[nextMask, j] = arrival[j]
+		best = min(best, np.min(finish[full] + backSU[:,first]))
+	if not np.isfinite(best):
+		return None
+	return float(best)
+
+# EOF #
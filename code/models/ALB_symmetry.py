@@ -0,0 +1,146 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Symmetry breaking for the master problems of the SUALBSP-2
+
+# This file contains:
+# 	-Static symmetry breaking constraints on the station assignments (x) of
+#	 the Benders masters (-sb 1):
+#		-the first station holds a task without predecessors and the last
+#		 station a task without successors, which fixes such a task when it
+#		 is the only one
+#		-interchangeable tasks (same processing time, predecessors,
+#		 successors and setups) are assigned stations in index order
+#	-Ordering of adjacent stations at the incumbents of the assignment master
+#	 (-sb 2): the task sets of stations k and k+1 can be swapped whenever no
+#	 task of one precedes a task of the other, as a station's sequencing does
+#	 not depend on its index. An assignment is rejected (lazily) if such a
+#	 swap gives a station k with a smaller first task, so the master only
+#	 explores the representative of each set of swapped assignments. Tasks
+#	 are compared by the first task of their interchangeable class, so the
+#	 representative also satisfies the static constraints
+
+# Packages
+import numpy as np
+
+# User-defined Packages
+from ALB_bitsets import list_to_bits
+
+def interchangeable_task_classes(inst):
+	# the classes of two or more tasks which can swap labels without changing
+	# the instance, each in increasing order
+	procTimes = np.array(inst.procList)
+	forwSU = np.asarray(inst.forwSU)
+	backSU = np.asarray(inst.backSU)
+	classes = []
+	assigned = [False]*inst.numTasks
+	for i in inst.tasks:
+		if assigned[i]:
+			continue
+		members = [i]
+		for j in range(i+1, inst.numTasks):
+			if not assigned[j] and tasks_interchangeable(inst, procTimes, forwSU, backSU, i, j):
+				members.append(j)
+				assigned[j] = True
+		if len(members) > 1:
+			classes.append(members)
+	return classes
+
+def canonical_tasks(inst):
+	# the first task of the interchangeable class of each task
+	canonical = list(inst.tasks)
+	for members in interchangeable_task_classes(inst):
+		for i in members:
+			canonical[i] = members[0]
+	return canonical
+
+def tasks_interchangeable(inst, procTimes, forwSU, backSU, i, j):
+	if procTimes[i] != procTimes[j]:
+		return False
+	if (   inst.allPredecessors.rows[i] != inst.allPredecessors.rows[j]
+		or inst.allSuccessors.rows[i] != inst.allSuccessors.rows[j]):
+		return False
+	# the setups to and from every other task, and between i and j
+	others = np.ones(inst.numTasks, dtype=bool)
+	others[[i,j]] = False
+	for setups in (forwSU, backSU):
+		if (   np.any(setups[i,others] != setups[j,others])
+			or np.any(setups[others,i] != setups[others,j])
+			or setups[i,j] != setups[j,i] or setups[i,i] != setups[j,j]):
+			return False
+	return True
+
+def add_symmetry_breaking_constraints(model, inst, xs):
+	# returns the number of constraints added
+	numAdded = 0
+	firstStation = 0
+	lastStation = inst.numStations - 1
+	sources = [ i for i in inst.tasks if len(inst.allPredecessors[i]) == 0 ]
+	sinks = [ i for i in inst.tasks if len(inst.allSuccessors[i]) == 0 ]
+	for tasks, k, name in ((sources, firstStation, 'symSourceAtFirstStation'),
+						   (sinks, lastStation, 'symSinkAtLastStation')):
+		tasks = [ i for i in tasks if (i,k) in xs ]
+		if len(tasks) == 1:
+			xs[tasks[0],k].lb = 1
+		model.addConstr(sum([ xs[i,k] for i in tasks ]) >= 1, name)
+		numAdded += 1
+	for members in interchangeable_task_classes(inst):
+		for i, j in zip(members[:-1], members[1:]):
+			model.addConstr(  sum([ k*xs[i,k] for k in inst.feasibleStations[i] ])
+							<= sum([ k*xs[j,k] for k in inst.feasibleStations[j] ]),
+							'symInterchangeableTasks[{},{}]'.format(i,j))
+			numAdded += 1
+	return numAdded
+
+def find_swappable_stations(inst, taskAssignment, canonical):
+	# the stations k whose tasks can be swapped with those of k+1, and where
+	# the swap puts a smaller first (canonical) task at station k
+	swappable = []
+	for k in range(inst.numStations - 1):
+		if not taskAssignment[k] or not taskAssignment[k+1]:
+			continue
+		if min([ canonical[i] for i in taskAssignment[k+1] ]) >= min([ canonical[i] for i in taskAssignment[k] ]):
+			continue
+		nextTasks = list_to_bits(taskAssignment[k+1])
+		if all(inst.allSuccessors.rows[i] & nextTasks == 0 for i in taskAssignment[k]):
+			swappable.append(k)
+	return swappable
+
+def station_swap_cut(inst, xs, taskAssignment, k):
+	# forbid exactly the task sets of stations k and k+1 (their swap remains).
+	# Tasks outside the sets are subtracted, so assignments where either
+	# station holds more tasks are not cut
+	tasks = [ (i,k) for i in taskAssignment[k] ] + [ (i,k+1) for i in taskAssignment[k+1] ]
+	otherTasks = [ (i,l) for l in (k, k+1) for i in inst.tasks
+				   if i not in taskAssignment[l] and (i,l) in xs ]
+	return (  sum([ xs[i,l] for (i,l) in tasks ])
+			- sum([ xs[i,l] for (i,l) in otherTasks ]) <= len(tasks) - 1)
+
+def prepare_station_order(model, inst, xs):
+	# store what the callback needs on the model
+	model._inst = inst
+	model._xs = xs
+	model._canonicalTasks = canonical_tasks(inst)
+	model.setParam('LazyConstraints', 1)
+
+def reject_swappable_assignment(model):
+	# in a MIPSOL callback: reject the incumbent if its stations can be
+	# ordered better, returning whether it was rejected
+	inst = model._inst
+	xs = model._xs
+	values = model.cbGetSolution(xs)
+	taskAssignment = [ set() for k in inst.stations ]
+	for (i,k), value in values.items():
+		if value > 0.5:
+			taskAssignment[k].add(i)
+	swappable = find_swappable_stations(inst, taskAssignment, model._canonicalTasks)
+	for k in swappable:
+		model.cbLazy(station_swap_cut(inst, xs, taskAssignment, k))
+	return len(swappable) > 0
+
+# Callback Funtions - order the adjacent stations of the assignment master
+def callback_station_order(model, where):
+	from gurobipy import GRB
+	if where == GRB.Callback.MIPSOL:
+		reject_swappable_assignment(model)
+
+# EOF #
@@ -0,0 +1,55 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Thread budget of the Benders decomposition
+
+# This file contains:
+# 	-A budget of threads for a Benders run: the -th threads, or the cores this
+#	 process may run on, so several runs pinned to a node do not each start a
+#	 thread per core of the machine
+#	-The master and the station sub-problems are solved one after the other,
+#	 so each phase may use the whole budget:
+#		-the new station MIPs of an iteration are solved concurrently, by a pool
+#		 of workers which share the budget between them
+#		-the master's threads are adapted after each iteration to the phase
+#		 which took longer: doubled when the master dominated, halved (but at
+#		 least one) when the stations did, as a cheap master gains little from
+#		 threads but pays their start up on every solve
+
+# Example use:
+#	budget = ThreadBudget(config.threads)
+#	model.setParam('Threads', budget.masterThreads)
+#	numWorkers, threadsPerStation = budget.station_pool(numNewStations)
+#	...
+#	budget.update(masterTime, stationTime)
+
+# Packages
+import os
+
+def available_threads():
+	if hasattr(os, 'sched_getaffinity'):
+		return len(os.sched_getaffinity(0))
+	return os.cpu_count()
+
+# Class defining the threads given to the master and the station sub-problems
+class ThreadBudget:
+	def __init__(self, totalThreads=0, singleThreadStations=False):
+		if totalThreads <= 0:
+			totalThreads = available_threads()
+		self.totalThreads = totalThreads
+		self.singleThreadStations = singleThreadStations
+		self.masterThreads = totalThreads
+
+	def station_pool(self, numStations):
+		# the number of workers and the threads of each station MIP
+		numWorkers = max(1, min(numStations, self.totalThreads))
+		if self.singleThreadStations:
+			return numWorkers, 1
+		return numWorkers, max(1, self.totalThreads//numWorkers)
+
+	def update(self, masterTime, stationTime):
+		if masterTime > stationTime:
+			self.masterThreads = min(2*self.masterThreads, self.totalThreads)
+		elif stationTime > masterTime:
+			self.masterThreads = max(self.masterThreads//2, 1)
+
+# EOF #
@@ -0,0 +1,203 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Benchmark harness for the SUALBSP-2 solvers
+
+# This file contains:
+# 	-Repeated timed solves of fixed small, medium and large instance sets
+#	 (benchmark-instances/) with a set of model configurations
+#	-The Benders runs are profiled (-prof timers) so instance import,
+#	 preprocessing, master build and station solve times are reported
+#	 alongside the full solve
+#	-Medians and spreads of each measurement, compared against a stored
+#	 baseline. The script exits with status 1 on any regression beyond the
+#	 threshold, or if a solve finds a different cycle time
+#	-The instances are generated by
+#	 ../data-processing/generate-benchmark-instances.py (fixed seeds)
+
+# Example calls from the command line:
+#	python benchmark.py -u				(record a new baseline)
+#	python benchmark.py -sz small medium		(compare against the baseline)
+
+# Packages
+import os
+import sys
+import json
+import glob
+import shlex
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+# User-defined Packages
+from ALB_results_store import BENDERS_COLUMNS, MIP_COLUMNS
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK_DIR = os.path.join(MODELS_DIR, 'benchmark-instances')
+SIZES = ['small', 'medium', 'large']
+
+DEFAULT_CONFIGS = ['sualbsp2_benders -gb -ic3 -sps mip',
+				   'sualbsp2_fsbf']
+
+# initilise settings for argument parser
+parser = argparse.ArgumentParser()
+parser.add_argument('-sz', '--sizes', type=str, nargs='+', default=['small', 'medium'], choices=SIZES,
+					help='Instance sets to run')
+parser.add_argument('-m', '--model-config', type=str, action='append', default=None,
+					help='Model and flags to benchmark, e.g. "sualbsp2_benders -gb -ic3 -sps cp3". '
+						 'Can be given several times')
+parser.add_argument('-r', '--repeats', type=int, default=5, help='Number of runs of each instance')
+parser.add_argument('-t', '--time-limit', type=float, default=300,
+					help='Optimisation time limit of each run.')
+parser.add_argument('-b', '--baseline', type=str, default=os.path.join(BENCHMARK_DIR, 'baseline.json'),
+					help='Baseline file to compare against')
+parser.add_argument('-u', '--update-baseline', help='Store these results as the new baseline',
+					action='store_true')
+parser.add_argument('-rt', '--regression-threshold', type=float, default=0.25,
+					help='Relative slow-down of a median which counts as a regression')
+parser.add_argument('-mt', '--minimum-time', type=float, default=0.05,
+					help='Medians below this many seconds are too noisy to count as regressions')
+args = parser.parse_args()
+
+# measurements taken from the profiled phases of a Benders run: name -> (phases, timer)
+PHASE_MEASUREMENTS = {'import': (['AssemblyLineInstance.import_instance_data'], 'inclusive'),
+					  'preprocess': (['AssemblyLineInstance.__init__'], 'exclusive'),
+					  'master build': (['Solver.initialise'], 'inclusive'),
+					  'master solve': (['Solver.solve_master_problem'], 'inclusive'),
+					  'SP solve': (['Station.solve_MIP', 'Station.solve_CP'], 'inclusive'),
+					  'SP build': (['Station.initialise_MIP', 'Station.initialise_CP'], 'inclusive')}
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# RUNNING
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+def run_once(config, instance):
+	# solve the instance once in a scratch directory and return its measurements
+	configArgs = shlex.split(config)
+	model = configArgs[0]
+	isBenders = 'benders' in model
+	command = [sys.executable, os.path.join(MODELS_DIR, '{}.py'.format(model)),
+			   '-H', '-s', '-q', '-vq', '-t', str(args.time_limit)]
+	if isBenders:
+		command += ['-prof', 'timers']
+	command += configArgs[1:] + [instance]
+	with tempfile.TemporaryDirectory() as scratchDir:
+		subprocess.call(command, cwd=scratchDir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+		try:
+			with open(os.path.join(scratchDir, 'summary_results_0.txt'), 'r') as f:
+				row = f.readline().strip().split(',')
+		except FileNotFoundError:
+			return None
+		columns = BENDERS_COLUMNS if isBenders else MIP_COLUMNS
+		summary = dict(zip(columns, row))
+		measurements = {'total': float(summary['runtime']),
+						'optimal': int(summary['optimal']),
+						'cycle': float(summary['cycle'])}
+		if isBenders:
+			measurements['iters'] = int(summary['iters'])
+			with open(os.path.join(scratchDir, 'profile_0.json'), 'r') as f:
+				timers = json.load(f)
+			for name, (phases, timer) in PHASE_MEASUREMENTS.items():
+				measurements[name] = sum([ timers[phase][timer] for phase in phases if phase in timers ])
+	return measurements
+
+def run_benchmark(configs, sizes):
+	results = {}
+	for config in configs:
+		for size in sizes:
+			for instance in sorted(glob.glob(os.path.join(BENCHMARK_DIR, size, '*.alb'))):
+				key = '{} | {}/{}'.format(config, size, os.path.basename(instance))
+				runs = []
+				for r in range(args.repeats):
+					measurements = run_once(config, instance)
+					if measurements is None:
+						print('{}: FAILED'.format(key), flush=True)
+						break
+					runs.append(measurements)
+				if runs:
+					results[key] = summarise_runs(runs)
+					print_result(key, results[key])
+	return results
+
+def summarise_runs(runs):
+	# median and spread (interquartile range, min and max) of each timing
+	summary = {'cycle': runs[0]['cycle'],
+			   'optimal': min([ run['optimal'] for run in runs ]),
+			   'consistent': len({ run['cycle'] for run in runs }) == 1}
+	if 'iters' in runs[0]:
+		summary['iters'] = int(np.median([ run['iters'] for run in runs ]))
+	for name in ['total'] + list(PHASE_MEASUREMENTS):
+		if name not in runs[0]:
+			continue
+		times = np.array([ run[name] for run in runs ])
+		q1, median, q3 = np.percentile(times, [25, 50, 75])
+		summary[name] = {'median': round(median, 4), 'iqr': round(q3 - q1, 4),
+						 'min': round(times.min(), 4), 'max': round(times.max(), 4)}
+	return summary
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# OUTPUT AND REGRESSIONS
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+def print_result(key, summary):
+	print('{}: cycle = {}{}{}'.format(key, summary['cycle'], '' if summary['optimal'] else ' (not optimal)',
+									   ', iters = {}'.format(summary['iters']) if 'iters' in summary else ''))
+	for name in ['total'] + list(PHASE_MEASUREMENTS):
+		if name in summary:
+			print('\t{:<14} median {:>9.4f}  iqr {:>8.4f}  range [{:.4f}, {:.4f}]'.format(
+				  name, summary[name]['median'], summary[name]['iqr'], summary[name]['min'], summary[name]['max']))
+	sys.stdout.flush()
+
+def find_regressions(results, baseline):
+	regressions = []
+	for key, summary in results.items():
+		if key not in baseline:
+			continue
+		old = baseline[key]
+		if summary['cycle'] != old['cycle'] and summary['optimal'] and old['optimal']:
+			regressions.append('{}: cycle time changed from {} to {}'.format(key, old['cycle'], summary['cycle']))
+		if not summary['consistent']:
+			regressions.append('{}: runs found different cycle times'.format(key))
+		for name in ['total'] + list(PHASE_MEASUREMENTS):
+			if name not in summary or name not in old:
+				continue
+			newMedian, oldMedian = summary[name]['median'], old[name]['median']
+			if newMedian < args.minimum_time:
+				continue
+			if newMedian > oldMedian*(1 + args.regression_threshold):
+				regressions.append('{}: {} median {:.4f}s vs baseline {:.4f}s (+{:.0f}%)'.format(
+								   key, name, newMedian, oldMedian, 100*(newMedian/max(oldMedian, 1e-9) - 1)))
+	return regressions
+
+# Script to run the benchmark and compare it against the baseline
+if __name__ == '__main__':
+	if args.model_config is None:
+		configs = DEFAULT_CONFIGS
+	else:
+		configs = args.model_config
+
+	results = run_benchmark(configs, args.sizes)
+
+	if args.update_baseline:
+		# keep the baseline entries of instance sets which were not run this time
+		baseline = {}
+		if os.path.exists(args.baseline):
+			with open(args.baseline, 'r') as f:
+				baseline = json.load(f)
+		baseline.update(results)
+		with open(args.baseline, 'w') as f:
+			json.dump(baseline, f, indent=1, sort_keys=True)
+		print('\nBaseline written to {}'.format(args.baseline))
+		sys.exit()
+
+	if not os.path.exists(args.baseline):
+		sys.exit('\nNo baseline at {}, run with -u to create one.'.format(args.baseline))
+	with open(args.baseline, 'r') as f:
+		baseline = json.load(f)
+	regressions = find_regressions(results, baseline)
+	if regressions:
+		print('\n{} regression(s) beyond {:.0f}%:'.format(len(regressions), 100*args.regression_threshold))
+		for regression in regressions:
+			print('\t' + regression)
+		sys.exit(1)
+	print('\nNo regressions beyond {:.0f}%.'.format(100*args.regression_threshold))
+
+# EOF #
@@ -3,83 +3,273 @@
 # Title:	Sub-tour elimination functions for the SUALBSP-2
 
 # This file contains:
-# 	-Function to eliminate sub-tours found in the relaxed master 
-#	 solution of my Benders decomposition of the SUALBSP-2
-# NOTE: UNFINISHED
+# 	-Function to eliminate sub-tours found in the relaxed scheduling master
+#	 (-mpt sched -ste N) solution of my Benders decomposition of the SUALBSP-2
+#	-The forward and backward sequencing arcs of a station (y and z of the
+#	 scheduling master, g and h of the SSBF) must form a single cycle through
+#	 all the tasks assigned to it. A set S of at most N tasks at station k,
+#	 with a task t of the station outside S, is cut off by
+#		sum of the arcs of k leaving S  >=  x[i,k] + x[t,k] - 1,	i in S
+#	-Cuts are separated on integer (MIPSOL) solutions as lazy constraints, one
+#	 for every violated cycle of the successors of the tasks (found in linear
+#	 time), and on fractional (MIPNODE) solutions as user cuts, by a minimum
+#	 cut between the most assigned task of each station and the others
+#	-The forward arcs (y of the FSBF) follow the order of the tasks in their
+#	 station, so they never form a cycle. Every set S of tasks is left by a
+#	 forward arc or has a backward (w) arc out of one of its tasks,
+#		sum of the y leaving S + sum of the w out of S  >=  1
+#	 which is separated by a minimum cut from each task to the backward arcs
 
 # Packages
-import sys
-import pdb 
-import time
-# import itertools
-import csv
-import argparse
 import numpy as np
-import networkx as nx
-from gurobipy import *
 
-# User-defined Functionality
-from ALB_instance_storage import AssemblyLineInstance
+TOLERANCE = 1e-6
+# user cuts are only separated in the first nodes of the search, deeper in the
+# tree they cost more time than they save
+CUT_NODE_LIMIT = 100
 
-# Define globals constants
-if sys.platform == "win32":
-	INST_DIR = 'instances\\'
-elif sys.platform =="cygwin":
-	INST_DIR = 'instances\\'
-elif sys.platform == "darwin":
-	INST_DIR = 'instances/'
-elif sys.platform == "linux" or sys.platform == "linux2":
-	INST_DIR = 'instances/'
+def prepare_sub_tour_elimination(model, inst, xs, ys, zs, maxSize):
+	# lazy constraints and user cuts of the scheduling master
+	prepare_sub_tour_cuts(model, inst, xs, ys, zs, maxSize)
+	# lazy constraints found in the current optimisation, see keep_sub_tour_cuts
+	model._subTourCuts = []
+	model.setParam('LazyConstraints', 1)
 
+def prepare_sub_tour_cuts(model, inst, xs, ys, zs, maxSize):
+	# store the arcs and assignments as flat arrays on the model, so the
+	# callback can get all their values with a single call
+	arcKeys = list(ys.keys()) + list(zs.keys())
+	arcs = np.array(arcKeys, dtype=np.int64).reshape(-1, 3)
+	model._arcVars = list(ys.values()) + list(zs.values())
+	model._arcTails = arcs[:,0]
+	model._arcHeads = arcs[:,1]
+	model._arcStations = arcs[:,2]
+	assignments = np.array(list(xs.keys()), dtype=np.int64).reshape(-1, 2)
+	model._xVars = list(xs.values())
+	model._xTasks = assignments[:,0]
+	model._xStations = assignments[:,1]
+	model._xs = xs
+	model._numTasks = inst.numTasks
+	model._numStations = inst.numStations
+	model._maxSubTourSize = maxSize
+	model._cutVars = model._arcVars + model._xVars
+	model._separate = separate_sub_tour_cuts
+	# callback of the solver to run after the separation, if any
+	model._nextCallback = None
+	model.setParam('PreCrush', 1)
+
+def prepare_forward_cycle_cuts(model, inst, ys, ws):
+	# user cuts of the FSBF, see separate_forward_cycle_cuts
+	forwArcs = np.array(list(ys.keys()), dtype=np.int64).reshape(-1, 2)
+	backArcs = np.array(list(ws.keys()), dtype=np.int64).reshape(-1, 2)
+	model._forwVars = list(ys.values())
+	model._forwTails = forwArcs[:,0]
+	model._forwHeads = forwArcs[:,1]
+	model._backVars = list(ws.values())
+	model._backTails = backArcs[:,0]
+	model._numTasks = inst.numTasks
+	model._cutVars = model._forwVars + model._backVars
+	model._separate = separate_forward_cycle_cuts
+	# callback of the solver to run after the separation, if any
+	model._nextCallback = None
+	model.setParam('PreCrush', 1)
+
+def keep_sub_tour_cuts(model):
+	# lazy constraints only last for one optimisation, so those found before are
+	# made constraints of the master for the later Benders iterations
+	for cut in model._subTourCuts:
+		model.addConstr(sub_tour_cut(model, *cut), 'subTourElimination')
+	model._subTourCuts = []
 
 # Callback Funtions - use lazy constraints to eliminate sub-tours
 # Applicable to the relaxed master problem
 def callback_sub_tour_elimination(model, where):
-	if where == GRB.callback.MIPSOL: # perform sub-tour elimination when a new MIP solution is found
-		# add STE constraints for each station
-		for k in range(model._numStations):
-			pdb.set_trace()
-			tasks = { i for i in model._tasks if model._xs[i,k].x > 0.5 }
-			n = len(tasks)
-			selected = []
-			# make a list of edges selected in the solution
-			pdb.set_trace()
-			for i in range(n-1):
-				forwSol = model.cbGetSolution([model._ys[i,j] for j in tasks
-															  if [i,j] in model._ys])
-				selected += [(i,j) for j in range(n) if forwSol[j] > 0.5]
-			backSol = model.cbGetSolution([model.ys[i,j] for j in range(n)])
-			# find the shortest cycle in the selected edge list
-			tour = find_sub_tour(n, selected)
-			if len(tour) < n:
-				# add a subtour elimination constraint
-				expr = 0
-				for i in range(len(tour)):
-					for j in range(i+1, len(tour)):
-						expr += model._vars[tour[i], tour[j]]
-				model.cbLazy(expr <= len(tour)-1)
-
-def find_sub_tour(n, edges):
-	visited = [False]*n
+	from gurobipy import GRB
+	if where == GRB.Callback.MIPSOL: # perform sub-tour elimination when a new MIP solution is found
+		values = model.cbGetSolution(model._cutVars)
+		for cut in find_violated_sub_tours(model, values):
+			model.cbLazy(sub_tour_cut(model, *cut))
+			model._subTourCuts.append(cut)
+	elif (where == GRB.Callback.MIPNODE and model.cbGet(GRB.Callback.MIPNODE_STATUS) == GRB.OPTIMAL
+			and model.cbGet(GRB.Callback.MIPNODE_NODCNT) < CUT_NODE_LIMIT):
+		values = model.cbGetNodeRel(model._cutVars)
+		for cut in separate_sub_tour_cuts(model, values):
+			model.cbCut(cut)
+
+# Callback Funtions - use user cuts to tighten the LP relaxation at the nodes
+# Applicable to the SSBF and FSBF, with the callback they would use otherwise
+def callback_user_cuts(model, where):
+	from gurobipy import GRB
+	if (where == GRB.Callback.MIPNODE and model.cbGet(GRB.Callback.MIPNODE_STATUS) == GRB.OPTIMAL
+			and model.cbGet(GRB.Callback.MIPNODE_NODCNT) < CUT_NODE_LIMIT):
+		values = model.cbGetNodeRel(model._cutVars)
+		for cut in model._separate(model, values):
+			model.cbCut(cut)
+	if model._nextCallback is not None:
+		model._nextCallback(model, where)
+
+def find_violated_sub_tours(model, values):
+	# every cycle of the selected arcs which violates its sub-tour elimination
+	# cut, as (tasks of the cycle, station, task i in the cycle, task t outside it)
+	numArcs = len(model._arcVars)
+	arcValues = np.array(values[:numArcs])
+	assigned = np.zeros((model._numTasks, model._numStations))
+	assigned[model._xTasks, model._xStations] = values[numArcs:]
+	station = np.argmax(assigned, axis=1)
+	# each task follows its heaviest arc at its (most assigned) station, which on
+	# integer solutions is its successor in the sequence of the station
+	atStation = np.flatnonzero((model._arcStations == station[model._arcTails]) & (arcValues > TOLERANCE))
+	heaviestFirst = atStation[np.argsort(-arcValues[atStation], kind='stable')]
+	tails, first = np.unique(model._arcTails[heaviestFirst], return_index=True)
+	successor = np.full(model._numTasks, -1, dtype=np.int64)
+	successor[tails] = model._arcHeads[heaviestFirst[first]]
+	violated = []
+	for cycle in find_cycles(successor):
+		k = int(station[cycle[0]])
+		if len(cycle) > model._maxSubTourSize or np.any(station[cycle] != k):
+			continue
+		inCycle = np.zeros(model._numTasks, dtype=bool)
+		inCycle[cycle] = True
+		others = np.flatnonzero(~inCycle & (assigned[:,k] > TOLERANCE))
+		if len(others) == 0:
+			continue
+		leaving = arcValues[(model._arcStations == k) & inCycle[model._arcTails] & ~inCycle[model._arcHeads]].sum()
+		i = int(cycle[np.argmax(assigned[cycle,k])])
+		t = int(others[np.argmax(assigned[others,k])])
+		if leaving < assigned[i,k] + assigned[t,k] - 1 - TOLERANCE:
+			violated.append((cycle.tolist(), k, i, t))
+	return violated
+
+def find_cycles(successor):
+	# all cycles of the successor array (-1 for no successor) in O(n): follow
+	# each unvisited node until reaching a node visited before, which closes a
+	# cycle if it was reached on this walk
+	nexts = successor.tolist()
+	walk = [-1]*len(nexts)
 	cycles = []
-	lengths = []
-	selected = [[] for i in range(n)]
-	for x,y in edges:
-		selected[x].append(y)
-	while True:
-		current = visited.index(False)
-		thiscycle = [current]
-		while True:
-			visited[current] = True
-			neighbors = [x for x in selected[current] if not visited[x]]
-			if len(neighbors) == 0:
+	for start in range(len(nexts)):
+		node = start
+		while node != -1 and walk[node] == -1:
+			walk[node] = start
+			node = nexts[node]
+		if node != -1 and walk[node] == start:
+			cycle = [node]
+			current = nexts[node]
+			while current != node:
+				cycle.append(current)
+				current = nexts[current]
+			cycles.append(np.array(cycle, dtype=np.int64))
+	return cycles
+
+def separate_sub_tour_cuts(model, values):
+	# the violated sub-tour elimination cuts of a fractional solution: for
+	# each station, the minimum cuts between its most assigned task r and each
+	# other task t, in both directions, give the sets S least left by its arcs
+	numArcs = len(model._arcVars)
+	arcValues = np.array(values[:numArcs])
+	assigned = np.zeros((model._numTasks, model._numStations))
+	assigned[model._xTasks, model._xStations] = values[numArcs:]
+	cuts = []
+	found = set()
+	for k in range(model._numStations):
+		tasks = np.flatnonzero(assigned[:,k] > TOLERANCE)
+		if len(tasks) < 2:
+			continue
+		position = np.full(model._numTasks, -1, dtype=np.int64)
+		position[tasks] = np.arange(len(tasks))
+		atStation = np.flatnonzero((model._arcStations == k) & (arcValues > TOLERANCE)
+								   & (position[model._arcTails] >= 0) & (position[model._arcHeads] >= 0))
+		capacity = np.zeros((len(tasks), len(tasks)))
+		np.add.at(capacity, (position[model._arcTails[atStation]], position[model._arcHeads[atStation]]),
+				  arcValues[atStation])
+		np.fill_diagonal(capacity, 0)
+		weights = assigned[tasks,k]
+		r = int(np.argmax(weights))
+		for t in range(len(tasks)):
+			rhs = weights[r] + weights[t] - 1
+			if t == r or rhs <= TOLERANCE:
+				continue
+			for source, sink in ((r, t), (t, r)):
+				flow, sourceSide = min_cut(capacity, source, sink, rhs)
+				if flow >= rhs - TOLERANCE or np.count_nonzero(sourceSide) > model._maxSubTourSize:
+					continue
+				subset = tasks[sourceSide]
+				if frozenset(subset.tolist()) in found:
+					continue
+				# the strongest cut of the set uses the most assigned task on each side
+				i = int(subset[np.argmax(weights[sourceSide])])
+				others = tasks[~sourceSide]
+				j = int(others[np.argmax(weights[~sourceSide])])
+				if flow < assigned[i,k] + assigned[j,k] - 1 - TOLERANCE:
+					found.add(frozenset(subset.tolist()))
+					cuts.append(sub_tour_cut(model, subset.tolist(), k, i, j))
+	return cuts
+
+def separate_forward_cycle_cuts(model, values):
+	# the violated forward cycle cuts of a fractional solution: the backward
+	# arcs of each task lead to an extra sink, and a minimum cut of less than 1
+	# from a task to the sink gives a set S least left by the arcs
+	numForw = len(model._forwVars)
+	n = model._numTasks
+	capacity = np.zeros((n+1, n+1))
+	np.add.at(capacity, (model._forwTails, model._forwHeads), values[:numForw])
+	np.add.at(capacity[:,n], model._backTails, values[numForw:])
+	np.fill_diagonal(capacity, 0)
+	cuts = []
+	found = set()
+	for source in range(n):
+		flow, sourceSide = min_cut(capacity, source, n, 1)
+		if flow >= 1 - TOLERANCE:
+			continue
+		subset = frozenset(np.flatnonzero(sourceSide).tolist())
+		if subset not in found:
+			found.add(subset)
+			cuts.append(forward_cycle_cut(model, subset))
+	return cuts
+
+def min_cut(capacity, source, sink, limit):
+	# maximum flow from source to sink by shortest augmenting paths, stopping
+	# once it reaches limit, and the tasks on the source side of a minimum cut
+	residual = capacity.copy()
+	n = len(residual)
+	flow = 0
+	while flow < limit - TOLERANCE:
+		parent = np.full(n, -1, dtype=np.int64)
+		parent[source] = source
+		queue = [source]
+		for u in queue:
+			reached = np.flatnonzero((residual[u] > TOLERANCE) & (parent < 0))
+			parent[reached] = u
+			queue.extend(reached.tolist())
+			if parent[sink] >= 0:
 				break
-			current = neighbors[0]
-			thiscycle.append(current)
-		cycles.append(thiscycle)
-		lengths.append(len(thiscycle))
-		if sum(lengths) == n:
-			break
-	return cycles[lengths.index(min(lengths))]
-
-# EOF #
\ No newline at end of file
+		if parent[sink] < 0:
+			return flow, parent >= 0
+		path = [sink]
+		while path[-1] != source:
+			path.append(int(parent[path[-1]]))
+		tails = np.array(path[1:])
+		heads = np.array(path[:-1])
+		augment = residual[tails, heads].min()
+		residual[tails, heads] -= augment
+		residual[heads, tails] += augment
+		flow += augment
+	return flow, None
+
+def sub_tour_cut(model, subset, k, i, t):
+	from gurobipy import quicksum
+	inSubset = np.zeros(model._numTasks, dtype=bool)
+	inSubset[subset] = True
+	leaving = np.flatnonzero((model._arcStations == k) & inSubset[model._arcTails] & ~inSubset[model._arcHeads])
+	return quicksum([ model._arcVars[a] for a in leaving.tolist() ]) >= model._xs[i,k] + model._xs[t,k] - 1
+
+def forward_cycle_cut(model, subset):
+	from gurobipy import quicksum
+	inSubset = np.zeros(model._numTasks + 1, dtype=bool)
+	inSubset[list(subset)] = True
+	leaving = np.flatnonzero(inSubset[model._forwTails] & ~inSubset[model._forwHeads])
+	backward = np.flatnonzero(inSubset[model._backTails])
+	return (  quicksum([ model._forwVars[a] for a in leaving.tolist() ])
+			+ quicksum([ model._backVars[a] for a in backward.tolist() ]) >= 1)
+
+# EOF #
@@ -0,0 +1,270 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Parallel experiment scheduler for the SUALBSP-2
+
+# This file contains:
+# 	-A replacement for run_experiments.sh and solve_instance.sh which turns every
+#	 (model, solver, search, class, alpha, creator, instance) combination into a
+#	 job and runs the jobs on a pool of workers
+#	-Each job runs in its own scratch directory, pinned to its own cores, so the
+#	 summary and CP files of concurrent jobs never clash
+#	-Finished jobs are recorded, so an interrupted sweep resumes where it stopped
+
+# Packages
+import os
+import sys
+import glob
+import time
+import queue
+import shutil
+import argparse
+import threading
+import subprocess
+
+# User-defined Packages
+from ALB_results_store import MODEL_ABRV, SEARCH_ABRV, CREATOR_LIST, BENDERS_COLUMNS, MIP_COLUMNS
+
+# initilise settings for argument parser
+parser = argparse.ArgumentParser()
+parser.add_argument('-w', '--workers', type=int, default=0,
+					help='Number of jobs to run at once (0 to fill all available cores)')
+parser.add_argument('-th', '--threads', type=int, default=1,
+					help='Number of cores (and Gurobi threads) given to each job')
+parser.add_argument('-t', '--time-limit', type=float, default=1800,
+					help='Optimisation time limit of each job.')
+parser.add_argument('-f', '--fresh', help='Discard finished jobs and start the sweep again',
+					action='store_true')
+parser.add_argument('-n', '--dry-run', help='Only list the jobs which would be run',
+					action='store_true')
+parser.add_argument('-sd', '--scratch-dir', type=str, default='scratch',
+					help='Directory holding the scratch directory of each job')
+args = parser.parse_args()
+
+# ~~~~~~~~~~~~~~~~~~
+# Input parameters
+
+TIMELIMIT = args.time_limit
+# MODEL_LIST = ['sualbsp2_fsbf', 'sualbsp2_ssbf', 'sualbsp2_scbf', 'sualbsp2_benders']
+SET_NUM_LIST = ['2']
+# CLASS_NUM_LIST = [1, 2, 3]
+MODEL_LIST = ['sualbsp2_benders']
+CLASS_NUM_LIST = [2]
+SP_TYPE = 'opt' # use optimality (opt) or feasibility (feas) sub-problems for Benders
+# SP_SOLVER_LIST = ['mip', 'cp2', 'cp3'] # only used if doing Benders
+SP_SOLVER_LIST = ['cp3']
+# SEARCH_LIST = ['default_s', 'start_s', 'startpair_s', 'start_Then_startpair', 'startpair_Then_start',
+# 			   'priority_input_order', 'priority_smallest', 'priority_smallest_largest', 'priority_first_fail']
+SEARCH_LIST = ['priority_first_fail']
+# ALPHA_LIST = ['1.00', '0.75', '0.50', '0.25']
+ALPHA_LIST = ['0.50', '0.25']
+
+# Benders cutting properties
+BENDERS_FLAGS = {'-nc': False,
+				 '-gb': True,
+				 '-ic': False,
+				 '-ic2': False,
+				 '-ic3': True,
+				 '-lc': False}
+
+# summary results files keep the headers written by solve_instance.sh
+BENDERS_HEADER = ','.join(BENDERS_COLUMNS) + '\n'
+MIP_HEADER = ','.join(MIP_COLUMNS) + '\n'
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.abspath('results')
+JOBS_DIR = os.path.join(RESULTS_DIR, 'jobs')
+RESULTS_DB = os.path.join(RESULTS_DIR, 'results.db')
+FULL_OUTPUT_DIR = os.path.abspath('full-output')
+SCRATCH_DIR = os.path.abspath(args.scratch_dir)
+
+# Class defining a single run of one model configuration on one instance
+class Job:
+	def __init__(self, token, model, SPsolver, search, setNum, classNum, alpha, creator, instNum, instance):
+		self.token = token
+		self.model = model
+		self.SPsolver = SPsolver
+		self.search = search
+		self.classNum = classNum
+		self.alpha = alpha
+		self.creator = creator
+		self.instNum = instNum
+		self.instance = os.path.abspath(instance)
+		# the group of jobs sharing a results file, named as in solve_instance.sh
+		self.group = '{}_SP{}_class{}_alpha{}_{}_{}'.format(MODEL_ABRV[model], SPsolver, classNum,
+															 alpha, creator, SEARCH_ABRV[search])
+		self.name = '{}_{:02d}'.format(self.group, instNum)
+		self.recordFile = os.path.join(JOBS_DIR, '{}.txt'.format(self.name))
+		self.outputFile = os.path.join(FULL_OUTPUT_DIR, 'full-output_{}.txt'.format(self.name))
+		self.scratchDir = os.path.join(SCRATCH_DIR, self.name)
+
+	def command(self, threads):
+		flags = ['-H', '-s', '-q', '-t', str(TIMELIMIT), '-et', str(self.token), '-th', str(threads),
+				 '-db', RESULTS_DB]
+		if self.model == 'sualbsp2_benders':
+			flags += ['-spt', SP_TYPE]
+			flags += [ flag for flag in BENDERS_FLAGS if BENDERS_FLAGS[flag] ]
+			flags += ['-sps', self.SPsolver]
+			if self.SPsolver != 'mip':
+				flags += ['-cps', self.search]
+		return [sys.executable, os.path.join(MODELS_DIR, '{}.py'.format(self.model))] + flags + [self.instance]
+
+	def is_finished(self):
+		return os.path.exists(self.recordFile)
+
+	def run(self, cpus, threads):
+		os.makedirs(self.scratchDir, exist_ok=True)
+		if cpus and hasattr(os, 'sched_setaffinity'):
+			pin = lambda: os.sched_setaffinity(0, cpus)
+		else:
+			pin = None
+		with open(self.outputFile, 'w') as f:
+			subprocess.call(self.command(threads), cwd=self.scratchDir,
+							stdout=f, stderr=subprocess.STDOUT, preexec_fn=pin)
+
+		# record the summary row, leaving the scratch directory behind if the run failed
+		summaryFile = os.path.join(self.scratchDir, 'summary_results_{}.txt'.format(self.token))
+		try:
+			with open(summaryFile, 'r') as f:
+				row = f.read()
+		except FileNotFoundError:
+			return None
+		with open(self.recordFile + '.tmp', 'w') as f:
+			f.write(row)
+		os.replace(self.recordFile + '.tmp', self.recordFile)
+		shutil.rmtree(self.scratchDir, ignore_errors=True)
+		return row
+
+def create_jobs():
+	# mirrors the nested loops of run_experiments.sh
+	jobs = []
+	for model in MODEL_LIST:
+		# if not using Benders then don't iterate over the list of sub-problem solvers
+		if model == 'sualbsp2_benders':
+			SPsolverList = SP_SOLVER_LIST
+		else:
+			SPsolverList = ['na']
+		for SPsolver in SPsolverList:
+			if SPsolver in ['na', 'mip']:
+				searchList = ['na']
+			else:
+				searchList = SEARCH_LIST
+			for search in searchList:
+				for setNum in SET_NUM_LIST:
+					for classNum in CLASS_NUM_LIST:
+						for alpha in ALPHA_LIST:
+							for creator in CREATOR_LIST[classNum]:
+								dataDir = 'Type-2-SBF{}/Type-2-alpha{}/'.format(setNum, alpha)
+								instances = sorted(glob.glob(os.path.join(dataDir, '**', '{}*.alb'.format(creator)),
+															 recursive=True))
+								for instNum, instance in enumerate(instances):
+									jobs.append(Job(len(jobs), model, SPsolver, search, setNum, classNum,
+													alpha, creator, instNum, instance))
+	return jobs
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# WORKER POOL
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+def available_cpus():
+	if hasattr(os, 'sched_getaffinity'):
+		return sorted(os.sched_getaffinity(0))
+	return list(range(os.cpu_count()))
+
+class Scheduler:
+	def __init__(self, jobs, numWorkers, threads):
+		self.jobs = jobs
+		self.threads = threads
+		cpus = available_cpus()
+		if numWorkers <= 0:
+			numWorkers = max(1, len(cpus)//threads)
+		self.numWorkers = numWorkers
+		# give each worker its own block of cores, unless there are not enough to go around
+		if numWorkers*threads <= len(cpus):
+			self.workerCpus = [ set(cpus[w*threads:(w+1)*threads]) for w in range(numWorkers) ]
+		else:
+			self.workerCpus = [ None for w in range(numWorkers) ]
+		self.queue = queue.Queue()
+		self.lock = threading.Lock()
+		self.numDone = 0
+		self.numFailed = 0
+
+	def worker(self, w):
+		while True:
+			try:
+				job = self.queue.get_nowait()
+			except queue.Empty:
+				return
+			start = time.time()
+			row = job.run(self.workerCpus[w], self.threads)
+			with self.lock:
+				self.numDone += 1
+				if row is None:
+					self.numFailed += 1
+					status = 'FAILED (see {})'.format(job.outputFile)
+				else:
+					status = 'optimal' if row.split(',')[1] == '1' else 'not optimal'
+				print('[{}/{}] {} {} ({:.1f}s)'.format(self.numDone, self.numPending, job.name, status,
+													   time.time() - start), flush=True)
+
+	def run(self):
+		pending = [ job for job in self.jobs if not job.is_finished() ]
+		self.numPending = len(pending)
+		print('{} jobs, {} already finished, {} workers with {} thread(s) each'.format(
+			  len(self.jobs), len(self.jobs) - len(pending), self.numWorkers, self.threads))
+		for job in pending:
+			self.queue.put(job)
+		workers = [ threading.Thread(target=self.worker, args=(w,)) for w in range(self.numWorkers) ]
+		for w in workers:
+			w.start()
+		for w in workers:
+			w.join()
+
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# RESULTS FILES
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+def write_results_files(jobs):
+	# collate the finished jobs into the same results files solve_instance.sh writes
+	groups = {}
+	for job in jobs:
+		groups.setdefault(job.group, []).append(job)
+	for group, groupJobs in groups.items():
+		rows = []
+		for job in sorted(groupJobs, key=lambda job: job.instNum):
+			if job.is_finished():
+				with open(job.recordFile, 'r') as f:
+					rows.append(f.read())
+		if not rows:
+			continue
+		if groupJobs[0].model == 'sualbsp2_benders':
+			header = BENDERS_HEADER
+		else:
+			header = MIP_HEADER
+		with open(os.path.join(RESULTS_DIR, 'results_{}.txt'.format(group)), 'w') as f:
+			f.write(header)
+			for row in rows:
+				f.write(row)
+		numOptimal = sum([ row.split(',')[1] == '1' for row in rows ])
+		print('{}: -> {}/{} optimal{}'.format(group, numOptimal, len(groupJobs),
+											  '' if len(rows) == len(groupJobs) else ' (incomplete)'))
+
+# Script to run the full sweep of experiments
+if __name__ == '__main__':
+	jobs = create_jobs()
+	if args.dry_run:
+		for job in jobs:
+			print('{}{}'.format('(done) ' if job.is_finished() else '', ' '.join(job.command(args.threads))))
+		sys.exit()
+
+	for directory in [RESULTS_DIR, JOBS_DIR, FULL_OUTPUT_DIR, SCRATCH_DIR]:
+		os.makedirs(directory, exist_ok=True)
+	if args.fresh:
+		for job in jobs:
+			if job.is_finished():
+				os.remove(job.recordFile)
+
+	start = time.time()
+	s = Scheduler(jobs, args.workers, args.threads)
+	s.run()
+	write_results_files(jobs)
+	print('Total runtime: {:.1f}s, {} failed jobs'.format(time.time() - start, s.numFailed))
+
+# EOF #
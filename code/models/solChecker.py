@@ -8,13 +8,7 @@
 
 # Packages
 import sys
-import pdb 
-import time
 # import itertools
-import csv
-import argparse
-import numpy as np
-import networkx as nx
 
 
 # Define globals constants
@@ -136,7 +136,7 @@ do
 	if [ $instNum -eq 0 ]; then
 		if [[ $model == "sualbsp2_benders" ]]; then
 			if [ $instNum -eq 0 ]; then
-				printf 'feasible,optimal,cycle,gap,runtime,inittime,RMPtime,SPtime,SPsolvetime,SPoverheadtime,iters,nodes,RMPnodes,SPnodes,cuts,numNG,numGLB,numGUB,numIC,numIC2,numIC3,numLC\n' >> "$RESULTS"
+				printf 'feasible,optimal,cycle,gap,runtime,inittime,RMPtime,SPtime,SPsolvetime,SPoverheadtime,iters,nodes,RMPnodes,SPnodes,cuts,numNG,numGLB,numGUB,numIC,numIC2,numIC3,numLC,numIC4,numMC\n' >> "$RESULTS"
 			else
 				true
 			fi
@@ -16,66 +16,124 @@
 #	and simple infer cuts (-ic) on the given instance file.
 
 # Packages
+import os
 import sys
-import pdb 
 import time
+import copy
 # import itertools
 import csv
 import re
 import ast
 import argparse
 import numpy as np
-import networkx as nx
-from gurobipy import *
 
 # User-defined Functionality
 from ALB_instance_storage import AssemblyLineInstance
-from callback_SubTourElim import *
+from ALB_bound_exchange import FileBoundExchange
+from ALB_results_store import ResultsStore, BENDERS_COLUMNS, SEARCH_ABRV, BENDERS_KEYED_OPTIONS, configuration_key
+from ALB_benders_trace import BendersTrace
+from ALB_profiling import PhaseProfiler, BENDERS_PHASES, PROFILE_MODES
+from ALB_solver_config import SolverConfig, SolveResult
+from callback_SubTourElim import prepare_sub_tour_elimination, keep_sub_tour_cuts, callback_sub_tour_elimination
+from ALB_symmetry import add_symmetry_breaking_constraints, prepare_station_order, callback_station_order
+from ALB_station_evaluator import station_load
+from ALB_thread_budget import ThreadBudget
 from solChecker import *
 
+# gurobipy is only imported once a Gurobi model is built (see import_gurobi), so
+# CP sub-problem runs and library imports of this module do not pay for it
+GRB = None
+Model = None
+
+def import_gurobi():
+	global GRB, Model
+	if Model is None:
+		from gurobipy import GRB, Model
+
 # initilise settings for argument parser
-parser = argparse.ArgumentParser()
-parser.add_argument('file', help='Instance file')
-parser.add_argument('-q', '--quiet', help='Some output', action='store_true')
-parser.add_argument('-vq', '--very-quiet', help='Minimal output', action='store_true')
-parser.add_argument('-s', '--statistics', help='Print statistics', action='store_true')
-parser.add_argument('-c', '--check-solution', help='Check solution', action='store_true')
-parser.add_argument('-H', '--human-readable', help='Human readable output', action='store_true')
-parser.add_argument('-ste', '--sub-tour-elimination', type=int, default=0,
-					help='Use sub-tour elimination lazy constraint generation when '
-						 'solving the relaxed master problem. Specify the size of '
-						 'sub-tours to eliminate.')
-parser.add_argument('-nc', '--nogoods', help='Use nogood cuts', action='store_true')
-parser.add_argument('-gb', '--global-bounds', help='Use global bounds', action='store_true')
-parser.add_argument('-ic', '--infer-cuts', help='Use simple infer cuts', action='store_true')
-parser.add_argument('-ic2', '--smart-infer-cuts', help='Use smart infer cuts', action='store_true')
-parser.add_argument('-ic3', '--smartest-infer-cuts', help='Use smartest infer cuts', action='store_true')
-parser.add_argument('-lc', '--logic-cuts', help='Use logic cuts for infeasible assignment', action='store_true')
-parser.add_argument('-b', '--backwardSU-type', type=str, default='copy-forward-setups',
-					help='Type of backward setup times. Options include: ' 
-						 "'from-data'(default), 'just-forward-setups'")
-parser.add_argument('-mi', '--max-iterations', type=int, default=sys.maxsize/2,
-					help='Maximum number of Benders iterations')
-parser.add_argument('-mpt', '--master-problem-type', type=str, default='ass',
-					help='Type of master-problems to use. Options include:'
-						  "'sched' and 'ass'(default)")
-parser.add_argument('-spt', '--sub-problem-type', type=str, default='opt',
-					help='Type of sub-problems to use. Options include:'
-						  "'opt'(default) and 'feas'")
-parser.add_argument('-sps', '--sub-problem-solver', type=str, default='mip',
-					help='Type of sub-problem solver. Options include:'
-						 "'mip'(default), 'cp2', 'cp3', 'tsp-solver'")
-parser.add_argument('-t', '--time-limit', type=float, default=1800,
-					help='Optimisation time limit')
-parser.add_argument('-cps', '--cp-search', type=str, default='start_s',
-					help='Search strategy to use when using CP to solve'
-						 'the scheduing sub-problems. Options include:'
-						  "'default', 'start_s'(default) and others")
-parser.add_argument('-et', '--experiment-token', type=int, default=0,
-					help='Indicator for which experiment is being run')
-parser.add_argument('-ws', '--warm-start', help='Use warm-starts for RMP', action='store_true')
-parser.add_argument('-tl', '--thread-limit', help='Restrict MIP-SP solver to 1 thread', action='store_true')
-args = parser.parse_args()
+def create_parser():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('file', help='Instance file')
+	parser.add_argument('-q', '--quiet', help='Some output', action='store_true')
+	parser.add_argument('-vq', '--very-quiet', help='Minimal output', action='store_true')
+	parser.add_argument('-s', '--statistics', help='Print statistics', action='store_true')
+	parser.add_argument('-c', '--check-solution', help='Check solution', action='store_true')
+	parser.add_argument('-H', '--human-readable', help='Human readable output', action='store_true')
+	parser.add_argument('-ste', '--sub-tour-elimination', type=int, default=0,
+						help='Use sub-tour elimination lazy constraint generation when '
+							 'solving the relaxed master problem. Specify the size of '
+							 'sub-tours to eliminate.')
+	parser.add_argument('-sb', '--symmetry-breaking', type=int, default=0,
+						help='Level of symmetry breaking in the master problem: 1 adds '
+							 'constraints on the first and last stations and on interchangeable '
+							 'tasks, 2 also orders swappable adjacent stations of the assignment master')
+	parser.add_argument('-ssb', '--station-setup-bounds', help='Add lower bounds on the setup times of '
+						'each station to the assignment master', action='store_true')
+	parser.add_argument('-nc', '--nogoods', help='Use nogood cuts', action='store_true')
+	parser.add_argument('-gb', '--global-bounds', help='Use global bounds', action='store_true')
+	parser.add_argument('-ic', '--infer-cuts', help='Use simple infer cuts', action='store_true')
+	parser.add_argument('-ic2', '--smart-infer-cuts', help='Use smart infer cuts', action='store_true')
+	parser.add_argument('-ic3', '--smartest-infer-cuts', help='Use smartest infer cuts', action='store_true')
+	parser.add_argument('-ic4', '--analytic-infer-cuts', help='Use analytic infer cuts, with coefficients from the setups of the station', action='store_true')
+	parser.add_argument('-mc', '--multi-cuts', type=int, default=0,
+						help='Maximum number of extra infer cuts per overloaded station, from '
+							 'its sub-assignments with one task removed')
+	parser.add_argument('-lc', '--logic-cuts', help='Use logic cuts for infeasible assignment', action='store_true')
+	parser.add_argument('-b', '--backwardSU-type', type=str, default='copy-forward-setups',
+						help='Type of backward setup times. Options include: ' 
+							 "'from-data'(default), 'just-forward-setups'")
+	parser.add_argument('-mi', '--max-iterations', type=int, default=sys.maxsize/2,
+						help='Maximum number of Benders iterations')
+	parser.add_argument('-mpt', '--master-problem-type', type=str, default='ass',
+						help='Type of master-problems to use. Options include:'
+							  "'sched' and 'ass'(default)")
+	parser.add_argument('-spt', '--sub-problem-type', type=str, default='opt',
+						help='Type of sub-problems to use. Options include:'
+							  "'opt'(default) and 'feas'")
+	parser.add_argument('-sps', '--sub-problem-solver', type=str, default='mip',
+						help='Type of sub-problem solver. Options include:'
+							 "'mip'(default), 'cp2', 'cp3', 'tsp-solver'")
+	parser.add_argument('-t', '--time-limit', type=float, default=1800,
+						help='Optimisation time limit')
+	parser.add_argument('-wl', '--work-limit', type=float, default=None,
+						help='Deterministic work limit (Gurobi work units) shared by the master and the '
+							 'sub-problems. The time limit still applies as a safety net')
+	parser.add_argument('-cps', '--cp-search', type=str, default='start_s',
+						help='Search strategy to use when using CP to solve'
+							 'the scheduing sub-problems. Options include:'
+							  "'default', 'start_s'(default) and others")
+	parser.add_argument('-et', '--experiment-token', type=int, default=0,
+						help='Indicator for which experiment is being run')
+	parser.add_argument('-ws', '--warm-start', help='Use warm-starts for RMP', action='store_true')
+	parser.add_argument('-tl', '--thread-limit', help='Restrict MIP-SP solver to 1 thread', action='store_true')
+	parser.add_argument('-tb', '--thread-budget', help='Share the -th threads (or the cores available to this run) '
+						'between the master and the new station MIPs of each iteration, which are solved '
+						'concurrently', action='store_true')
+	parser.add_argument('-th', '--threads', type=int, default=0,
+						help='Number of threads Gurobi may use (0 for all cores)')
+	parser.add_argument('-dt', '--dual-type', help='Search over cycle times using station-oriented '
+						'type-1 feasibility checks instead of the Benders master. Only sound when the '
+						'setup times satisfy the triangle inequality, otherwise it is ignored. Slower than '
+						'the Benders master on the benchmark instances (n15: 68.7s vs 8.5s, n20: 52.8s vs '
+						'7.3s), with the same optima', action='store_true')
+	parser.add_argument('-dtt', '--dual-type-time', type=float, default=60,
+						help='Time given to the -dt search, after which the Benders master continues '
+							 'from its bounds for the rest of the time limit')
+	parser.add_argument('-pc', '--portfolio-channel', type=str, default=None,
+						help='Name of the shared incumbent channel when racing in a portfolio')
+	parser.add_argument('-ps', '--portfolio-slot', type=int, default=0,
+						help='Slot of this solver in the portfolio incumbent channel')
+	parser.add_argument('-bx', '--bound-exchange', type=str, default=None,
+						help='File through which cycle time upper bounds are shared with other solvers')
+	parser.add_argument('-db', '--results-db', type=str, default=None,
+						help='SQLite results store to add this run to')
+	parser.add_argument('-tr', '--trace', type=str, default=None,
+						help='File to write the per-iteration Benders trace to, as JSON lines. Only the '
+							 'Benders loop with optimality sub-problems is traced, not -dt or -spt feas')
+	parser.add_argument('-prof', '--profile', type=str, default=None, choices=PROFILE_MODES,
+						help='Time the master, sub-problem, cut and preprocessing phases, optionally '
+							 'with cProfile/pyinstrument snapshots or sampled stacks of each phase')
+	return parser
 
 # Define globals constants
 if sys.platform == "win32":
@@ -91,38 +149,25 @@ elif sys.platform == "linux" or sys.platform == "linux2":
 	INST_DIR = 'instances/'
 	CHUFFED_DIR = 'chuffed/unix/'
 
-# store the given arguments as globals
-PRINT_STATISTICS = args.statistics
-SIZE_OF_SUB_TOURS_TO_ELIMNATE = args.sub_tour_elimination
-USE_NOGOODS = args.nogoods
-USE_GLOBAL_BOUNDS = args.global_bounds
-USE_INFER_CUTS = args.infer_cuts
-USE_INFER_CUTS_SMART = args.smart_infer_cuts
-USE_INFER_CUTS_SMARTEST = args.smartest_infer_cuts
-USE_LOGIC_CUTS = args.logic_cuts
-RMP_TYPE = args.master_problem_type
-SUB_PROBLEM_TYPE = args.sub_problem_type
-SUB_PROBLEM_SOLVER = args.sub_problem_solver
-MAX_BENDERS_ITERATIONS = args.max_iterations
-# BACKWARD_SETUP_TYPE = args.backwardSU_type
-TIMELIMIT = args.time_limit
-CHECK_SOLUTION = args.check_solution
-SEARCH = args.cp_search
-EXPERIMENT_TOKEN = args.experiment_token
-WARM_START = args.warm_start
-SP_THREAD_LIMIT = args.thread_limit
-
-if args.very_quiet:
-	args.quiet = True
+# chuffed nodes counted as one unit of deterministic work (-wl), roughly a second
+CP_NODES_PER_WORK_UNIT = 100000
+
+# resolve the CP models and solver relative to this file so runs can use any working directory
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+CHUFFED_DIR = os.path.join(MODELS_DIR, CHUFFED_DIR)
 
 # Class defining the instance of a particular station and its sub-problem
 class Station:
-	def __init__(self, inst, stationNum, tasks, curCycleTime, bestCycleTimeUB):
+	def __init__(self, inst, config, stationNum, tasks, curCycleTime, bestCycleTimeUB):
 		self.inst = inst
+		self.config = config
 		self.stationNum = stationNum
 		self.tasks = tasks
 		self.curCycleTime = curCycleTime
 		self.bestCycleTimeUB = bestCycleTimeUB
+		# set when the MIP was solved ahead of the station loop (see -tb)
+		self.presolved = False
+		self.solveTime = None
 		self.calculate_tour_maximum_naive()
 		self.initialise()
 
@@ -183,28 +228,20 @@ class Station:
 
 	def reindex_precedence_relations(self):
 		self.oldIndexedTasks = sorted(list(self.tasks))
-		# make precedence graph
-		self.originalPrecList = [ (i,j) for (i,j) in self.inst.precList
-										if i in self.tasks
-										if j in self.tasks ]
+		self.create_precedence_graph_for_station()
 
 		# make list of reindexed precedence relations
-		self.precList = [None for i in range(len(self.originalPrecList))]
-		for i in range(len(self.originalPrecList)):
-			prec = self.originalPrecList[i]
-			self.precList[i] = (self.reindexedTasks[self.oldIndexedTasks.index(prec[0])],
-								self.reindexedTasks[self.oldIndexedTasks.index(prec[1])] )
+		self.precList = self.precGraph.edges()
+		self.originalPrecList = [ (self.oldIndexedTasks[i-1], self.oldIndexedTasks[j-1])
+								  for (i,j) in self.precList ]
 
 		# store precedence relations in an alternative manner
-		self.altPrecList = [set([j for (idash,j) in self.precList if i==idash]) for i in self.reindexedTasks]
+		self.altPrecList = [ set(self.precGraph.successors(i)) for i in self.reindexedTasks ]
 
 	def create_precedence_graph_for_station(self):
-		# initialise the graph
-		self.precGraph = nx.DiGraph()
-		self.precGraph.add_nodes_from(self.reindexedTasks)
-		# add non-trivial edges
-		for prec in self.precList:
-			self.precGraph.add_edge(prec[0],prec[1])
+		# the instance's precedence graph restricted to this station's tasks,
+		# which are relabelled 1,...,len(tasks) in increasing order
+		self.precGraph = self.inst.precGraph.induced_subdag(self.oldIndexedTasks, self.reindexedTasks)
 
 	def construct_sets_of_allowed_followers_and_preceders_for_each_task_assigned_this_station(self):
 		self.stationFollowForw = [ (   set(self.reindexedTasks)
@@ -221,36 +258,31 @@ class Station:
 									if i in self.stationFollowBack[j-1] ])
 									for i in self.reindexedTasks ]
 
-	def find_all_successors(self, node, allSuccessors):
-		# (Recursive function)
-		# finds all successors of a given node
-		for succ in self.precGraph.successors(node):
-			if succ not in allSuccessors:
-				allSuccessors.add(succ)
-				self.find_all_successors(succ, allSuccessors)
-		return allSuccessors
-
-	def find_all_predecessors(self, node, allPredecessors):
-		# (Recursive function)
-		# finds all predecessors of a given node
-		for pred in self.precGraph.predecessors(node):
-			if pred not in allPredecessors:
-				allPredecessors.add(pred)
-				self.find_all_predecessors(pred, allPredecessors)
-		return allPredecessors
-
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 	# MIP SUB-PROBLEM
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 
-	def initialise_MIP(self, time_remaining):
-		self.model = Model('station[%d]' %(self.stationNum))
+	def initialise_MIP(self, time_remaining, threads=None, env=None, work_remaining=None):
+		import_gurobi()
+		if env is None:
+			self.model = Model('station[%d]' %(self.stationNum))
+		else:
+			self.model = Model('station[%d]' %(self.stationNum), env=env)
 		start = time.time()
-		if args.quiet:
+		if self.config.quiet:
 			self.model.setParam('LogToConsole', 0)
 		self.model.setParam('TimeLimit', time_remaining)
-		if SP_THREAD_LIMIT:
+		if work_remaining is not None:
+			self.model.setParam('WorkLimit', max(work_remaining, 0))
+		if threads is not None:
+			self.model.setParam('Threads', threads)
+		elif self.config.thread_limit:
 			self.model.setParam('Threads', 1)
+		elif self.config.threads > 0:
+			self.model.setParam('Threads', self.config.threads)
+		if self.config.dual_type:
+			# type-1 feasibility only needs any sequence that fits the cycle time
+			self.model.setParam('SolutionLimit', 1)
 		# create big-M value
 		self.bigM = self.inst.maxCycleTime # self.curCycleTime
 		self.init_MIP_vars()
@@ -326,7 +358,7 @@ class Station:
 								<= self.load
 								for i in self.tasks), 'backwardLoadStartTime')
 
-		if USE_LOGIC_CUTS:
+		if self.config.logic_cuts or self.config.dual_type:
 			# Station Load: Best upper bound on the load from global bounds
 			self.model.addConstr(self.load <= self.bestCycleTimeUB,
 								'stationLoadUB')
@@ -337,24 +369,29 @@ class Station:
 	def solve_MIP(self):
 		self.model.optimize()
 
+	def solve_MIP_timed(self):
+		start = time.time()
+		self.solve_MIP()
+		self.solveTime = time.time() - start
+
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 	# CP SUB-PROBLEM
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 
 	def initialise_CP(self):
 		start = time.time()
-		if SUB_PROBLEM_SOLVER == 'cp2':
+		if self.config.sub_problem_solver == 'cp2':
 			tmp= 'sualbsp2_subproblem-02'
-		elif SUB_PROBLEM_SOLVER == 'cp3':
+		elif self.config.sub_problem_solver == 'cp3':
 			tmp= 'sualbsp2_subproblem-03'
 		else:
 			tmp= 'sualbsp2_subproblem-03'
-		self.dznFile = 'subprob{}'.format(EXPERIMENT_TOKEN)
-		self.statsFile = 'CPstats{}'.format(EXPERIMENT_TOKEN)
-		self.solFile = 'CPsol{}'.format(EXPERIMENT_TOKEN)
-		self.modelFile = tmp
+		self.dznFile = 'subprob{}'.format(self.config.experiment_token)
+		self.statsFile = 'CPstats{}'.format(self.config.experiment_token)
+		self.solFile = 'CPsol{}'.format(self.config.experiment_token)
+		self.modelFile = os.path.join(MODELS_DIR, tmp)
 		self.fullOutput = 1
-		self.searchStrat = SEARCH
+		self.searchStrat = self.config.cp_search
 		# self.CPtimelimit = 600
 
 		# create datazinc file
@@ -362,9 +399,11 @@ class Station:
 		self.write_dzn_sub_problem_file()
 
 		# flatten datazinc file to a flatzinc file
+		# the flattened model is named after the token so concurrent runs do not collide
 		os.system("mzn2fzn -Gchuffed -D \"my_search = {}; full_output = {};\" "
-				"{}.mzn {}.dzn".format(self.searchStrat,
+				"--output-base {} {}.mzn {}.dzn".format(self.searchStrat,
 									self.fullOutput,
+									self.dznFile,
 									self.modelFile,
 									self.dznFile))
 		self.init_time = time.time() - start
@@ -373,15 +412,9 @@ class Station:
 		# change indexing of assigned tasks
 		self.reindexedTasks = range(1,len(self.tasks)+1)
 		self.reindex_precedence_relations()
-		self.create_precedence_graph_for_station()
 
 		# find all predecessors and successors of each task
-		self.allPredecessors = []
-		for i in self.reindexedTasks:
-			self.allPredecessors.append(self.find_all_predecessors(i,set()))
-		self.allSuccessors = []
-		for i in self.reindexedTasks:
-			self.allSuccessors.append(self.find_all_successors(i,set()))
+		self.allSuccessors, self.allPredecessors = self.precGraph.transitive_closure()
 
 		self.construct_sets_of_allowed_followers_and_preceders_for_each_task_assigned_this_station()
 
@@ -653,7 +686,7 @@ class Station:
 		# create datazinc file for cp solver
 		with open(self.dznFile+'.dzn', 'w') as f:
 			# store the appropriate upper bound on the station load if using logic cuts
-			if USE_LOGIC_CUTS:
+			if self.config.logic_cuts or self.config.dual_type:
 				self.maxLoad = min(self.bestCycleTimeUB, self.naiveLoadUB)
 			else:
 				# self.maxLoad = self.inst.maxCycleTime
@@ -778,7 +811,7 @@ class Station:
 		# call the CP model from  the command line
 		os.system("{0}fzn-chuffed {1}.fzn --time-out {4} -f --verbosity 2 2> {2}.txt "
 				"| solns2out --output-time -o {3}.txt {1}.ozn".format(CHUFFED_DIR,
-																		self.modelFile,
+																		self.dznFile,
 																		self.statsFile,
 																		self.solFile,
 																		round(time_remaining)));
@@ -846,70 +879,120 @@ class Station:
 
 # Solver used to iterate through Benders for a given isntance
 class Solver:
-	def __init__(self, inst):
+	def __init__(self, inst, config):
 		self.inst = inst
+		self.config = config
+		# the configuration as given, as the fallback of -dt replaces self.config
+		self.givenConfig = config
+		if config.portfolio_channel is not None:
+			from ALB_incumbent_channel import IncumbentChannel
+			self.channel = IncumbentChannel(config.portfolio_channel, config.portfolio_slot)
+		else:
+			self.channel = None
+		# solvers in a portfolio exchange bounds through the channel unless given a file
+		if config.bound_exchange is not None:
+			self.boundExchange = FileBoundExchange(config.bound_exchange)
+		else:
+			self.boundExchange = self.channel
 		self.optimisation_times = []
 		self.master_times = []
 		self.sequencing_solve_times = []
 		self.sequencing_overhead_times = []
 		self.all_solutions_ever = [ [] for k in self.inst.stations]
+		self.threadBudget = None
+		self.presolvedStations = {}
+		self.stationEnvs = []
+		self.workUsed = 0.0
 		self.initialise_statistics()
 		self.initialise_cut_sets()
 		self.initialise()
 		self.bigM = self.inst.maxCycleTime
 		self.bestCycleTimeUB = self.inst.maxCycleTime
 		self.bestCycleTimeLB = self.inst.minCycleTime
+		self.sharedUpperBound = False
+		self.trace = BendersTrace(self.config.trace)
 
 	def initialise(self):
+		# the dual-type search solves the station sub-problems directly, no master is needed
+		if self.config.dual_type:
+			self.model = None
+			self.init_time = 0
+			self.optimisation_times.append(self.init_time)
+			return
 		# define Gurobi model for the master
+		import_gurobi()
 		self.model = Model('assemblyline')
-		if args.quiet:
+		if self.config.quiet:
 			self.model.setParam('OutputFlag', 0)
-		if not args.very_quiet:
+		if self.config.thread_budget:
+			self.threadBudget = ThreadBudget(self.config.threads, self.config.thread_limit)
+			self.model.setParam('Threads', self.threadBudget.masterThreads)
+		elif self.config.threads > 0:
+			self.model.setParam('Threads', self.config.threads)
+		if not self.config.very_quiet:
 			print('Initialising the master problem... ', end='', flush=True)
 		# time the initialisation of the master
 		start = time.time()
 		# initialise the master problem
-		if RMP_TYPE == 'sched':
+		if self.config.master_problem_type == 'sched':
 			self.init_vars()
 			self.create_objective()
 			self.create_constraints()
-		elif RMP_TYPE == 'ass':
+			if self.config.sub_tour_elimination > 0:
+				prepare_sub_tour_elimination(self.model, self.inst, self.xs, self.ys, self.zs,
+											 self.config.sub_tour_elimination)
+		elif self.config.master_problem_type == 'ass':
 			self.init_vars_ass()
 			self.create_objective_ass()
 			self.create_constraints_ass()
+			if self.config.symmetry_breaking >= 2:
+				prepare_station_order(self.model, self.inst, self.xs)
+		if self.config.symmetry_breaking >= 1:
+			add_symmetry_breaking_constraints(self.model, self.inst, self.xs)
 		self.init_time = round(time.time() - start,4)
 		self.optimisation_times.append(self.init_time)
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('complete ({:.3f}s).'.format(self.init_time))
 
 	def initialise_cut_sets(self):
-		if USE_NOGOODS:
+		if self.config.nogoods:
 			self.numNoGoods = 0
 			self.noGoods = []
 		else:
 			self.numNoGoods = '-'
-		if USE_LOGIC_CUTS:
+		if self.config.logic_cuts:
 			self.numLogicCuts = 0
 			self.logicCuts = []
 		else:
 			self.numLogicCuts = '-'
-		if USE_INFER_CUTS:
+		if self.config.infer_cuts:
 			self.numInfAssCutsSimple = 0
 			self.infAssCutsSimple = []
 		else:
 			self.numInfAssCutsSimple = '-'
-		if USE_INFER_CUTS_SMART:
+		if self.config.smart_infer_cuts:
 			self.numInfAssCutsSmart = 0
 			self.infAssCutsSmart = []
 		else:
 			self.numInfAssCutsSmart = '-'
-		if USE_INFER_CUTS_SMARTEST:
+		if self.config.smartest_infer_cuts:
 			self.numInfAssCutsSmartest = 0
 			self.infAssCutsSmartest = []
 		else:
 			self.numInfAssCutsSmartest = '-'
-		if USE_GLOBAL_BOUNDS:
+		if self.config.analytic_infer_cuts:
+			self.numInfAssCutsAnalytic = 0
+			self.infAssCutsAnalytic = []
+		else:
+			self.numInfAssCutsAnalytic = '-'
+		self.minInsertionBurden = None
+		if self.config.multi_cuts:
+			self.numMultiCuts = 0
+			self.multiCuts = []
+		else:
+			self.numMultiCuts = '-'
+		self.subAssignmentLoads = {}
+		if self.config.global_bounds:
 			self.numGlobalUB = 0
 			self.globalUB = []
 			self.numGlobalLB = 0
@@ -969,7 +1052,7 @@ class Solver:
 		self.model.update()
 
 	def reinitialise_master(self, time_remaining):
-		if not WARM_START:
+		if not self.config.warm_start:
 			# remove previous RMP solution as the warm-starting solution
 			self.model.reset()
 		# limit the current relaxed master's runtime
@@ -1027,14 +1110,9 @@ class Solver:
 
 	def optimise(self):
 		# find optimal solution to current relaxed master (maybe use callbacks)
-		if SIZE_OF_SUB_TOURS_TO_ELIMNATE > 0:
-			# first add needed information to the model object
-			self.model._tasks = self.inst.tasks
-			self.model._numStations = self.inst.numStations
-			self.model._xs = self.xs
-			self.model._ys = self.ys
-			self.model._zs = self.zs
-			# optimise the master using callbacks
+		if self.config.sub_tour_elimination > 0:
+			keep_sub_tour_cuts(self.model)
+			# optimise the master, separating sub-tours in the callback
 			self.model.optimize(callback_sub_tour_elimination)
 		else:
 			self.model.optimize()
@@ -1058,7 +1136,7 @@ class Solver:
 		self.model.update()
 
 	def reinitialise_master_ass(self, time_remaining):
-		if not WARM_START:
+		if not self.config.warm_start:
 			# remove previous RMP solution as the warm-starting solution
 			self.model.reset()
 		# limit the current relaxed master's runtime
@@ -1089,21 +1167,34 @@ class Solver:
 		self.model.addConstrs((  self.xs.sum('*',k) >= 1
 								for k in self.inst.stations), 'minOneTaskAtEachStation')
 
+		# Each station load with a lower bound on its setups respects the cycle time
+		if self.config.station_setup_bounds:
+			self.create_station_setup_bounds_ass()
+
 		# Bounds for the cycle time
 		self.consUB = self.model.addConstr(self.cycleTime <= self.inst.maxCycleTime, 'consCycleTimeUB')
 		self.consLB = self.model.addConstr(self.cycleTime >= self.inst.minCycleTime, 'consCycleTimeLB')
 
+	def create_station_setup_bounds_ass(self):
+		# every task of a station is entered by one setup and left by one setup,
+		# all forward but one backward setup, so its setups are at least
+		#	sum of cheapest forward setups into its tasks - largest saving of a backward one
+		# (and likewise out of its tasks)
+		forwardIn, backwardIn, forwardOut, backwardOut = self.inst.minimum_setups()
+		for forward, backward, name in ((forwardIn, backwardIn, 'consStationSetupsIntoTasks'),
+										(forwardOut, backwardOut, 'consStationSetupsOutOfTasks')):
+			saving = max(0, (forward - backward).max())
+			self.model.addConstrs((   sum([ (self.inst.procList[i] + forward[i])*self.xs[i,k]
+											for i in self.inst.feasibleTasks[k] ]) - saving
+									<= self.cycleTime
+									for k in self.inst.stations), name)
+
 	def optimise_ass(self):
-		# find optimal solution to current relaxed master (maybe use callbacks)
-		if SIZE_OF_SUB_TOURS_TO_ELIMNATE > 0:
-			# first add needed information to the model object
-			self.model._tasks = self.inst.tasks
-			self.model._numStations = self.inst.numStations
-			self.model._xs = self.xs
-			self.model._ys = self.ys
-			self.model._zs = self.zs
-			# optimise the master using callbacks
-			self.model.optimize(callback_sub_tour_elimination)
+		# find optimal solution to current relaxed master (the assignment master
+		# has no sequencing arcs, so no sub-tours to eliminate)
+		if self.config.symmetry_breaking >= 2:
+			# keep only the best ordering of swappable stations
+			self.model.optimize(callback_station_order)
 		else:
 			self.model.optimize()
 
@@ -1115,7 +1206,7 @@ class Solver:
 		# for the current FULL assignment and cycle time, this
 		#	assignment solution is now removed
 		self.curCycleTime = round(self.curCycleTime)
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('\n CUT: Nogood cut #{} added:'.format(self.numNoGoods))
 			print('   [c = {}, assignment = ...]'.format(self.curCycleTime))
 		# pdb.set_trace()
@@ -1130,7 +1221,7 @@ class Solver:
 	def add_logic_cut_infeasible_assignment(self, k, tasks):
 		# logic cut
 		count = len(tasks)
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('\n   CUT: Logic cut #{} added (infeas. assignment):'.format(self.numLogicCuts))
 			print('  \t[Station {}, tasks = {}]'.format(k,tasks))
 		self.model.addConstr(sum([ (1 - self.xs[i,k]) for i in tasks ]) >= 1,
@@ -1143,7 +1234,7 @@ class Solver:
 	def add_infer_cut_infeasible_assignment_simple(self, k, tasks):
 		# infer cut
 		count = len(tasks)
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('   CUT: Infer cut #{} added (simple):'.format(self.numInfAssCutsSimple))
 			print('  \t[Station {}: tasks = {} implies c >= {}]'.format(k,tasks,round(self.curStationLoad[k])))
 		self.model.addConstr(self.cycleTime >=   self.curStationLoad[k] 
@@ -1224,7 +1315,7 @@ class Solver:
 			burdenUB[i] = self.inst.procList[i] + maxSetup[i] - minLinkingSetup[i]
 
 		# pdb.set_trace()
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('   CUT: Infer cut #{} added (smart):'.format(self.numInfAssCutsSmart))
 			print('  \t[Station {}: tasks = {} implies c >= {}]'.format(k,tasks,round(self.curStationLoad[k])))
 		self.model.addConstr(self.cycleTime >=   self.curStationLoad[k] 
@@ -1296,7 +1387,7 @@ class Solver:
 			burdenLB[i] = self.inst.procList[i] + minSetup[i]
 
 		# pdb.set_trace()
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('   CUT: Infer cut #{} added (smartest):'.format(self.numInfAssCutsSmartest))
 			print('  \t[Station {}: tasks = {} implies c >= {}]'.format(k,tasks,round(self.curStationLoad[k])))
 		self.model.addConstr(self.cycleTime >=   self.curStationLoad[k] 
@@ -1310,6 +1401,76 @@ class Solver:
 										'cycleTime':self.curStationLoad[k]})
 		self.numInfAssCutsSmartest += 1
 
+	def analytic_infer_cut_bound(self, k, tasks, load):
+		# the right-hand side of an analytic infer cut, whose coefficients are
+		# the marginal load of each task from the setups of the station's own
+		# sequence. Removing task i from the station saves at most its processing
+		# time plus the largest change in setups of inserting i into the sequence
+		# of the other tasks (or the backward setup of i alone). Adding task j
+		# costs at least its processing time plus the smallest such change over
+		# all tasks, which may be negative
+		if self.minInsertionBurden is None:
+			self.minInsertionBurden = [None for i in self.inst.tasks]
+			for j in self.inst.tasks:
+				others = [ a for a in self.inst.tasks if a != j ]
+				self.minInsertionBurden[j] = (  self.inst.procList[j]
+											  + min([self.inst.backSU[j][j]] + list(self.inst.insertion_setups(j, others))))
+		burdenUB = self.insertion_burdens(tasks)
+		otherTasks = set(self.inst.tasks).difference(set(tasks))
+		return (  load
+				- sum([ burdenUB[i]*(1 - self.xs[i,k]) for i in tasks ])
+				+ sum([ self.minInsertionBurden[j]*self.xs[j,k]
+						for j in otherTasks if (j,k) in self.xs ]))
+
+	def insertion_burdens(self, tasks):
+		# the largest load task i of the station can add to the other tasks
+		burdenUB = {}
+		for i in tasks:
+			remainingTasks = [ a for a in tasks if a != i ]
+			burdenUB[i] = (  self.inst.procList[i]
+						   + max([self.inst.backSU[i][i]] + list(self.inst.insertion_setups(i, remainingTasks))))
+		return burdenUB
+
+	def add_infer_cut_infeasible_assignment_analytic(self, k, tasks):
+		# infer cut
+		if not self.config.very_quiet:
+			print('   CUT: Infer cut #{} added (analytic):'.format(self.numInfAssCutsAnalytic))
+			print('  \t[Station {}: tasks = {} implies c >= {}]'.format(k,tasks,round(self.curStationLoad[k])))
+		self.model.addConstr(self.cycleTime >= self.analytic_infer_cut_bound(k, tasks, self.curStationLoad[k]),
+							 'InferCut4[{}]'.format(self.numInfAssCutsAnalytic))
+		self.infAssCutsAnalytic.append({'stationNum':k, 
+										'tasks':tasks, 
+										'cycleTime':self.curStationLoad[k]})
+		self.numInfAssCutsAnalytic += 1
+
+	def add_multi_cuts_sub_assignments(self, k, tasks):
+		# analytic infer cuts for the sub-assignments of an overloaded station:
+		# remove each task, highest burden first, and evaluate the remaining
+		# load exactly. Each sub-assignment that still exceeds the master cycle
+		# time gets a cut, up to the requested number per station
+		burdenUB = self.insertion_burdens(tasks)
+		numAdded = 0
+		for i in sorted(tasks, key=lambda i: -burdenUB[i]):
+			if numAdded == self.config.multi_cuts:
+				break
+			subTasks = set(tasks).difference([i])
+			key = frozenset(subTasks)
+			if key not in self.subAssignmentLoads:
+				self.subAssignmentLoads[key] = station_load(self.inst, subTasks)
+			load = self.subAssignmentLoads[key]
+			if load is None or round(load, 2) <= round(self.curCycleTime, 2):
+				continue
+			if not self.config.very_quiet:
+				print('   CUT: Multi cut #{} added:'.format(self.numMultiCuts))
+				print('  \t[Station {}: tasks = {} implies c >= {}]'.format(k,subTasks,round(load)))
+			self.model.addConstr(self.cycleTime >= self.analytic_infer_cut_bound(k, subTasks, load),
+								 'MultiCut[{}]'.format(self.numMultiCuts))
+			self.multiCuts.append({'stationNum':k, 
+								   'tasks':subTasks, 
+								   'cycleTime':load})
+			self.numMultiCuts += 1
+			numAdded += 1
+
 	def add_global_bounds(self, allowGlobalUB):
 		# method to add all global bounds after all sub-problems have completed
 
@@ -1317,7 +1478,9 @@ class Solver:
 			# upper bound
 			cycleTimeUB = round(max([ self.curStationLoad[k] for k in self.inst.stations ]))
 			# pdb.set_trace()
-			if cycleTimeUB < self.bestCycleTimeUB:
+			# also take our own solution if it matches a bound received from another solver
+			if cycleTimeUB < self.bestCycleTimeUB or \
+					(self.sharedUpperBound and cycleTimeUB == self.bestCycleTimeUB):
 				self.bestCycleTimeUB = cycleTimeUB
 				self.add_global_upper_bound()
 
@@ -1333,7 +1496,7 @@ class Solver:
 
 	def add_global_upper_bound(self):
 		# global bound
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('\n BOUND: Global UB #{} added: [c <= {}]'.format(self.numGlobalUB,
 																	self.bestCycleTimeUB))
 		# change the rhs
@@ -1342,12 +1505,36 @@ class Solver:
 		self.globalUB.append(self.bestCycleTimeUB)
 		self.numGlobalUB += 1
 
+		# the upper bound now comes from one of our own solutions
+		self.sharedUpperBound = False
+
+		# share the new incumbent with the other solvers
+		if self.boundExchange is not None:
+			self.boundExchange.publish_incumbent(self.bestCycleTimeUB)
+		if self.channel is not None:
+			self.channel.publish_incumbent(self.bestCycleTimeUB)
+
 		# store current Benders iteration for future referral
 		self.mostRecentUpperBoundIter = self.bendersIter
 
+	def poll_shared_upper_bound(self):
+		# tighten the master with an incumbent found by another solver. We hold no
+		# solution achieving this bound, which is recorded in sharedUpperBound
+		sharedUB = self.boundExchange.poll_upper_bound()
+		if sharedUB < self.bestCycleTimeUB:
+			if not self.config.very_quiet:
+				print('\n BOUND: Shared UB received: [c <= {}]'.format(sharedUB))
+			self.bestCycleTimeUB = round(sharedUB)
+			self.consUB.setAttr('rhs', self.bestCycleTimeUB)
+			self.sharedUpperBound = True
+			self.model.update()
+			# only an iteration whose assignment has been stored can be referred to
+			if len(self.all_solutions_ever[0]) > self.bendersIter:
+				self.mostRecentUpperBoundIter = self.bendersIter
+
 	def add_global_lower_bound(self):
 		# global bound
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('\n BOUND: Global LB #{} added: [c >= {}]'.format(self.numGlobalLB,
 																	self.bestCycleTimeLB))
 		# change the rhs
@@ -1375,41 +1562,55 @@ class Solver:
 
 		while not doneBenders:
 			# early termination consitions
-			if self.bendersIter >= MAX_BENDERS_ITERATIONS:
+			if self.bendersIter >= self.config.max_iterations:
 				sys.exit('Terminating. Maximum number of Benders iterations exceeded.')
 
 			# define the time used up until this relaxed master
 			self.RMP_time_used = round(time.time()-startBenders,4)
-			if self.RMP_time_used > TIMELIMIT:
+			if self.budget_exhausted(startBenders):
 				doneBenders = True
 				self.time_limit_exceeded = True
 				break
+			# another solver in the portfolio has already proven optimality
+			if self.channel is not None and self.channel.stop_requested():
+				doneBenders = True
+				self.time_limit_exceeded = True
+				break
+			# tighten the upper bound with incumbents found by other solvers
+			if self.boundExchange is not None:
+				self.poll_shared_upper_bound()
 			# default to allowing a global UB this iteration
 			allowGlobalUB = True
-			if not args.very_quiet:
-				print('\n{:.1f}/{} seconds elapsed'.format(self.RMP_time_used,TIMELIMIT))
+			if not self.config.very_quiet:
+				print('\n{:.1f}/{} seconds elapsed'.format(self.RMP_time_used,self.config.time_limit))
 				print('===============================')
 				print('Master %d: ' %(self.bendersIter), end='', flush=True)
 
 			# Master optimisation for current Benders iteration
-			self.solve_master_problem(TIMELIMIT - self.RMP_time_used)
+			self.trace.start_iteration(self, self.RMP_time_used)
+			self.solve_master_problem(self.config.time_limit - self.RMP_time_used)
+			self.trace.record_master(self)
 
 			self.gap.append(round(float((self.bestCycleTimeUB - self.curCycleTime)/self.curCycleTime)*100,4))
 
-			if time.time() - startBenders > TIMELIMIT:
+			if self.budget_exhausted(startBenders):
 				self.master_timed_out = True
 				doneBenders = True
 				self.time_limit_exceeded = True
 				break
 
-			if not args.very_quiet:
+			# the relaxed master objective is a valid lower bound on the cycle time
+			if self.channel is not None:
+				self.channel.publish_lower_bound(self.curCycleTime)
+
+			if not self.config.very_quiet:
 				print('\tCycle: \t{}'.format(round(self.curCycleTime)))
 				print('\t\tUB: \t{}'.format(self.bestCycleTimeUB))
 				print('\t\tGap: \t{:.2f} %\n'.format(self.gap[self.bendersIter]))
 
 			# !~~~~~ this should probably check if gap <= 0 as we might skip a cycle time value right?
 			# if gap found is 0 then we have already found a feasible solution tp the sub-problems
-			if self.gap[self.bendersIter] == 0:
+			if self.gap[self.bendersIter] == 0 and not self.sharedUpperBound:
 				# ignore the current master solution and take the old one instead
 				# pdb.set_trace()
 				for k in self.inst.stations:
@@ -1424,28 +1625,44 @@ class Solver:
 					self.all_solutions_ever[k].append({'tasks': self.taskAssignment[k]})
 
 			# solve each sub-problem, adding cuts to master
+			startStations = time.time()
+			if self.threadBudget is not None and self.config.sub_problem_solver == 'mip':
+				self.solve_new_stations_concurrently(self.config.time_limit - round(startStations - startBenders,4))
 			for k in self.inst.stations:
-				if not args.very_quiet:
+				if not self.config.very_quiet:
 					print(' Station %d' %(k), end='', flush=True)
 
 				# define the time used up until starting this sub-problem
 				self.SP_time_used = round(time.time() - startBenders,4)
 				# check if we are out of time before starting each sub-problem
-				if self.SP_time_used > TIMELIMIT:
+				if self.budget_exhausted(startBenders):
 					doneBenders = True
 					self.time_limit_exceeded = True
 					break
 
 				# solve the current station's sub-problem
+				numSolves = len(self.sequencing_solve_times)
+				numNodes = self.statsSubProblemNodes[-1].size
 				result = self.solve_sub_problem(k)
 				# check if time-limit is exceeded
 				if self.time_limit_exceeded:
 					doneBenders = True
 					break
+				# sub-problems which were not solved again are cache hits
+				if len(self.sequencing_solve_times) > numSolves:
+					self.trace.record_station(self, k, False, self.sequencing_solve_times[-1],
+											  self.sequencing_overhead_times[-1],
+											  int(sum(self.statsSubProblemNodes[-1][numNodes:])))
+				else:
+					self.trace.record_station(self, k, True, 0, 0, 0)
 
 				# if we have already processed ths assignment before move onto next sub problem
 				if result == True:
 					allowGlobalUB = False
+			# move the master's threads towards the phase which took longer
+			if self.threadBudget is not None:
+				self.threadBudget.update(self.master_times[-1], time.time() - startStations)
+				self.model.setParam('Threads', self.threadBudget.masterThreads)
 			# if exceeded time limit after sovling a sub-problem exit benders and output
 			if self.time_limit_exceeded:
 				break
@@ -1458,26 +1675,35 @@ class Solver:
 				# add cuts and iterate if we arentt done
 
 				# ** don't do a nogood cut for optimality sub-problems **
-				if USE_NOGOODS:
+				if self.config.nogoods:
 					self.add_nogood_cut(self.taskAssignment)
 					# do not do any global upper bounds if we used a nogood
 					allowGlobalUB = False
 
-				if USE_GLOBAL_BOUNDS:
+				if self.config.global_bounds:
 					self.add_global_bounds(allowGlobalUB)
+				self.trace.end_iteration(self)
 				self.bendersIter += 1
 			else:
 				# self.debug_final_result()
 				# pdb.set_trace()
 				doneBenders = True
 
+		self.trace.end_iteration(self)
+		self.trace.close()
+		self.dispose_station_envs()
+		if self.gap == []:
+			self.gap.append(round(float((self.bestCycleTimeUB - self.bestCycleTimeLB)/self.bestCycleTimeLB)*100,4))
+		elif self.time_limit_exceeded and self.bendersIter == len(self.gap):
+			# stopped before the next master (out of budget or asked to by the
+			# portfolio), report the gap of the previous iteration
+			self.bendersIter -= 1
 		self.benders_time = time.time() - startBenders
 		# self.optimisation_times.append(benders_time)
 		# record the total number of cuts
 
 	def benders_optimise_with_feasibility_sub_problems(self, benders_gap=0.01):
 		# TO BE COMPLETED
-		print('USE_NOGOODS', USE_NOGOODS)
 		self.bendersIter = 0
 		doneBenders = False
 		while not doneBenders:
@@ -1487,38 +1713,338 @@ class Solver:
 			for k in self.inst.stations:
 				# solve sub-problem
 				# blah blah
-				if USE_NOGOODS:
+				if self.config.nogoods:
 					self.add_nogood_cut(self.taskAssignment)
 					# do not do any global upper bounds if we used a nogood
 					allowGlobalUB = False
 
 			doneBenders = True
 
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	# DUAL-TYPE DECOMPOSITION (type-1 feasibility over cycle times)
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	def dual_type_optimise(self):
+		# binary search over the cycle time. Each candidate cycle time is checked by
+		# asking whether the type-1 problem can be solved with the given numStations
+		self.startDual = time.time()
+		# the maximal loads of large stations are slow to sequence, so the search
+		# only gets -dtt seconds of the time limit (see fall_back_from_dual_type)
+		fullConfig = self.config
+		self.config = copy.copy(fullConfig)
+		self.config.time_limit = min(fullConfig.time_limit, fullConfig.dual_type_time)
+		self.dualTypeFallback = False
+		self.time_limit_exceeded = False
+		self.master_timed_out = False
+		self.bendersIter = 0
+		self.gap = []
+		self.stations = [None for k in self.inst.stations]
+		self.taskAssignment = [None for k in self.inst.stations]
+		self.curStationLoad = [None for k in self.inst.stations]
+		self.startTimes = [None for k in self.inst.stations]
+		self.mostRecentFeasibleCycleTime = None
+		bestSolution = None
+
+		# loads are cached across probes so no station is sequenced twice
+		self.type1LoadCache = {}
+
+		cycleTimeLB = int(np.ceil(self.bestCycleTimeLB))
+		cycleTimeUB = int(self.bestCycleTimeUB)
+		stopRequested = False
+		while cycleTimeLB <= cycleTimeUB:
+			# another solver in the portfolio has already proven optimality
+			if self.channel is not None and self.channel.stop_requested():
+				self.time_limit_exceeded = True
+				stopRequested = True
+				break
+			# no need to probe above the best cycle time found by other solvers
+			if self.boundExchange is not None:
+				sharedUB = self.boundExchange.poll_upper_bound()
+				if sharedUB < cycleTimeUB:
+					cycleTimeUB = int(sharedUB)
+			probeCycleTime = (cycleTimeLB + cycleTimeUB)//2
+			self.curCycleTime = probeCycleTime
+			if self.bendersIter > 0:
+				self.statsSubProblemNodes.append(np.empty([0],dtype=int))
+			self.statsMasterNodes = np.append(self.statsMasterNodes, 0)
+			if not self.config.very_quiet:
+				print('\n{:.1f}/{} seconds elapsed'.format(time.time()-self.startDual,self.config.time_limit))
+				print('===============================')
+				print('Probe %d: c = %d' %(self.bendersIter, probeCycleTime))
+
+			# failed (station, unassigned tasks) states are only valid for this cycle time
+			self.type1FailedStates = set()
+			solution = self.fill_stations_type1(0, set(self.inst.tasks), [], probeCycleTime)
+
+			if self.time_limit_exceeded:
+				break
+			if solution is not None:
+				# the achieved cycle time may be smaller than the probe
+				bestSolution = solution
+				self.bestCycleTimeUB = max([ load['load'] for load in solution ])
+				cycleTimeUB = int(self.bestCycleTimeUB) - 1
+				if self.boundExchange is not None:
+					self.boundExchange.publish_incumbent(self.bestCycleTimeUB)
+				if self.channel is not None:
+					self.channel.publish_incumbent(self.bestCycleTimeUB)
+				if not self.config.very_quiet:
+					print('\tFeasible, UB: \t{}'.format(self.bestCycleTimeUB))
+			else:
+				self.bestCycleTimeLB = probeCycleTime + 1
+				cycleTimeLB = probeCycleTime + 1
+				if self.channel is not None:
+					self.channel.publish_lower_bound(self.bestCycleTimeLB)
+				if not self.config.very_quiet:
+					print('\tInfeasible, LB: \t{}'.format(self.bestCycleTimeLB))
+
+			self.gap.append(round(float((self.bestCycleTimeUB - self.bestCycleTimeLB)/self.bestCycleTimeLB)*100,4))
+			if cycleTimeLB <= cycleTimeUB:
+				self.bendersIter += 1
+
+		if self.gap == []:
+			self.gap.append(round(float((self.bestCycleTimeUB - self.bestCycleTimeLB)/self.bestCycleTimeLB)*100,4))
+		elif self.time_limit_exceeded and self.bendersIter == len(self.gap):
+			# the last probe was interrupted, report the gap of the previous one
+			self.bendersIter -= 1
+
+		# store the best solution found in the same form as the Benders solution
+		if bestSolution is not None:
+			for k in self.inst.stations:
+				self.taskAssignment[k] = bestSolution[k]['tasks']
+				self.curStationLoad[k] = bestSolution[k]['load']
+				self.startTimes[k] = bestSolution[k]['startTimes']
+			self.mostRecentFeasibleCycleTime = self.bestCycleTimeUB
+
+		self.benders_time = time.time() - self.startDual
+		self.config = fullConfig
+		# out of the search's own time, not the time limit (or the work limit)
+		if self.time_limit_exceeded and not stopRequested and \
+		   self.benders_time < self.config.time_limit and \
+		   (self.config.work_limit is None or self.workUsed < self.config.work_limit):
+			self.dualTypeFallback = True
+
+	def fall_back_from_dual_type(self):
+		# continue with the Benders master for the rest of the time limit, starting
+		# from the bounds proven by the type-1 search. Its incumbent is given to the
+		# master as a bound, in the same way as one shared by another solver
+		self.config = copy.copy(self.config)
+		self.config.dual_type = False
+		self.config.time_limit = round(self.config.time_limit - self.benders_time,4)
+		if not self.config.very_quiet:
+			print('\n! Type-1 search stopped after {:.1f}s, continuing with the Benders master'.format(self.benders_time))
+		self.initialise_statistics()
+		self.initialise()
+		self.consLB.setAttr('rhs', self.bestCycleTimeLB)
+		if self.bestCycleTimeUB < self.inst.maxCycleTime:
+			self.consUB.setAttr('rhs', self.bestCycleTimeUB)
+			self.sharedUpperBound = True
+		self.model.update()
+
+	def fill_stations_type1(self, k, unassigned, solution, cycleTime):
+		# (Recursive function)
+		# station-oriented search: fill station k with a maximal load then move on
+		if unassigned == set():
+			# remaining stations are left empty
+			return solution + [ {'tasks':set(), 'load':0, 'startTimes':[]}
+								for kdash in range(k, self.inst.numStations) ]
+		if k == self.inst.numStations:
+			return None
+		if time.time() - self.startDual > self.config.time_limit:
+			self.time_limit_exceeded = True
+			return None
+
+		# bound: the remaining processing time must fit into the remaining stations
+		if sum([ self.inst.procList[i] for i in unassigned ]) > (self.inst.numStations - k)*cycleTime:
+			return None
+		state = (k, frozenset(unassigned))
+		if state in self.type1FailedStates:
+			return None
+
+		assigned = set(self.inst.tasks) - unassigned
+		for load in self.generate_maximal_station_loads(k, assigned, set(), set(), cycleTime):
+			result = self.fill_stations_type1(k+1, unassigned - load['tasks'], solution + [load], cycleTime)
+			if result is not None or self.time_limit_exceeded:
+				return result
+
+		self.type1FailedStates.add(state)
+		return None
+
+	def generate_maximal_station_loads(self, k, assigned, load, excluded, cycleTime):
+		# (Recursive generator)
+		# branch on including/excluding the smallest available task, only yielding loads
+		# that no available task can be added to. As with the infer cuts, this needs
+		# adding a task to a station never to decrease its load (checked in run_solver)
+		available = sorted([ i for i in self.inst.tasks
+							 if i not in assigned
+							 and i not in load
+							 and i not in excluded
+							 and self.inst.allPredecessors[i] <= assigned | load ])
+		if self.time_limit_exceeded:
+			return
+		if available == []:
+			if load == set():
+				return
+			# check the load is maximal with respect to the excluded tasks
+			for i in excluded:
+				if self.inst.allPredecessors[i] <= assigned | load:
+					if self.evaluate_station_load_type1(k, load | {i}, cycleTime) is not None:
+						return
+			yield self.evaluate_station_load_type1(k, load, cycleTime)
+			return
+
+		i = available[0]
+		if self.evaluate_station_load_type1(k, load | {i}, cycleTime) is not None:
+			yield from self.generate_maximal_station_loads(k, assigned, load | {i}, excluded, cycleTime)
+		yield from self.generate_maximal_station_loads(k, assigned, load, excluded | {i}, cycleTime)
+
+	def evaluate_station_load_type1(self, k, tasks, cycleTime):
+		# returns the solved station load if it fits the cycle time, otherwise None
+		if self.station_load_lower_bound(tasks) > cycleTime:
+			return None
+		key = frozenset(tasks)
+		result = self.type1LoadCache.get(key)
+		# a load that did not fit a larger cycle time cannot fit this one
+		if result is not None and result['load'] is None and result['cycleTime'] >= cycleTime:
+			return None
+		# cached loads are only upper bounds when the sequencing stops at the first solution
+		if result is None or result['load'] is None or result['load'] > cycleTime:
+			if time.time() - self.startDual > self.config.time_limit:
+				self.time_limit_exceeded = True
+				return None
+			# the cycle time bounds the station load so infeasible loads are found quickly
+			self.taskAssignment[k] = set(tasks)
+			self.stations[k] = Station(self.inst, self.config, k, self.taskAssignment[k], cycleTime, cycleTime)
+			self.SP_time_used = round(time.time() - self.startDual,4)
+			logicallyInfeasibleAssignment = self.call_sub_problem_solver(k)
+			if self.time_limit_exceeded:
+				return None
+			if logicallyInfeasibleAssignment:
+				result = {'tasks':self.taskAssignment[k], 'load':None, 'cycleTime':cycleTime}
+			else:
+				result = {'tasks':self.taskAssignment[k],
+						  'load':round(self.curStationLoad[k]),
+						  'startTimes':self.startTimes[k],
+						  'cycleTime':cycleTime}
+			self.type1LoadCache[key] = result
+		if result['load'] is None or result['load'] > cycleTime:
+			return None
+		return result
+
+	def station_load_lower_bound(self, tasks):
+		# each task is preceded by the cheapest setup into it from another task of the station
+		if len(tasks) == 1:
+			i = list(tasks)[0]
+			return self.inst.procList[i] + self.inst.backSU[i][i]
+		return sum([ self.inst.procList[i] for i in tasks ]) + \
+			   sum([ min([ self.inst.forwSU[j][i] for j in tasks
+						   if j != i and i in self.inst.followForw[j] ] +
+						 [ self.inst.backSU[j][i] for j in tasks
+						   if j != i and i in self.inst.followBack[j] ], default=0)
+					 for i in tasks ])
+
+	def work_remaining(self):
+		# the deterministic work left of -wl, or None when only the time limit is used
+		if self.config.work_limit is None:
+			return None
+		return self.config.work_limit - self.workUsed
+
+	def budget_exhausted(self, start):
+		# out of deterministic work (-wl), or out of time
+		if self.config.work_limit is not None and self.workUsed >= self.config.work_limit:
+			return True
+		return time.time() - start > self.config.time_limit
+
 	def solve_master_problem(self, timeRemaining):
 		# add updated timelimit
 		self.reinitialise_master_ass(timeRemaining)
+		if self.config.work_limit is not None:
+			self.model.setParam('WorkLimit', max(self.work_remaining(), 0))
 
 		startMaster = time.time()
-		if RMP_TYPE == 'sched':
+		if self.config.master_problem_type == 'sched':
 			self.optimise()
-		elif RMP_TYPE == 'ass':
+		elif self.config.master_problem_type == 'ass':
 			self.optimise_ass()
 		self.master_times.append(time.time() - startMaster)
 		self.optimisation_times.append(self.master_times[-1])
+		self.workUsed += self.model.Work
 		# if self.model.getAttr('status') != 2:
 		# 	pdb.set_trace()
 		# 	sys.exit('\nError: Master was not solved optimally')
 
-		# if the master didnt time out then update current cycle time
-		if self.model.status != 9:
+		# if the master didnt time out (or run out of work) then update current cycle time
+		if self.model.status not in [9, 16]:
 			self.curCycleTime = round(self.model.objVal,4)
 		else:
 			self.curCycleTime = self.inst.maxCycleTime
 		self.statsMasterNodes = np.append(self.statsMasterNodes, int(self.model.nodecount))
 
+	def solve_new_stations_concurrently(self, timeRemaining):
+		# solve the station MIPs of this iteration's new assignments together, in
+		# a pool of workers sharing the thread budget. Each worker has its own
+		# Gurobi environment as one must not be used by two threads at once
+		from concurrent.futures import ThreadPoolExecutor
+		self.dispose_presolved_stations()
+		newStations = [ Station(self.inst, self.config, k, self.taskAssignment[k], self.curCycleTime, self.bestCycleTimeUB)
+						for k in self.inst.stations
+						if self.taskAssignment[k] not in [ oldSolution['tasks']
+														   for oldSolution in self.all_solutions_ever[k][:-1] ] ]
+		# a single station is solved in the station loop as usual
+		if len(newStations) < 2:
+			return
+		numWorkers, threadsPerStation = self.threadBudget.station_pool(len(newStations))
+		# the stations run at once, so split the remaining work (-wl) between them
+		# rather than giving each all of it, keeping the iteration within budget
+		workRemaining = self.work_remaining()
+		if workRemaining is not None:
+			workRemaining = workRemaining/len(newStations)
+		# each worker solves its share of the stations in turn, in its own environment
+		workerStations = [ newStations[w::numWorkers] for w in range(numWorkers) ]
+		for env, stations in zip(self.station_envs(numWorkers), workerStations):
+			for station in stations:
+				station.initialise_MIP(timeRemaining, threadsPerStation, env, workRemaining)
+		with ThreadPoolExecutor(max_workers=numWorkers) as pool:
+			list(pool.map(lambda stations: [ station.solve_MIP_timed() for station in stations ],
+						  workerStations))
+		for station in newStations:
+			station.presolved = True
+			self.presolvedStations[station.stationNum] = station
+
+	def station_envs(self, numEnvs):
+		# the environments of the pool workers, started once for the whole solve as
+		# each start repeats the license check (and may hold a license seat)
+		from gurobipy import Env
+		while len(self.stationEnvs) < numEnvs:
+			env = Env(empty=True)
+			if self.config.quiet:
+				env.setParam('OutputFlag', 0)
+			env.start()
+			self.stationEnvs.append(env)
+		return self.stationEnvs[:numEnvs]
+
+	def dispose_presolved_stations(self):
+		# stations solved by the pool but not used, e.g. when an iteration stops early
+		for station in self.presolvedStations.values():
+			station.model.dispose()
+		self.presolvedStations = {}
+
+	def dispose_station_envs(self):
+		# free the pool's environments once the station models using them are freed
+		if self.stationEnvs == []:
+			return
+		self.dispose_presolved_stations()
+		for station in self.stations:
+			if station is not None and getattr(station, 'model', None) is not None:
+				station.model.dispose()
+		for env in self.stationEnvs:
+			env.dispose()
+		self.stationEnvs = []
+
 	def solve_sub_problem(self, k):
 		# initialise sub-problem and solve it
-		self.stations[k] = Station(self.inst, k, self.taskAssignment[k], self.curCycleTime, self.bestCycleTimeUB)
+		if k in self.presolvedStations:
+			self.stations[k] = self.presolvedStations.pop(k)
+		else:
+			self.stations[k] = Station(self.inst, self.config, k, self.taskAssignment[k], self.curCycleTime, self.bestCycleTimeUB)
 		# check if assignment is new, and don't solve if we already have
 		[newAssignment, isFeasible] = self.is_assignment_new(k)
 		logicallyInfeasibleAssignment = False
@@ -1530,7 +2056,7 @@ class Solver:
 			# check if time-limit is exceeded
 			if self.time_limit_exceeded:
 				return
-			if USE_LOGIC_CUTS and logicallyInfeasibleAssignment == True:
+			if self.config.logic_cuts and logicallyInfeasibleAssignment == True:
 				isFeasible = False
 				satisfiesCurCycleTime = False
 				# cut all solutions with the current assignment for this station
@@ -1541,7 +2067,7 @@ class Solver:
 			# if old assignment was feasible then just copy the results
 			if isFeasible:
 				# print station load
-				if not args.very_quiet:
+				if not self.config.very_quiet:
 					print(' Load = \t{}'.format(round(self.curStationLoad[k])))
 				# check if old load satisfies current cycle time
 				if self.curStationLoad[k] <= self.curCycleTime:
@@ -1553,12 +2079,20 @@ class Solver:
 				# return immediately, not doing any inference cuts
 				return logicallyInfeasibleAssignment
 
+		# a station left without a load (its sequencing found no solution) is
+		# infeasible, which is logged rather than treated as an error
+		if self.curStationLoad[k] is None:
+			if not self.config.very_quiet:
+				print(' No load found, station {} is infeasible'.format(k))
+			if self.config.logic_cuts and newAssignment:
+				self.add_logic_cut_infeasible_assignment(k,self.taskAssignment[k])
+			self.store_sub_problem_result(k, False, False)
+			# no global upper bound can be taken from this iteration
+			return True
+
 		# print station load
-		if not args.very_quiet and isFeasible:
-			try:
-				print(' Load = \t{}'.format(round(self.curStationLoad[k])))
-			except TypeError:
-				pdb.set_trace()
+		if not self.config.very_quiet and isFeasible:
+			print(' Load = \t{}'.format(round(self.curStationLoad[k])))
 
 		approxStationLoad = round(self.curStationLoad[k], 2)
 		approxCycleTime = round(self.curCycleTime, 2)
@@ -1566,12 +2100,16 @@ class Solver:
 		if approxStationLoad > approxCycleTime:
 			satisfiesCurCycleTime = False
 			# add infer cuts for this station if we haven't already made a logic cut
-			if USE_INFER_CUTS and logicallyInfeasibleAssignment != True:
+			if self.config.infer_cuts and logicallyInfeasibleAssignment != True:
 				self.add_infer_cut_infeasible_assignment_simple(k, self.taskAssignment[k])
-			if USE_INFER_CUTS_SMART and logicallyInfeasibleAssignment != True:
+			if self.config.smart_infer_cuts and logicallyInfeasibleAssignment != True:
 				self.add_infer_cut_infeasible_assignment_smart(k, self.taskAssignment[k])
-			if USE_INFER_CUTS_SMARTEST and logicallyInfeasibleAssignment != True:
+			if self.config.smartest_infer_cuts and logicallyInfeasibleAssignment != True:
 				self.add_infer_cut_infeasible_assignment_smartest(k, self.taskAssignment[k])
+			if self.config.analytic_infer_cuts and logicallyInfeasibleAssignment != True:
+				self.add_infer_cut_infeasible_assignment_analytic(k, self.taskAssignment[k])
+			if self.config.multi_cuts and logicallyInfeasibleAssignment != True:
+				self.add_multi_cuts_sub_assignments(k, self.taskAssignment[k])
 
 		else:
 			satisfiesCurCycleTime = True
@@ -1581,36 +2119,39 @@ class Solver:
 
 	def call_sub_problem_solver(self, k):
 		logicallyInfeasibleAssignment = False
-		if SUB_PROBLEM_SOLVER == 'mip':
-			self.stations[k].initialise_MIP(TIMELIMIT-self.SP_time_used)
-			if args.quiet:
-				self.stations[k].model.setParam('OutputFlag', 0)
-			startSequencing = time.time()
-			self.stations[k].solve_MIP()
+		if self.config.sub_problem_solver == 'mip':
+			if not self.stations[k].presolved:
+				self.stations[k].initialise_MIP(self.config.time_limit-self.SP_time_used,
+												work_remaining=self.work_remaining())
+				if self.config.quiet:
+					self.stations[k].model.setParam('OutputFlag', 0)
+				self.stations[k].solve_MIP_timed()
 			# record station sub-problem optimisation time
-			self.sequencing_solve_times.append(time.time() - startSequencing)
+			self.sequencing_solve_times.append(self.stations[k].solveTime)
+			self.workUsed += self.stations[k].model.Work
 			self.optimisation_times.append(self.sequencing_solve_times[-1])
 			self.sequencing_overhead_times.append(self.stations[k].init_time)
 			self.optimisation_times.append(self.sequencing_overhead_times[-1])
 			# if MIP solved optimally then store results otherwise return infeasible
-			if self.stations[k].model.getAttr('Status') == 2:
+			if self.stations[k].model.getAttr('Status') == 2 or \
+			   (self.config.dual_type and self.stations[k].model.getAttr('Status') == GRB.SOLUTION_LIMIT):
 				# optimal
 				self.curStationLoad[k] = round(self.stations[k].model.objval,4)
 				self.startTimes[k] = [ round(self.stations[k].ss[i].x) for i in self.taskAssignment[k]]
 				self.statsSubProblemNodes[self.bendersIter] = np.append(self.statsSubProblemNodes[self.bendersIter],
 																		int(self.stations[k].model.nodecount))
-			elif self.stations[k].model.getAttr('Status') == 9:
-				# exceeded time limit given to sub-problem
+			elif self.stations[k].model.getAttr('Status') in [9, 16]:
+				# exceeded time (or work) limit given to sub-problem
 				self.time_limit_exceeded = True
 				return
 			else:
 				# do a logic cut of the infeasible assignment
 				logicallyInfeasibleAssignment = True
 
-		elif 'cp' in SUB_PROBLEM_SOLVER:
+		elif 'cp' in self.config.sub_problem_solver:
 			self.stations[k].initialise_CP()
 			startSequencing = time.time()
-			self.stations[k].solve_CP(TIMELIMIT-self.SP_time_used)
+			self.stations[k].solve_CP(self.config.time_limit-self.SP_time_used)
 			# record station sub-problem optimisation time
 			self.sequencing_solve_times.append(time.time() - startSequencing)
 			self.optimisation_times.append(self.sequencing_solve_times[-1])
@@ -1619,6 +2160,7 @@ class Solver:
 			self.stations[k].store_station_solution_CP()
 			# pdb.set_trace()
 			self.stations[k].store_station_statistics_CP()
+			self.workUsed += self.stations[k].nodesExplored/CP_NODES_PER_WORK_UNIT
 			# if CP solved optimally then store results otherwise return infeasible
 			if self.stations[k].status == 1:
 				self.curStationLoad[k] = self.stations[k].stationLoad
@@ -1634,7 +2176,7 @@ class Solver:
 				# do a logic cut of the infeasible assignment
 				logicallyInfeasibleAssignment = True
 
-		elif SUB_PROBLEM_SOLVER == 'tsp':
+		elif self.config.sub_problem_solver == 'tsp':
 			self.stations[k].initialise_TSP()
 			self.stations[k].solve_TSP()
 			# if TSP solver found optimality then store results otherwise return infeasible
@@ -1688,7 +2230,11 @@ class Solver:
 	def check_for_feasibility_and_optimality(self):
 		# check if we have a feasible solution. i.e. if Benders has completed at least one full iteration
 		self.solFeasible = 1
-		if self.bendersIter == 0 and self.time_limit_exceeded:
+		if self.config.dual_type:
+			# the dual-type search has no master, only the best type-1 solution found
+			if self.mostRecentFeasibleCycleTime is None:
+				self.solFeasible = 0
+		elif self.bendersIter == 0 and self.time_limit_exceeded:
 			if self.model.solcount == 0 or None in self.curStationLoad:
 				self.solFeasible = 0
 
@@ -1720,7 +2266,7 @@ class Solver:
 				self.statsTotalMasterNodes = self.statsMasterNodes.sum()
 				self.statsAvgMasterNodes = float(self.statsTotalMasterNodes/(self.bendersIter+1))
 
-				if SUB_PROBLEM_SOLVER == 'mip' or 'cp' in SUB_PROBLEM_SOLVER:
+				if self.config.sub_problem_solver == 'mip' or 'cp' in self.config.sub_problem_solver:
 					# calculate nodes statistics for sub problems
 					self.statsFinalSubProblemNodes = 0
 					self.statsTotalSubProblemNodes = sum([i.sum() for i in self.statsSubProblemNodes])
@@ -1743,7 +2289,7 @@ class Solver:
 				self.statsTotalMasterNodes = self.statsMasterNodes.sum()
 				self.statsAvgMasterNodes = float(self.statsTotalMasterNodes/(self.bendersIter+1))
 
-				if SUB_PROBLEM_SOLVER == 'mip' or 'cp' in SUB_PROBLEM_SOLVER:
+				if self.config.sub_problem_solver == 'mip' or 'cp' in self.config.sub_problem_solver:
 					# calculate nodes statistics for sub problems
 					self.statsFinalSubProblemNodes = self.statsSubProblemNodes[-1].sum()
 					self.statsTotalSubProblemNodes = sum([i.sum() for i in self.statsSubProblemNodes])
@@ -1751,13 +2297,13 @@ class Solver:
 		else:
 			self.optimalCycleTime = 0
 
-			# calculate nodes statistics for master
-			self.statsFinalMasterNodes = self.statsMasterNodes[-1]
+			# calculate nodes statistics for master (none if stopped before the first)
+			self.statsFinalMasterNodes = self.statsMasterNodes[-1] if len(self.statsMasterNodes) > 0 else 0
 			self.statsTotalMasterNodes = self.statsMasterNodes.sum()
 			self.statsAvgMasterNodes = self.statsTotalMasterNodes
 
 			self.statsTotalSubProblemNodes = 0
-			if SUB_PROBLEM_SOLVER == 'mip' or 'cp' in SUB_PROBLEM_SOLVER:
+			if self.config.sub_problem_solver == 'mip' or 'cp' in self.config.sub_problem_solver:
 				# calculate nodes statistics for sub problems
 				self.statsFinalSubProblemNodes = 0
 				self.statsTotalSubProblemNodes = 0
@@ -1767,7 +2313,8 @@ class Solver:
 		cutAmountsList = [self.numGlobalLB, self.numNoGoods,
 					 	  self.numGlobalUB, self.numInfAssCutsSimple,
 						  self.numLogicCuts, self.numInfAssCutsSmart,
-						  self.numInfAssCutsSmartest]
+						  self.numInfAssCutsSmartest, self.numInfAssCutsAnalytic,
+						  self.numMultiCuts]
 		self.numTotalCuts = sum(filter( lambda i: isinstance(i, int) , cutAmountsList))
 
 		self.statsTotalNodes = self.statsTotalMasterNodes + self.statsTotalSubProblemNodes
@@ -1781,46 +2328,94 @@ class Solver:
 
 	def print_solution(self):
 		# output
-		if args.human_readable:
-			if not args.very_quiet:
+		if self.config.human_readable:
+			if not self.config.very_quiet:
 				print('\n! ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ ')
 				print('! \tSOLUTION ')
 			else:
 				print('\n',end='')
 			print('! Cycle Time:\t{}'.format(round(self.optimalCycleTime)))
-			if not args.very_quiet: 
+			if not self.config.very_quiet: 
 				for k in self.inst.stations:
 					print('! Station {}'.format(k))
 					print('!   Load = \t{}'.format(round(self.curStationLoad[k])))
 					print('!   Tasks = \t{}'.format(sorted(self.taskAssignment[k])))
 					print('!   Starts = \t{}'.format(self.startTimes[k]))
+		elif self.config.dual_type:
+			print(self.optimalCycleTime)
 		else:
 			print(self.model.objval)
 
+	def results_summary(self):
+		# summary statistics in the order of BENDERS_COLUMNS
+		return [self.solFeasible, self.solOptimal, self.optimalCycleTime, self.gap[self.bendersIter], 
+				self.statsTotalRuntime, self.init_time, self.statsMasterRuntime, self.statsSubProbRuntime, 
+				self.statsSubProbSolvetime, self.statsSubProblemOverhead,
+				self.bendersIter, self.statsTotalNodes, self.statsTotalMasterNodes, self.statsTotalSubProblemNodes,
+				self.numTotalCuts, self.numNoGoods, self.numGlobalLB, self.numGlobalUB,
+				self.numInfAssCutsSimple, self.numInfAssCutsSmart, self.numInfAssCutsSmartest, self.numLogicCuts,
+				self.numInfAssCutsAnalytic, self.numMultiCuts]
+
+	def iteration_trace(self):
+		# per-iteration statistics of the Benders loop (or of each dual-type probe)
+		if self.trace.records:
+			return self.trace.records
+		trace = []
+		for it in range(len(self.gap)):
+			iteration = {'iter': it, 'gap': self.gap[it]}
+			if it < len(self.master_times):
+				iteration['masterTime'] = self.master_times[it]
+			if it < len(self.statsMasterNodes):
+				iteration['masterNodes'] = int(self.statsMasterNodes[it])
+			if it < len(self.statsSubProblemNodes):
+				iteration['SPnodes'] = [ int(nodes) for nodes in self.statsSubProblemNodes[it] ]
+			trace.append(iteration)
+		return trace
+
 	def save_solution(self, results_file):
 		# pdb.set_trace()
 		with open(results_file, 'w', newline='') as csvfile:
 			results = csv.writer(csvfile)
-			results.writerow([self.solFeasible, self.solOptimal, self.optimalCycleTime, self.gap[self.bendersIter], 
-							  self.statsTotalRuntime, self.init_time, self.statsMasterRuntime, self.statsSubProbRuntime, 
-							  self.statsSubProbSolvetime, self.statsSubProblemOverhead,
-							  self.bendersIter, self.statsTotalNodes, self.statsTotalMasterNodes, self.statsTotalSubProblemNodes,
-							  self.numTotalCuts, self.numNoGoods, self.numGlobalLB, self.numGlobalUB,
-							  self.numInfAssCutsSimple, self.numInfAssCutsSmart, self.numInfAssCutsSmartest, self.numLogicCuts])
+			results.writerow(self.results_summary())
+
+	def solve_result(self):
+		summary = dict(zip(BENDERS_COLUMNS, self.results_summary()))
+		if self.solFeasible == 1:
+			return SolveResult(summary, self.taskAssignment, self.startTimes, self.curStationLoad)
+		return SolveResult(summary)
+
+	def save_solution_to_store(self, dbFile):
+		if self.config.sub_problem_solver == 'mip':
+			search = 'na'
+		else:
+			search = SEARCH_ABRV.get(self.config.cp_search, self.config.cp_search)
+		# cuts used, in the order of the cutting types in results-processing: nc gb ic ic2 ic3 lc
+		cutType = ''.join([ str(int(cut)) for cut in [self.config.nogoods, self.config.global_bounds, self.config.infer_cuts,
+													   self.config.smart_infer_cuts, self.config.smartest_infer_cuts,
+													   self.config.logic_cuts] ])
+		store = ResultsStore(dbFile)
+		flags = vars(self.givenConfig)
+		config = configuration_key(flags, vars(make_config()), BENDERS_KEYED_OPTIONS)
+		store.add_run(self.inst, 'BD', self.config.sub_problem_solver, search, cutType, config, flags,
+					  dict(zip(BENDERS_COLUMNS, self.results_summary())), self.iteration_trace())
+		store.close()
 
 	def print_statistics(self):
-		if args.human_readable:
+		if self.config.human_readable:
 			print('\n! ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ ')
 			print('! \tRUNTIME STATISTICS ')
 			print('! Init time:\t{:.4f}'.format(self.init_time))
+			if self.config.work_limit is not None:
+				print('! Work used:\t{:.4f} of {}'.format(self.workUsed, self.config.work_limit))
 			print('! Total:\t{:.4f}'.format(self.statsTotalRuntime))
 			print('! Maximum:\t{:.4f}'.format(max(self.optimisation_times)))
 			print('! Average:\t{:.4f}'.format(sum(self.optimisation_times)/len(self.optimisation_times)))
 			print('\n! Master times:')
 			print('!   Total:\t{:.4f} ({:5.2f} %)'.format(self.statsMasterRuntime,
 													   100*self.statsMasterRuntime/self.statsTotalRuntime))
-			print('!   Maximum:\t{:.4f}'.format(max(self.master_times)))
-			print('!   Average:\t{:.4f}'.format(self.statsMasterRuntime/len(self.master_times)))
+			if self.master_times != []:
+				print('!   Maximum:\t{:.4f}'.format(max(self.master_times)))
+				print('!   Average:\t{:.4f}'.format(self.statsMasterRuntime/len(self.master_times)))
 			print('\n! Sequencing times:')
 			if self.solFeasible:
 				print('!   Total:\t{:.4f} ({:5.2f} %)'.format(self.statsSubProbRuntime,
@@ -1849,7 +2444,7 @@ class Solver:
 				print('!   TotalRMP:\t\t{}'.format(self.statsTotalMasterNodes))
 				print('!   Final Master:\t{}'.format(self.statsFinalMasterNodes))
 				print('!   AverageRMP:\t\t{:.2f}'.format(self.statsAvgMasterNodes))
-				if SUB_PROBLEM_SOLVER == 'mip' or 'cp' in SUB_PROBLEM_SOLVER:
+				if self.config.sub_problem_solver == 'mip' or 'cp' in self.config.sub_problem_solver:
 					print('! Sub-Problem')
 					print('!   TotalSP:\t\t{}'.format(self.statsTotalSubProblemNodes))
 					print('!   Final SPs Total:\t{}'.format(self.statsFinalSubProblemNodes))
@@ -1866,6 +2461,8 @@ class Solver:
 			print('! Simple Infer Cuts:\t{}'.format(self.numInfAssCutsSimple))
 			print('! Smart Infer Cuts:\t{}'.format(self.numInfAssCutsSmart))
 			print('! Smartest Infer Cuts:\t{}'.format(self.numInfAssCutsSmartest))
+			print('! Analytic Infer Cuts:\t{}'.format(self.numInfAssCutsAnalytic))
+			print('! Multi Cuts:\t\t{}'.format(self.numMultiCuts))
 			print('! Logic Infeas. Cuts:\t{}'.format(self.numLogicCuts))
 		else:
 			print(self.init_time)
@@ -1892,22 +2489,81 @@ class Solver:
 			print(self.numInfAssCutsSmartest)
 			print(self.numLogicCuts)
 
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# LIBRARY FUNCTIONALITY
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+def make_config(**options):
+	# the command line defaults, overridden by the given options
+	return SolverConfig(create_parser(), **options)
+
+def check_config(config):
+	# reject options which the chosen loop does not support, rather than ignoring them
+	if config.trace is not None and (config.dual_type or config.sub_problem_type != 'opt'):
+		raise ValueError('--trace is only written by the Benders loop with optimality '
+						 'sub-problems (-spt opt), not by -dt or -spt feas')
+
+def run_solver(inst, config):
+	# create the Solver for the given instance and configuration and optimise it
+	check_config(config)
+	if config.dual_type and not inst.setups_satisfy_triangle_inequality():
+		# an infeasible cycle time of the type-1 search is only a lower bound when
+		# adding a task never decreases a station's load, so use the Benders master
+		if not config.very_quiet:
+			print('\n! The setup times break the triangle inequality, ignoring -dt')
+		config = copy.copy(config)
+		config.dual_type = False
+	s = Solver(inst, config)
+	if config.dual_type:
+		s.dual_type_optimise()
+		if s.dualTypeFallback:
+			s.fall_back_from_dual_type()
+			s.benders_optimise_with_optimality_sub_problems()
+	elif config.sub_problem_type == 'opt':
+		s.benders_optimise_with_optimality_sub_problems()
+	elif config.sub_problem_type == 'feas':
+		s.benders_optimise_with_feasibility_sub_problems()
+	s.check_for_feasibility_and_optimality()
+	s.process_solution_statistics()
+	return s
+
+def solve(instance, config):
+	# solve an instance, given as an AssemblyLineInstance or the path of an
+	# instance file, with a SolverConfig and return the SolveResult
+	if not isinstance(instance, AssemblyLineInstance):
+		instance = AssemblyLineInstance(INST_DIR, instance)
+	return run_solver(instance, config).solve_result()
+
 # Script to create instance class, run the solver and output the solution
-if __name__ == '__main__':
+def main(argv=None):
+	parser = create_parser()
+	args = parser.parse_args(argv)
+	config = SolverConfig.from_args(parser, args)
+	try:
+		check_config(config)
+	except ValueError as error:
+		parser.error(str(error))
+
 	# start total runtime timer
 	startAll = time.time()
 
 	filename = args.file # retrieve filename of instance to solve
-	if args.human_readable:
+	if config.human_readable:
 		print('Instance:', filename)
 	else:
 		print(filename)
 
+	# only wrap the profiled phases if asked to, so normal runs are untouched
+	if config.profile is not None:
+		PROFILER = PhaseProfiler(config.profile, 'profile_{}'.format(config.experiment_token))
+		PROFILER.instrument(AssemblyLineInstance, BENDERS_PHASES['AssemblyLineInstance'])
+		PROFILER.instrument(Station, BENDERS_PHASES['Station'])
+		PROFILER.instrument(Solver, BENDERS_PHASES['Solver'])
+
 	# store assembly line instance data
-	if not args.very_quiet:
+	if not config.very_quiet:
 		print('Importing data... ', end='', flush=True)
 	inst = AssemblyLineInstance(INST_DIR,filename)
-	if not args.very_quiet:
+	if not config.very_quiet:
 		print('completed.')
 
 	# Check for top-level infeasibility of the instance
@@ -1919,39 +2575,41 @@ if __name__ == '__main__':
 	# else:
 
 	# create Solver for given instance and optimise it
-	s = Solver(inst)
-
-	if SUB_PROBLEM_TYPE == 'opt':
-		s.benders_optimise_with_optimality_sub_problems()
-	elif SUB_PROBLEM_TYPE == 'feas':
-		s.benders_optimise_with_feasibility_sub_problems()
+	s = run_solver(inst, config)
 
 	# store output
-	s.check_for_feasibility_and_optimality()
-	s.process_solution_statistics()
 	if s.solFeasible == 1:
 		s.print_solution()
 
 	# check solution consistency
-	if CHECK_SOLUTION:
+	if config.check_solution:
 		print('\nVerifying solution:')
 		check_solution_benders(s.optimalCycleTime, s.taskAssignment, s.startTimes, s.curStationLoad, inst)
 
-	s.save_solution('summary_results_{}.txt'.format(EXPERIMENT_TOKEN))
-	if PRINT_STATISTICS:
+	s.save_solution('summary_results_{}.txt'.format(config.experiment_token))
+	if config.results_db is not None:
+		s.save_solution_to_store(config.results_db)
+	if s.boundExchange is not None and s.solFeasible == 1:
+		s.boundExchange.publish_incumbent(s.optimalCycleTime)
+	if s.channel is not None:
+		s.channel.publish_finished(s.optimalCycleTime, s.solOptimal == 1)
+	if config.statistics:
 		s.print_statistics()
 
 	# print total runtime
 	end = time.time()
-	if not args.quiet:
+	if config.profile is not None:
+		PROFILER.print_report(end-startAll)
+	if not config.quiet:
 		print('\n! Language runtime:\t{:.4f}'.format(end-startAll-sum(s.optimisation_times)))
-	if args.human_readable:
-		if args.very_quiet:
+	if config.human_readable:
+		if config.very_quiet:
 			print('')
 		print('\n! Total runtime:\t{:.4f}\n'.format(end-startAll))
 	else:
 		print(end-startAll)
 
-	# pdb.set_trace()
+if __name__ == '__main__':
+	main()
 
 # EOF #
\ No newline at end of file
@@ -16,8 +16,8 @@
 #	and simple infer cuts (-ic) on the given instance file.
 
 # Packages
+import os
 import sys
-import pdb 
 import time
 # import itertools
 import csv
@@ -25,57 +25,87 @@ import re
 import ast
 import argparse
 import numpy as np
-import networkx as nx
-from gurobipy import *
 
 # User-defined Functionality
 from ALB_instance_storage import AssemblyLineInstance
-from callback_SubTourElim import *
+from ALB_results_store import BENDERS_COLUMNS
+from ALB_profiling import PhaseProfiler, BENDERS_PHASES, PROFILE_MODES
+from ALB_solver_config import SolverConfig, SolveResult
+from callback_SubTourElim import prepare_sub_tour_elimination, keep_sub_tour_cuts, callback_sub_tour_elimination
+from ALB_symmetry import add_symmetry_breaking_constraints, prepare_station_order, reject_swappable_assignment
+from ALB_station_evaluator import station_load
 from solChecker import *
 
+# gurobipy is only imported once a Gurobi model is built (see import_gurobi), so
+# CP sub-problem runs and library imports of this module do not pay for it
+GRB = None
+Model = None
+
+def import_gurobi():
+	global GRB, Model
+	if Model is None:
+		from gurobipy import GRB, Model
+
 # initilise settings for argument parser
-parser = argparse.ArgumentParser()
-parser.add_argument('file', help='Instance file')
-parser.add_argument('-q', '--quiet', help='Some output', action='store_true')
-parser.add_argument('-vq', '--very-quiet', help='Minimal output', action='store_true')
-parser.add_argument('-s', '--statistics', help='Print statistics', action='store_true')
-parser.add_argument('-c', '--check-solution', help='Check solution', action='store_true')
-parser.add_argument('-H', '--human-readable', help='Human readable output', action='store_true')
-parser.add_argument('-ste', '--sub-tour-elimination', type=int, default=0,
-					help='Use sub-tour elimination lazy constraint generation when '
-						 'solving the relaxed master problem. Specify the size of '
-						 'sub-tours to eliminate.')
-parser.add_argument('-nc', '--nogoods', help='Use nogood cuts', action='store_true')
-parser.add_argument('-gb', '--global-bounds', help='Use global bounds', action='store_true')
-parser.add_argument('-ic', '--infer-cuts', help='Use simple infer cuts', action='store_true')
-parser.add_argument('-ic2', '--smart-infer-cuts', help='Use smart infer cuts', action='store_true')
-parser.add_argument('-ic3', '--smartest-infer-cuts', help='Use smartest infer cuts', action='store_true')
-parser.add_argument('-lc', '--logic-cuts', help='Use logic cuts for infeasible assignment', action='store_true')
-parser.add_argument('-b', '--backwardSU-type', type=str, default='copy-forward-setups',
-					help='Type of backward setup times. Options include: ' 
-						 "'from-data'(default), 'just-forward-setups'")
-parser.add_argument('-mi', '--max-iterations', type=int, default=sys.maxsize/2,
-					help='Maximum number of Benders iterations')
-parser.add_argument('-mpt', '--master-problem-type', type=str, default='ass',
-					help='Type of master-problems to use. Options include:'
-						  "'sched' and 'ass'(default)")
-parser.add_argument('-spt', '--sub-problem-type', type=str, default='opt',
-					help='Type of sub-problems to use. Options include:'
-						  "'opt'(default) and 'feas'")
-parser.add_argument('-sps', '--sub-problem-solver', type=str, default='mip',
-					help='Type of sub-problem solver. Options include:'
-						 "'mip'(default), 'cp2', 'cp3', 'tsp-solver'")
-parser.add_argument('-t', '--time-limit', type=float, default=1800,
-					help='Optimisation time limit')
-parser.add_argument('-cps', '--cp-search', type=str, default='start_s',
-					help='Search strategy to use when using CP to solve'
-						 'the scheduing sub-problems. Options include:'
-						  "'default', 'start_s'(default) and others")
-parser.add_argument('-et', '--experiment-token', type=int, default=0,
-					help='Indicator for which experiment is being run')
-parser.add_argument('-ws', '--warm-start', help='Use warm-starts for RMP', action='store_true')
-parser.add_argument('-tl', '--thread-limit', help='Restrict MIP-SP solver to 1 thread', action='store_true')
-args = parser.parse_args()
+def create_parser():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('file', help='Instance file')
+	parser.add_argument('-q', '--quiet', help='Some output', action='store_true')
+	parser.add_argument('-vq', '--very-quiet', help='Minimal output', action='store_true')
+	parser.add_argument('-s', '--statistics', help='Print statistics', action='store_true')
+	parser.add_argument('-c', '--check-solution', help='Check solution', action='store_true')
+	parser.add_argument('-H', '--human-readable', help='Human readable output', action='store_true')
+	parser.add_argument('-ste', '--sub-tour-elimination', type=int, default=0,
+						help='Use sub-tour elimination lazy constraint generation when '
+							 'solving the relaxed master problem. Specify the size of '
+							 'sub-tours to eliminate.')
+	parser.add_argument('-sb', '--symmetry-breaking', type=int, default=0,
+						help='Level of symmetry breaking in the master problem: 1 adds '
+							 'constraints on the first and last stations and on interchangeable '
+							 'tasks, 2 also orders swappable adjacent stations of the assignment master')
+	parser.add_argument('-ssb', '--station-setup-bounds', help='Add lower bounds on the setup times of '
+						'each station to the assignment master', action='store_true')
+	parser.add_argument('-nc', '--nogoods', help='Use nogood cuts', action='store_true')
+	parser.add_argument('-gb', '--global-bounds', help='Use global bounds', action='store_true')
+	parser.add_argument('-ic', '--infer-cuts', help='Use simple infer cuts', action='store_true')
+	parser.add_argument('-ic2', '--smart-infer-cuts', help='Use smart infer cuts', action='store_true')
+	parser.add_argument('-ic3', '--smartest-infer-cuts', help='Use smartest infer cuts', action='store_true')
+	parser.add_argument('-ic4', '--analytic-infer-cuts', help='Use analytic infer cuts, with coefficients from the setups of the station', action='store_true')
+	parser.add_argument('-mc', '--multi-cuts', type=int, default=0,
+						help='Maximum number of extra infer cuts per overloaded station, from '
+							 'its sub-assignments with one task removed')
+	parser.add_argument('-lc', '--logic-cuts', help='Use logic cuts for infeasible assignment', action='store_true')
+	parser.add_argument('-b', '--backwardSU-type', type=str, default='copy-forward-setups',
+						help='Type of backward setup times. Options include: ' 
+							 "'from-data'(default), 'just-forward-setups'")
+	parser.add_argument('-mi', '--max-iterations', type=int, default=sys.maxsize/2,
+						help='Maximum number of Benders iterations')
+	parser.add_argument('-mpt', '--master-problem-type', type=str, default='ass',
+						help='Type of master-problems to use. Options include:'
+							  "'sched' and 'ass'(default)")
+	parser.add_argument('-spt', '--sub-problem-type', type=str, default='opt',
+						help='Type of sub-problems to use. Options include:'
+							  "'opt'(default) and 'feas'")
+	parser.add_argument('-sps', '--sub-problem-solver', type=str, default='mip',
+						help='Type of sub-problem solver. Options include:'
+							 "'mip'(default), 'cp2', 'cp3', 'tsp-solver'")
+	parser.add_argument('-t', '--time-limit', type=float, default=1800,
+						help='Optimisation time limit')
+	parser.add_argument('-cps', '--cp-search', type=str, default='start_s',
+						help='Search strategy to use when using CP to solve'
+							 'the scheduing sub-problems. Options include:'
+							  "'default', 'start_s'(default) and others")
+	parser.add_argument('-et', '--experiment-token', type=int, default=0,
+						help='Indicator for which experiment is being run')
+	parser.add_argument('-ws', '--warm-start', help='Use warm-starts for RMP', action='store_true')
+	parser.add_argument('-tl', '--thread-limit', help='Restrict MIP-SP solver to 1 thread', action='store_true')
+	parser.add_argument('-prof', '--profile', type=str, default=None, choices=PROFILE_MODES,
+						help='Time the master, sub-problem, cut and preprocessing phases, optionally '
+							 'with cProfile/pyinstrument snapshots or sampled stacks of each phase')
+	parser.add_argument('-tr', '--trace', type=str, default=None,
+						help='Not supported: the master callbacks have no Benders iterations to trace '
+							 '(see -tr of sualbsp2_benders.py)')
+	return parser
 
 # Define globals constants
 if sys.platform == "win32":
@@ -91,34 +121,15 @@ elif sys.platform == "linux" or sys.platform == "linux2":
 	INST_DIR = 'instances/'
 	CHUFFED_DIR = 'chuffed/unix/'
 
-# store the given arguments as globals
-PRINT_STATISTICS = args.statistics
-SIZE_OF_SUB_TOURS_TO_ELIMNATE = args.sub_tour_elimination
-USE_NOGOODS = args.nogoods
-USE_GLOBAL_BOUNDS = args.global_bounds
-USE_INFER_CUTS = args.infer_cuts
-USE_INFER_CUTS_SMART = args.smart_infer_cuts
-USE_INFER_CUTS_SMARTEST = args.smartest_infer_cuts
-USE_LOGIC_CUTS = args.logic_cuts
-RMP_TYPE = args.master_problem_type
-SUB_PROBLEM_TYPE = args.sub_problem_type
-SUB_PROBLEM_SOLVER = args.sub_problem_solver
-MAX_BENDERS_ITERATIONS = args.max_iterations
-# BACKWARD_SETUP_TYPE = args.backwardSU_type
-TIMELIMIT = args.time_limit
-CHECK_SOLUTION = args.check_solution
-SEARCH = args.cp_search
-EXPERIMENT_TOKEN = args.experiment_token
-WARM_START = args.warm_start
-SP_THREAD_LIMIT = args.thread_limit
-
-if args.very_quiet:
-	args.quiet = True
+# resolve the CP models and solver relative to this file so runs can use any working directory
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+CHUFFED_DIR = os.path.join(MODELS_DIR, CHUFFED_DIR)
 
 # Class defining the instance of a particular station and its sub-problem
 class Station:
-	def __init__(self, inst, stationNum, tasks, curCycleTime, bestCycleTimeUB):
+	def __init__(self, inst, config, stationNum, tasks, curCycleTime, bestCycleTimeUB):
 		self.inst = inst
+		self.config = config
 		self.stationNum = stationNum
 		self.tasks = tasks
 		self.curCycleTime = curCycleTime
@@ -183,28 +194,20 @@ class Station:
 
 	def reindex_precedence_relations(self):
 		self.oldIndexedTasks = sorted(list(self.tasks))
-		# make precedence graph
-		self.originalPrecList = [ (i,j) for (i,j) in self.inst.precList
-										if i in self.tasks
-										if j in self.tasks ]
+		self.create_precedence_graph_for_station()
 
 		# make list of reindexed precedence relations
-		self.precList = [None for i in range(len(self.originalPrecList))]
-		for i in range(len(self.originalPrecList)):
-			prec = self.originalPrecList[i]
-			self.precList[i] = (self.reindexedTasks[self.oldIndexedTasks.index(prec[0])],
-								self.reindexedTasks[self.oldIndexedTasks.index(prec[1])] )
+		self.precList = self.precGraph.edges()
+		self.originalPrecList = [ (self.oldIndexedTasks[i-1], self.oldIndexedTasks[j-1])
+								  for (i,j) in self.precList ]
 
 		# store precedence relations in an alternative manner
-		self.altPrecList = [set([j for (idash,j) in self.precList if i==idash]) for i in self.reindexedTasks]
+		self.altPrecList = [ set(self.precGraph.successors(i)) for i in self.reindexedTasks ]
 
 	def create_precedence_graph_for_station(self):
-		# initialise the graph
-		self.precGraph = nx.DiGraph()
-		self.precGraph.add_nodes_from(self.reindexedTasks)
-		# add non-trivial edges
-		for prec in self.precList:
-			self.precGraph.add_edge(prec[0],prec[1])
+		# the instance's precedence graph restricted to this station's tasks,
+		# which are relabelled 1,...,len(tasks) in increasing order
+		self.precGraph = self.inst.precGraph.induced_subdag(self.oldIndexedTasks, self.reindexedTasks)
 
 	def construct_sets_of_allowed_followers_and_preceders_for_each_task_assigned_this_station(self):
 		self.stationFollowForw = [ (   set(self.reindexedTasks)
@@ -221,35 +224,18 @@ class Station:
 									if i in self.stationFollowBack[j-1] ])
 									for i in self.reindexedTasks ]
 
-	def find_all_successors(self, node, allSuccessors):
-		# (Recursive function)
-		# finds all successors of a given node
-		for succ in self.precGraph.successors(node):
-			if succ not in allSuccessors:
-				allSuccessors.add(succ)
-				self.find_all_successors(succ, allSuccessors)
-		return allSuccessors
-
-	def find_all_predecessors(self, node, allPredecessors):
-		# (Recursive function)
-		# finds all predecessors of a given node
-		for pred in self.precGraph.predecessors(node):
-			if pred not in allPredecessors:
-				allPredecessors.add(pred)
-				self.find_all_predecessors(pred, allPredecessors)
-		return allPredecessors
-
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 	# MIP SUB-PROBLEM
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 
 	def initialise_MIP(self, time_remaining):
+		import_gurobi()
 		self.model = Model('station[%d]' %(self.stationNum))
 		start = time.time()
-		if args.quiet:
+		if self.config.quiet:
 			self.model.setParam('LogToConsole', 0)
 		self.model.setParam('TimeLimit', time_remaining)
-		if SP_THREAD_LIMIT:
+		if self.config.thread_limit:
 			self.model.setParam('Threads', 1)
 		# create big-M value
 		self.bigM = self.inst.maxCycleTime # self.curCycleTime
@@ -326,7 +312,7 @@ class Station:
 								<= self.load
 								for i in self.tasks), 'backwardLoadStartTime')
 
-		if USE_LOGIC_CUTS:
+		if self.config.logic_cuts:
 			# Station Load: Best upper bound on the load from global bounds
 			self.model.addConstr(self.load <= self.bestCycleTimeUB,
 								'stationLoadUB')
@@ -343,18 +329,18 @@ class Station:
 
 	def initialise_CP(self):
 		start = time.time()
-		if SUB_PROBLEM_SOLVER == 'cp2':
+		if self.config.sub_problem_solver == 'cp2':
 			tmp= 'sualbsp2_subproblem-02'
-		elif SUB_PROBLEM_SOLVER == 'cp3':
+		elif self.config.sub_problem_solver == 'cp3':
 			tmp= 'sualbsp2_subproblem-03'
 		else:
 			tmp= 'sualbsp2_subproblem-03'
-		self.dznFile = 'subprob{}'.format(EXPERIMENT_TOKEN)
-		self.statsFile = 'CPstats{}'.format(EXPERIMENT_TOKEN)
-		self.solFile = 'CPsol{}'.format(EXPERIMENT_TOKEN)
-		self.modelFile = tmp
+		self.dznFile = 'subprob{}'.format(self.config.experiment_token)
+		self.statsFile = 'CPstats{}'.format(self.config.experiment_token)
+		self.solFile = 'CPsol{}'.format(self.config.experiment_token)
+		self.modelFile = os.path.join(MODELS_DIR, tmp)
 		self.fullOutput = 1
-		self.searchStrat = SEARCH
+		self.searchStrat = self.config.cp_search
 		# self.CPtimelimit = 600
 
 		# create datazinc file
@@ -362,9 +348,11 @@ class Station:
 		self.write_dzn_sub_problem_file()
 
 		# flatten datazinc file to a flatzinc file
+		# the flattened model is named after the token so concurrent runs do not collide
 		os.system("mzn2fzn -Gchuffed -D \"my_search = {}; full_output = {};\" "
-				"{}.mzn {}.dzn".format(self.searchStrat,
+				"--output-base {} {}.mzn {}.dzn".format(self.searchStrat,
 									self.fullOutput,
+									self.dznFile,
 									self.modelFile,
 									self.dznFile))
 		self.init_time = time.time() - start
@@ -373,15 +361,9 @@ class Station:
 		# change indexing of assigned tasks
 		self.reindexedTasks = range(1,len(self.tasks)+1)
 		self.reindex_precedence_relations()
-		self.create_precedence_graph_for_station()
 
 		# find all predecessors and successors of each task
-		self.allPredecessors = []
-		for i in self.reindexedTasks:
-			self.allPredecessors.append(self.find_all_predecessors(i,set()))
-		self.allSuccessors = []
-		for i in self.reindexedTasks:
-			self.allSuccessors.append(self.find_all_successors(i,set()))
+		self.allSuccessors, self.allPredecessors = self.precGraph.transitive_closure()
 
 		self.construct_sets_of_allowed_followers_and_preceders_for_each_task_assigned_this_station()
 
@@ -653,7 +635,7 @@ class Station:
 		# create datazinc file for cp solver
 		with open(self.dznFile+'.dzn', 'w') as f:
 			# store the appropriate upper bound on the station load if using logic cuts
-			if USE_LOGIC_CUTS:
+			if self.config.logic_cuts:
 				self.maxLoad = min(self.bestCycleTimeUB, self.naiveLoadUB)
 			else:
 				# self.maxLoad = self.inst.maxCycleTime
@@ -778,7 +760,7 @@ class Station:
 		# call the CP model from  the command line
 		os.system("{0}fzn-chuffed {1}.fzn --time-out {4} -f --verbosity 2 2> {2}.txt "
 				"| solns2out --output-time -o {3}.txt {1}.ozn".format(CHUFFED_DIR,
-																		self.modelFile,
+																		self.dznFile,
 																		self.statsFile,
 																		self.solFile,
 																		round(time_remaining)));
@@ -846,8 +828,9 @@ class Station:
 
 # Solver used to iterate through Benders for a given isntance
 class Solver:
-	def __init__(self, inst):
+	def __init__(self, inst, config):
 		self.inst = inst
+		self.config = config
 		self.optimisation_times = []
 		self.master_times = []
 		self.sequencing_solve_times = []
@@ -862,25 +845,33 @@ class Solver:
 
 	def initialise(self):
 		# define Gurobi model for the master
+		import_gurobi()
 		self.model = Model('assemblyline')
-		if args.quiet:
+		if self.config.quiet:
 			self.model.setParam('OutputFlag', 0)
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('Initialising the master problem... ', end='', flush=True)
 		# time the initialisation of the master
 		start = time.time()
 		# initialise the master problem
-		if RMP_TYPE == 'sched':
+		if self.config.master_problem_type == 'sched':
 			self.init_vars()
 			self.create_objective()
 			self.create_constraints()
-		elif RMP_TYPE == 'ass':
+			if self.config.sub_tour_elimination > 0:
+				prepare_sub_tour_elimination(self.model, self.inst, self.xs, self.ys, self.zs,
+											 self.config.sub_tour_elimination)
+		elif self.config.master_problem_type == 'ass':
 			self.init_vars_ass()
 			self.create_objective_ass()
 			self.create_constraints_ass()
+			if self.config.symmetry_breaking >= 2:
+				prepare_station_order(self.model, self.inst, self.xs)
+		if self.config.symmetry_breaking >= 1:
+			add_symmetry_breaking_constraints(self.model, self.inst, self.xs)
 		self.init_time = round(time.time() - start,4)
 		self.optimisation_times.append(self.init_time)
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('complete ({:.3f}s).'.format(self.init_time))
 		# set PreCrush to 1 to we can add lazy constaints in callbacks
 		# self.model.setParam('PreCrush', 1)
@@ -888,32 +879,44 @@ class Solver:
 		self.model.setParam('LazyConstraints', 1)
 
 	def initialise_cut_sets(self):
-		if USE_NOGOODS:
+		if self.config.nogoods:
 			self.numNoGoods = 0
 			self.noGoods = []
 		else:
 			self.numNoGoods = '-'
-		if USE_LOGIC_CUTS:
+		if self.config.logic_cuts:
 			self.numLogicCuts = 0
 			self.logicCuts = []
 		else:
 			self.numLogicCuts = '-'
-		if USE_INFER_CUTS:
+		if self.config.infer_cuts:
 			self.numInfAssCutsSimple = 0
 			self.infAssCutsSimple = []
 		else:
 			self.numInfAssCutsSimple = '-'
-		if USE_INFER_CUTS_SMART:
+		if self.config.smart_infer_cuts:
 			self.numInfAssCutsSmart = 0
 			self.infAssCutsSmart = []
 		else:
 			self.numInfAssCutsSmart = '-'
-		if USE_INFER_CUTS_SMARTEST:
+		if self.config.smartest_infer_cuts:
 			self.numInfAssCutsSmartest = 0
 			self.infAssCutsSmartest = []
 		else:
 			self.numInfAssCutsSmartest = '-'
-		if USE_GLOBAL_BOUNDS:
+		if self.config.analytic_infer_cuts:
+			self.numInfAssCutsAnalytic = 0
+			self.infAssCutsAnalytic = []
+		else:
+			self.numInfAssCutsAnalytic = '-'
+		self.minInsertionBurden = None
+		if self.config.multi_cuts:
+			self.numMultiCuts = 0
+			self.multiCuts = []
+		else:
+			self.numMultiCuts = '-'
+		self.subAssignmentLoads = {}
+		if self.config.global_bounds:
 			self.numGlobalUB = 0
 			self.globalUB = []
 			self.numGlobalLB = 0
@@ -973,7 +976,7 @@ class Solver:
 		self.model.update()
 
 	def reinitialise_master(self, time_remaining):
-		if not WARM_START:
+		if not self.config.warm_start:
 			# remove previous RMP solution as the warm-starting solution
 			self.model.reset()
 		# limit the current relaxed master's runtime
@@ -1031,14 +1034,9 @@ class Solver:
 
 	def optimise(self):
 		# find optimal solution to current relaxed master (maybe use callbacks)
-		if SIZE_OF_SUB_TOURS_TO_ELIMNATE > 0:
-			# first add needed information to the model object
-			self.model._tasks = self.inst.tasks
-			self.model._numStations = self.inst.numStations
-			self.model._xs = self.xs
-			self.model._ys = self.ys
-			self.model._zs = self.zs
-			# optimise the master using callbacks
+		if self.config.sub_tour_elimination > 0:
+			keep_sub_tour_cuts(self.model)
+			# optimise the master, separating sub-tours in the callback
 			self.model.optimize(callback_sub_tour_elimination)
 		else:
 			self.model.optimize()
@@ -1093,23 +1091,34 @@ class Solver:
 		self.model.addConstrs((  self.xs.sum('*',k) >= 1
 								for k in self.inst.stations), 'minOneTaskAtEachStation')
 
+		# Each station load with a lower bound on its setups respects the cycle time
+		if self.config.station_setup_bounds:
+			self.create_station_setup_bounds_ass()
+
 		# Bounds for the cycle time
 		self.consUB = self.model.addConstr(self.cycleTime <= self.inst.maxCycleTime, 'consCycleTimeUB')
 		self.consLB = self.model.addConstr(self.cycleTime >= self.inst.minCycleTime, 'consCycleTimeLB')
 
+	def create_station_setup_bounds_ass(self):
+		# every task of a station is entered by one setup and left by one setup,
+		# all forward but one backward setup, so its setups are at least
+		#	sum of cheapest forward setups into its tasks - largest saving of a backward one
+		# (and likewise out of its tasks)
+		forwardIn, backwardIn, forwardOut, backwardOut = self.inst.minimum_setups()
+		for forward, backward, name in ((forwardIn, backwardIn, 'consStationSetupsIntoTasks'),
+										(forwardOut, backwardOut, 'consStationSetupsOutOfTasks')):
+			saving = max(0, (forward - backward).max())
+			self.model.addConstrs((   sum([ (self.inst.procList[i] + forward[i])*self.xs[i,k]
+											for i in self.inst.feasibleTasks[k] ]) - saving
+									<= self.cycleTime
+									for k in self.inst.stations), name)
+
 	def optimise_ass(self):
-		# find optimal solution to current relaxed master (maybe use callbacks)
-		if SIZE_OF_SUB_TOURS_TO_ELIMNATE > 0:
-			# first add needed information to the model object
-			self.model._tasks = self.inst.tasks
-			self.model._numStations = self.inst.numStations
-			self.model._xs = self.xs
-			self.model._ys = self.ys
-			self.model._zs = self.zs
-			# optimise the master using callbacks
-			self.model.optimize(callback_sub_tour_elimination)
-		else:
-			self.model.optimize(master_callback)
+		# find optimal solution to current relaxed master using callbacks (the
+		# assignment master has no sequencing arcs, so no sub-tours to eliminate)
+		# the callbacks find the solver through the model
+		self.model._solver = self
+		self.model.optimize(master_callback)
 
 	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
 	# BENDERS CUTS DEFINITION
@@ -1119,7 +1128,7 @@ class Solver:
 		# for the current FULL assignment and cycle time, this
 		#	assignment solution is now removed
 		self.curCycleTime = round(self.curCycleTime)
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('\n CUT: Nogood cut #{} added:'.format(self.numNoGoods))
 			print('   [c = {}, assignment = ...]'.format(self.curCycleTime))
 		# pdb.set_trace()
@@ -1134,7 +1143,7 @@ class Solver:
 	def add_logic_cut_infeasible_assignment(self, k, tasks):
 		# logic cut
 		count = len(tasks)
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('\n   CUT: Logic cut #{} added (infeas. assignment):'.format(self.numLogicCuts))
 			print('  \t[Station {}, tasks = {}]'.format(k,tasks))
 		self.model.cbLazy(sum([ (1 - self.xs[i,k]) for i in tasks ]) >= 1)
@@ -1146,7 +1155,7 @@ class Solver:
 	def add_infer_cut_infeasible_assignment_simple(self, k, tasks):
 		# infer cut
 		count = len(tasks)
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('   CUT: Infer cut #{} added (simple):'.format(self.numInfAssCutsSimple))
 			print('  \t[Station {}: tasks = {} implies c >= {}]'.format(k,tasks,round(self.curStationLoad[k])))
 		self.model.cbLazy(self.cycleTime >=   self.curStationLoad[k] 
@@ -1226,7 +1235,7 @@ class Solver:
 			burdenUB[i] = self.inst.procList[i] + maxSetup[i] - minLinkingSetup[i]
 
 		# pdb.set_trace()
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('   CUT: Infer cut #{} added (smart):'.format(self.numInfAssCutsSmart))
 			print('  \t[Station {}: tasks = {} implies c >= {}]'.format(k,tasks,round(self.curStationLoad[k])))
 		self.model.cbLazy(self.cycleTime >=   self.curStationLoad[k] 
@@ -1297,7 +1306,7 @@ class Solver:
 			burdenLB[i] = self.inst.procList[i] + minSetup[i]
 
 		# pdb.set_trace()
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('   CUT: Infer cut #{} added (smartest):'.format(self.numInfAssCutsSmartest))
 			print('  \t[Station {}: tasks = {} implies c >= {}]'.format(k,tasks,round(self.curStationLoad[k])))
 		self.model.cbLazy(self.cycleTime >=   self.curStationLoad[k] 
@@ -1310,6 +1319,74 @@ class Solver:
 										'cycleTime':self.curStationLoad[k]})
 		self.numInfAssCutsSmartest += 1
 
+	def analytic_infer_cut_bound(self, k, tasks, load):
+		# the right-hand side of an analytic infer cut, whose coefficients are
+		# the marginal load of each task from the setups of the station's own
+		# sequence. Removing task i from the station saves at most its processing
+		# time plus the largest change in setups of inserting i into the sequence
+		# of the other tasks (or the backward setup of i alone). Adding task j
+		# costs at least its processing time plus the smallest such change over
+		# all tasks, which may be negative
+		if self.minInsertionBurden is None:
+			self.minInsertionBurden = [None for i in self.inst.tasks]
+			for j in self.inst.tasks:
+				others = [ a for a in self.inst.tasks if a != j ]
+				self.minInsertionBurden[j] = (  self.inst.procList[j]
+											  + min([self.inst.backSU[j][j]] + list(self.inst.insertion_setups(j, others))))
+		burdenUB = self.insertion_burdens(tasks)
+		otherTasks = set(self.inst.tasks).difference(set(tasks))
+		return (  load
+				- sum([ burdenUB[i]*(1 - self.xs[i,k]) for i in tasks ])
+				+ sum([ self.minInsertionBurden[j]*self.xs[j,k]
+						for j in otherTasks if (j,k) in self.xs ]))
+
+	def insertion_burdens(self, tasks):
+		# the largest load task i of the station can add to the other tasks
+		burdenUB = {}
+		for i in tasks:
+			remainingTasks = [ a for a in tasks if a != i ]
+			burdenUB[i] = (  self.inst.procList[i]
+						   + max([self.inst.backSU[i][i]] + list(self.inst.insertion_setups(i, remainingTasks))))
+		return burdenUB
+
+	def add_infer_cut_infeasible_assignment_analytic(self, k, tasks):
+		# infer cut
+		if not self.config.very_quiet:
+			print('   CUT: Infer cut #{} added (analytic):'.format(self.numInfAssCutsAnalytic))
+			print('  \t[Station {}: tasks = {} implies c >= {}]'.format(k,tasks,round(self.curStationLoad[k])))
+		self.model.cbLazy(self.cycleTime >= self.analytic_infer_cut_bound(k, tasks, self.curStationLoad[k]))
+		self.infAssCutsAnalytic.append({'stationNum':k, 
+										'tasks':tasks, 
+										'cycleTime':self.curStationLoad[k]})
+		self.numInfAssCutsAnalytic += 1
+
+	def add_multi_cuts_sub_assignments(self, k, tasks):
+		# analytic infer cuts for the sub-assignments of an overloaded station:
+		# remove each task, highest burden first, and evaluate the remaining
+		# load exactly. Each sub-assignment that still exceeds the master cycle
+		# time gets a cut, up to the requested number per station
+		burdenUB = self.insertion_burdens(tasks)
+		numAdded = 0
+		for i in sorted(tasks, key=lambda i: -burdenUB[i]):
+			if numAdded == self.config.multi_cuts:
+				break
+			subTasks = set(tasks).difference([i])
+			key = frozenset(subTasks)
+			if key not in self.subAssignmentLoads:
+				self.subAssignmentLoads[key] = station_load(self.inst, subTasks)
+			load = self.subAssignmentLoads[key]
+			if load is None or round(load, 2) <= round(self.curCycleTime, 2):
+				continue
+			if not self.config.very_quiet:
+				print('   CUT: Multi cut #{} added:'.format(self.numMultiCuts))
+				print('  \t[Station {}: tasks = {} implies c >= {}]'.format(k,subTasks,round(load)))
+			self.model.cbLazy(self.cycleTime >= self.analytic_infer_cut_bound(k, subTasks, load))
+			self.multiCuts.append({'stationNum':k, 
+								   'tasks':subTasks, 
+								   'cycleTime':load})
+			self.numMultiCuts += 1
+			numAdded += 1
+
 	def add_global_bounds(self, allowGlobalUB):
 		# method to add all global bounds after all sub-problems have completed
 
@@ -1333,7 +1410,7 @@ class Solver:
 
 	def add_global_upper_bound(self):
 		# global bound
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('\n BOUND: Global UB #{} added: [c <= {}]'.format(self.numGlobalUB,
 																	self.bestCycleTimeUB))
 		# change the rhs
@@ -1348,7 +1425,7 @@ class Solver:
 
 	def add_global_lower_bound(self):
 		# global bound
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('\n BOUND: Global LB #{} added: [c >= {}]'.format(self.numGlobalLB,
 																	self.bestCycleTimeLB))
 		# change the rhs
@@ -1376,34 +1453,34 @@ class Solver:
 
 		while not doneBenders:
 			# early termination consitions
-			if self.bendersIter >= MAX_BENDERS_ITERATIONS:
+			if self.bendersIter >= self.config.max_iterations:
 				sys.exit('Terminating. Maximum number of Benders iterations exceeded.')
 
 			# define the time used up until this relaxed master
 			self.RMP_time_used = round(time.time()-startBenders,4)
-			if self.RMP_time_used > TIMELIMIT:
+			if self.RMP_time_used > self.config.time_limit:
 				doneBenders = True
 				self.time_limit_exceeded = True
 				break
 			# default to allowing a global UB this iteration
 			allowGlobalUB = True
-			if not args.very_quiet:
-				print('\n{:.1f}/{} seconds elapsed'.format(self.RMP_time_used,TIMELIMIT))
+			if not self.config.very_quiet:
+				print('\n{:.1f}/{} seconds elapsed'.format(self.RMP_time_used,self.config.time_limit))
 				print('===============================')
 				print('Master %d: ' %(self.bendersIter), end='', flush=True)
 
 			# Master optimisation for current Benders iteration
-			self.solve_master_problem(TIMELIMIT - self.RMP_time_used)
+			self.solve_master_problem(self.config.time_limit - self.RMP_time_used)
 
 			self.gap.append(round(float((self.bestCycleTimeUB - self.curCycleTime)/self.curCycleTime)*100,4))
 
-			if time.time() - startBenders > TIMELIMIT:
+			if time.time() - startBenders > self.config.time_limit:
 				self.master_timed_out = True
 				doneBenders = True
 				self.time_limit_exceeded = True
 				break
 
-			if not args.very_quiet:
+			if not self.config.very_quiet:
 				print('\tCycle: \t{}'.format(round(self.curCycleTime)))
 				print('\t\tUB: \t{}'.format(self.bestCycleTimeUB))
 				print('\t\tGap: \t{:.2f} %\n'.format(self.gap[self.bendersIter]))
@@ -1426,13 +1503,13 @@ class Solver:
 
 			# solve each sub-problem, adding cuts to master
 			for k in self.inst.stations:
-				if not args.very_quiet:
+				if not self.config.very_quiet:
 					print(' Station %d' %(k), end='', flush=True)
 
 				# define the time used up until starting this sub-problem
 				self.SP_time_used = round(time.time() - startBenders,4)
 				# check if we are out of time before starting each sub-problem
-				if self.SP_time_used > TIMELIMIT:
+				if self.SP_time_used > self.config.time_limit:
 					doneBenders = True
 					self.time_limit_exceeded = True
 					break
@@ -1459,12 +1536,12 @@ class Solver:
 				# add cuts and iterate if we arentt done
 
 				# ** don't do a nogood cut for optimality sub-problems **
-				if USE_NOGOODS:
+				if self.config.nogoods:
 					self.add_nogood_cut(self.taskAssignment)
 					# do not do any global upper bounds if we used a nogood
 					allowGlobalUB = False
 
-				if USE_GLOBAL_BOUNDS:
+				if self.config.global_bounds:
 					self.add_global_bounds(allowGlobalUB)
 				self.bendersIter += 1
 			else:
@@ -1478,7 +1555,6 @@ class Solver:
 
 	def benders_optimise_with_feasibility_sub_problems(self, benders_gap=0.01):
 		# TO BE COMPLETED
-		print('USE_NOGOODS', USE_NOGOODS)
 		self.bendersIter = 0
 		doneBenders = False
 		while not doneBenders:
@@ -1488,7 +1564,7 @@ class Solver:
 			for k in self.inst.stations:
 				# solve sub-problem
 				# blah blah
-				if USE_NOGOODS:
+				if self.config.nogoods:
 					self.add_nogood_cut(self.taskAssignment)
 					# do not do any global upper bounds if we used a nogood
 					allowGlobalUB = False
@@ -1514,14 +1590,14 @@ class Solver:
 		# define the time used up until the first relaxed master
 		self.RMP_time_used = round(time.time()-self.startBenders,4)
 
-		if not args.very_quiet:
-			print('\n{:.1f}/{} seconds elapsed'.format(self.RMP_time_used,TIMELIMIT))
+		if not self.config.very_quiet:
+			print('\n{:.1f}/{} seconds elapsed'.format(self.RMP_time_used,self.config.time_limit))
 			print('===============================')
 			print('Master %d: ' %(self.bendersIter), end='', flush=True)
 
 		# pdb.set_trace()
 		# begin Benders iteration
-		self.solve_master_problem_with_callbacks(TIMELIMIT - self.RMP_time_used)
+		self.solve_master_problem_with_callbacks(self.config.time_limit - self.RMP_time_used)
 		# pdb.set_trace()
 
 		if self.model.status == GRB.TIME_LIMIT:
@@ -1543,9 +1619,9 @@ class Solver:
 		self.reinitialise_master_ass(timeRemaining)
 
 		startMaster = time.time()
-		if RMP_TYPE == 'sched':
+		if self.config.master_problem_type == 'sched':
 			self.optimise()
-		elif RMP_TYPE == 'ass':
+		elif self.config.master_problem_type == 'ass':
 			self.optimise_ass()
 		self.master_times.append(time.time() - startMaster)
 		self.optimisation_times.append(self.master_times[-1])
@@ -1562,7 +1638,7 @@ class Solver:
 
 	def solve_sub_problem(self, k):
 		# initialise sub-problem and solve it
-		self.stations[k] = Station(self.inst, k, self.taskAssignment[k], self.curCycleTime, self.bestCycleTimeUB)
+		self.stations[k] = Station(self.inst, self.config, k, self.taskAssignment[k], self.curCycleTime, self.bestCycleTimeUB)
 		# check if assignment is new, and don't solve if we already have
 		[newAssignment, isFeasible] = self.is_assignment_new(k)
 		logicallyInfeasibleAssignment = False
@@ -1574,7 +1650,7 @@ class Solver:
 			# check if time-limit is exceeded
 			if self.time_limit_exceeded:
 				return
-			if USE_LOGIC_CUTS and logicallyInfeasibleAssignment == True:
+			if self.config.logic_cuts and logicallyInfeasibleAssignment == True:
 				isFeasible = False
 				satisfiesCurCycleTime = False
 				# cut all solutions with the current assignment for this station
@@ -1585,7 +1661,7 @@ class Solver:
 			# if old assignment was feasible then just copy the results
 			if isFeasible:
 				# print station load
-				if not args.very_quiet:
+				if not self.config.very_quiet:
 					print(' Load = \t{}'.format(round(self.curStationLoad[k])))
 				# check if old load satisfies current cycle time
 				if self.curStationLoad[k] <= self.curCycleTime:
@@ -1597,12 +1673,20 @@ class Solver:
 				# return immediately, not doing any inference cuts
 				return logicallyInfeasibleAssignment
 
+		# a station left without a load (its sequencing found no solution) is
+		# infeasible, which is logged rather than treated as an error
+		if self.curStationLoad[k] is None:
+			if not self.config.very_quiet:
+				print(' No load found, station {} is infeasible'.format(k))
+			if self.config.logic_cuts and newAssignment:
+				self.add_logic_cut_infeasible_assignment(k,self.taskAssignment[k])
+			self.store_sub_problem_result(k, False, False)
+			# no global upper bound can be taken from this iteration
+			return True
+
 		# print station load
-		if not args.very_quiet and isFeasible:
-			try:
-				print(' Load = \t{}'.format(round(self.curStationLoad[k])))
-			except TypeError:
-				pdb.set_trace()
+		if not self.config.very_quiet and isFeasible:
+			print(' Load = \t{}'.format(round(self.curStationLoad[k])))
 
 		approxStationLoad = round(self.curStationLoad[k], 2)
 		approxCycleTime = round(self.curCycleTime, 2)
@@ -1610,12 +1694,16 @@ class Solver:
 		if approxStationLoad > approxCycleTime:
 			satisfiesCurCycleTime = False
 			# add infer cuts for this station if we haven't already made a logic cut
-			if USE_INFER_CUTS and logicallyInfeasibleAssignment != True:
+			if self.config.infer_cuts and logicallyInfeasibleAssignment != True:
 				self.add_infer_cut_infeasible_assignment_simple(k, self.taskAssignment[k])
-			if USE_INFER_CUTS_SMART and logicallyInfeasibleAssignment != True:
+			if self.config.smart_infer_cuts and logicallyInfeasibleAssignment != True:
 				self.add_infer_cut_infeasible_assignment_smart(k, self.taskAssignment[k])
-			if USE_INFER_CUTS_SMARTEST and logicallyInfeasibleAssignment != True:
+			if self.config.smartest_infer_cuts and logicallyInfeasibleAssignment != True:
 				self.add_infer_cut_infeasible_assignment_smartest(k, self.taskAssignment[k])
+			if self.config.analytic_infer_cuts and logicallyInfeasibleAssignment != True:
+				self.add_infer_cut_infeasible_assignment_analytic(k, self.taskAssignment[k])
+			if self.config.multi_cuts and logicallyInfeasibleAssignment != True:
+				self.add_multi_cuts_sub_assignments(k, self.taskAssignment[k])
 
 		else:
 			satisfiesCurCycleTime = True
@@ -1625,8 +1713,8 @@ class Solver:
 
 	def call_sub_problem_solver(self, k):
 		logicallyInfeasibleAssignment = False
-		if SUB_PROBLEM_SOLVER == 'mip':
-			self.stations[k].initialise_MIP(TIMELIMIT-self.SP_time_used)
+		if self.config.sub_problem_solver == 'mip':
+			self.stations[k].initialise_MIP(self.config.time_limit-self.SP_time_used)
 			# if args.quiet:
 			# 	self.stations[k].model.setParam('OutputFlag', 0)
 			startSequencing = time.time()
@@ -1651,10 +1739,10 @@ class Solver:
 				# do a logic cut of the infeasible assignment
 				logicallyInfeasibleAssignment = True
 
-		elif 'cp' in SUB_PROBLEM_SOLVER:
+		elif 'cp' in self.config.sub_problem_solver:
 			self.stations[k].initialise_CP()
 			startSequencing = time.time()
-			self.stations[k].solve_CP(TIMELIMIT-self.SP_time_used)
+			self.stations[k].solve_CP(self.config.time_limit-self.SP_time_used)
 			# record station sub-problem optimisation time
 			self.sequencing_solve_times.append(time.time() - startSequencing)
 			self.optimisation_times.append(self.sequencing_solve_times[-1])
@@ -1678,7 +1766,7 @@ class Solver:
 				# do a logic cut of the infeasible assignment
 				logicallyInfeasibleAssignment = True
 
-		elif SUB_PROBLEM_SOLVER == 'tsp':
+		elif self.config.sub_problem_solver == 'tsp':
 			self.stations[k].initialise_TSP()
 			self.stations[k].solve_TSP()
 			# if TSP solver found optimality then store results otherwise return infeasible
@@ -1764,7 +1852,7 @@ class Solver:
 				self.statsTotalMasterNodes = self.statsMasterNodes.sum()
 				self.statsAvgMasterNodes = float(self.statsTotalMasterNodes/(self.bendersIter+1))
 
-				if SUB_PROBLEM_SOLVER == 'mip' or 'cp' in SUB_PROBLEM_SOLVER:
+				if self.config.sub_problem_solver == 'mip' or 'cp' in self.config.sub_problem_solver:
 					# calculate nodes statistics for sub problems
 					self.statsFinalSubProblemNodes = 0
 					self.statsTotalSubProblemNodes = sum([i.sum() for i in self.statsSubProblemNodes])
@@ -1787,7 +1875,7 @@ class Solver:
 				self.statsTotalMasterNodes = self.statsMasterNodes.sum()
 				self.statsAvgMasterNodes = float(self.statsTotalMasterNodes/(self.bendersIter+1))
 
-				if SUB_PROBLEM_SOLVER == 'mip' or 'cp' in SUB_PROBLEM_SOLVER:
+				if self.config.sub_problem_solver == 'mip' or 'cp' in self.config.sub_problem_solver:
 					# calculate nodes statistics for sub problems
 					self.statsFinalSubProblemNodes = self.statsSubProblemNodes[-1].sum()
 					self.statsTotalSubProblemNodes = sum([i.sum() for i in self.statsSubProblemNodes])
@@ -1801,7 +1889,7 @@ class Solver:
 			self.statsAvgMasterNodes = self.statsTotalMasterNodes
 
 			self.statsTotalSubProblemNodes = 0
-			if SUB_PROBLEM_SOLVER == 'mip' or 'cp' in SUB_PROBLEM_SOLVER:
+			if self.config.sub_problem_solver == 'mip' or 'cp' in self.config.sub_problem_solver:
 				# calculate nodes statistics for sub problems
 				self.statsFinalSubProblemNodes = 0
 				self.statsTotalSubProblemNodes = 0
@@ -1811,7 +1899,8 @@ class Solver:
 		cutAmountsList = [self.numGlobalLB, self.numNoGoods,
 					 	  self.numGlobalUB, self.numInfAssCutsSimple,
 						  self.numLogicCuts, self.numInfAssCutsSmart,
-						  self.numInfAssCutsSmartest]
+						  self.numInfAssCutsSmartest, self.numInfAssCutsAnalytic,
+						  self.numMultiCuts]
 		self.numTotalCuts = sum(filter( lambda i: isinstance(i, int) , cutAmountsList))
 
 		self.statsTotalNodes = self.statsTotalMasterNodes + self.statsTotalSubProblemNodes
@@ -1825,14 +1914,14 @@ class Solver:
 
 	def print_solution(self):
 		# output
-		if args.human_readable:
-			if not args.very_quiet:
+		if self.config.human_readable:
+			if not self.config.very_quiet:
 				print('\n! ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ ')
 				print('! \tSOLUTION ')
 			else:
 				print('\n',end='')
 			print('! Cycle Time:\t{}'.format(round(self.optimalCycleTime)))
-			if not args.very_quiet: 
+			if not self.config.very_quiet: 
 				for k in self.inst.stations:
 					print('! Station {}'.format(k))
 					print('!   Load = \t{}'.format(round(self.curStationLoad[k])))
@@ -1845,15 +1934,26 @@ class Solver:
 		# pdb.set_trace()
 		with open(results_file, 'w', newline='') as csvfile:
 			results = csv.writer(csvfile)
-			results.writerow([self.solFeasible, self.solOptimal, self.optimalCycleTime, self.gap[self.bendersIter], 
-							  self.statsTotalRuntime, self.init_time, self.statsMasterRuntime, self.statsSubProbRuntime, 
-							  self.statsSubProbSolvetime, self.statsSubProblemOverhead,
-							  self.bendersIter, self.statsTotalNodes, self.statsTotalMasterNodes, self.statsTotalSubProblemNodes,
-							  self.numTotalCuts, self.numNoGoods, self.numGlobalLB, self.numGlobalUB,
-							  self.numInfAssCutsSimple, self.numInfAssCutsSmart, self.numInfAssCutsSmartest, self.numLogicCuts])
+			results.writerow(self.results_summary())
+
+	def results_summary(self):
+		# summary statistics in the order of BENDERS_COLUMNS
+		return [self.solFeasible, self.solOptimal, self.optimalCycleTime, self.gap[self.bendersIter], 
+				self.statsTotalRuntime, self.init_time, self.statsMasterRuntime, self.statsSubProbRuntime, 
+				self.statsSubProbSolvetime, self.statsSubProblemOverhead,
+				self.bendersIter, self.statsTotalNodes, self.statsTotalMasterNodes, self.statsTotalSubProblemNodes,
+				self.numTotalCuts, self.numNoGoods, self.numGlobalLB, self.numGlobalUB,
+				self.numInfAssCutsSimple, self.numInfAssCutsSmart, self.numInfAssCutsSmartest, self.numLogicCuts,
+				self.numInfAssCutsAnalytic, self.numMultiCuts]
+
+	def solve_result(self):
+		summary = dict(zip(BENDERS_COLUMNS, self.results_summary()))
+		if self.solFeasible == 1:
+			return SolveResult(summary, self.taskAssignment, self.startTimes, self.curStationLoad)
+		return SolveResult(summary)
 
 	def print_statistics(self):
-		if args.human_readable:
+		if self.config.human_readable:
 			print('\n! ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ ')
 			print('! \tRUNTIME STATISTICS ')
 			print('! Init time:\t{:.4f}'.format(self.init_time))
@@ -1893,7 +1993,7 @@ class Solver:
 				print('!   TotalRMP:\t\t{}'.format(self.statsTotalMasterNodes))
 				print('!   Final Master:\t{}'.format(self.statsFinalMasterNodes))
 				print('!   AverageRMP:\t\t{:.2f}'.format(self.statsAvgMasterNodes))
-				if SUB_PROBLEM_SOLVER == 'mip' or 'cp' in SUB_PROBLEM_SOLVER:
+				if self.config.sub_problem_solver == 'mip' or 'cp' in self.config.sub_problem_solver:
 					print('! Sub-Problem')
 					print('!   TotalSP:\t\t{}'.format(self.statsTotalSubProblemNodes))
 					print('!   Final SPs Total:\t{}'.format(self.statsFinalSubProblemNodes))
@@ -1910,6 +2010,8 @@ class Solver:
 			print('! Simple Infer Cuts:\t{}'.format(self.numInfAssCutsSimple))
 			print('! Smart Infer Cuts:\t{}'.format(self.numInfAssCutsSmart))
 			print('! Smartest Infer Cuts:\t{}'.format(self.numInfAssCutsSmartest))
+			print('! Analytic Infer Cuts:\t{}'.format(self.numInfAssCutsAnalytic))
+			print('! Multi Cuts:\t\t{}'.format(self.numMultiCuts))
 			print('! Logic Infeas. Cuts:\t{}'.format(self.numLogicCuts))
 		else:
 			print(self.init_time)
@@ -1943,8 +2045,14 @@ def master_callback(model, where):
 	# callback function to return to previously explored master B&B tree
 	# adds the Benders cuts as lazy constraints
 
+	s = model._solver
+
 	# begin callback when a new incumbent MIP sol is found
 	if where == GRB.Callback.MIPSOL:
+		# only the best ordering of swappable stations is passed to the sub-problems
+		if s.config.symmetry_breaking >= 2 and reject_swappable_assignment(model):
+			return
+
 		# status = model.cbGet(GRB.Callback.MIPNODE_STATUS)
 
 		# if status == GRB.Status.OPTIMAL:
@@ -1958,14 +2066,13 @@ def master_callback(model, where):
 		if curMIPGap == 0.0:
 
 			# store current RMP stats
-			store_current_RMP_stats()
-			pdb.set_trace()
-			if time.time() - s.startBenders > TIMELIMIT:
+			store_current_RMP_stats(s)
+			if time.time() - s.startBenders > s.config.time_limit:
 				s.master_timed_out = True
 				s.doneBenders = True
 				s.time_limit_exceeded = True
 
-			if not args.very_quiet:
+			if not s.config.very_quiet:
 				print('\tCycle: \t{}'.format(round(s.curCycleTime)))
 				print('\t\tUB: \t{}'.format(s.bestCycleTimeUB))
 				print('\t\tGap: \t{:.2f} %\n'.format(s.gap[s.bendersIter]))
@@ -1985,7 +2092,7 @@ def master_callback(model, where):
 					s.all_solutions_ever[k].append({'tasks': s.taskAssignment[k]})
 
 			# solve each sub-problem, adding cuts to master
-			iterate_over_stations()
+			iterate_over_stations(s)
 
 			if not False in s.stationFeasible:
 				s.mostRecentFeasibleCycleTime = round(max(s.curStationLoad),4)
@@ -1994,7 +2101,7 @@ def master_callback(model, where):
 			# stopping condition: continuing until all sub-problem solutions <= master solution
 			if False in s.stationSatisfiesCurCycleTime or False in s.stationFeasible:
 				# add cuts and iterate if we arent done
-				if USE_GLOBAL_BOUNDS:
+				if s.config.global_bounds:
 					s.add_global_bounds(s.allowGlobalUB)
 				s.bendersIter += 1
 			else:
@@ -2003,7 +2110,7 @@ def master_callback(model, where):
 				s.doneBenders = True
 			# pdb.set_trace()
 
-def store_current_RMP_stats():
+def store_current_RMP_stats(s):
 	s.master_times.append(time.time() - s.startMaster)
 	s.optimisation_times.append(s.master_times[-1])
 
@@ -2012,15 +2119,15 @@ def store_current_RMP_stats():
 
 	s.gap.append(round(float((s.bestCycleTimeUB - s.curCycleTime)/s.curCycleTime)*100,4))
 
-def iterate_over_stations():
+def iterate_over_stations(s):
 	for k in s.inst.stations:
-		if not args.very_quiet:
+		if not s.config.very_quiet:
 			print(' Station %d' %(k), end='', flush=True)
 
 		# define the time used up until starting this sub-problem
 		s.SP_time_used = round(time.time() - s.startBenders,4)
 		# check if we are out of time before starting each sub-problem
-		if s.SP_time_used > TIMELIMIT:
+		if s.SP_time_used > s.config.time_limit:
 			s.doneBenders = True
 			s.time_limit_exceeded = True
 			break
@@ -2036,22 +2143,66 @@ def iterate_over_stations():
 		if result == True:
 			s.allowGlobalUB = False
 
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# LIBRARY FUNCTIONALITY
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+def make_config(**options):
+	# the command line defaults, overridden by the given options
+	return SolverConfig(create_parser(), **options)
+
+def check_config(config):
+	# reject options which the master callbacks do not support, rather than ignoring them
+	if config.trace is not None:
+		raise ValueError('--trace is not supported by the callback Benders, whose cuts are '
+						 'added within one master solve. Use sualbsp2_benders.py -tr instead')
+
+def run_solver(inst, config):
+	# create the Solver for the given instance and configuration and optimise it
+	check_config(config)
+	s = Solver(inst, config)
+	s.benders_optimise_with_master_callbacks()
+	s.check_for_feasibility_and_optimality()
+	s.process_solution_statistics()
+	return s
+
+def solve(instance, config):
+	# solve an instance, given as an AssemblyLineInstance or the path of an
+	# instance file, with a SolverConfig and return the SolveResult
+	if not isinstance(instance, AssemblyLineInstance):
+		instance = AssemblyLineInstance(INST_DIR, instance)
+	return run_solver(instance, config).solve_result()
+
 # Script to create instance class, run the solver and output the solution
-if __name__ == '__main__':
+def main(argv=None):
+	parser = create_parser()
+	args = parser.parse_args(argv)
+	config = SolverConfig.from_args(parser, args)
+	try:
+		check_config(config)
+	except ValueError as error:
+		parser.error(str(error))
+
 	# start total runtime timer
 	startAll = time.time()
 
 	filename = args.file # retrieve filename of instance to solve
-	if args.human_readable:
+	if config.human_readable:
 		print('Instance:', filename)
 	else:
 		print(filename)
 
+	# only wrap the profiled phases if asked to, so normal runs are untouched
+	if config.profile is not None:
+		PROFILER = PhaseProfiler(config.profile, 'profile_{}'.format(config.experiment_token))
+		PROFILER.instrument(AssemblyLineInstance, BENDERS_PHASES['AssemblyLineInstance'])
+		PROFILER.instrument(Station, BENDERS_PHASES['Station'])
+		PROFILER.instrument(Solver, BENDERS_PHASES['Solver'] + ['solve_master_problem_with_callbacks'])
+
 	# store assembly line instance data
-	if not args.very_quiet:
+	if not config.very_quiet:
 		print('Importing data... ', end='', flush=True)
 	inst = AssemblyLineInstance(INST_DIR,filename)
-	if not args.very_quiet:
+	if not config.very_quiet:
 		print('completed.')
 
 	# Check for top-level infeasibility of the instance
@@ -2063,9 +2214,7 @@ if __name__ == '__main__':
 	# else:
 
 	# create Solver for given instance and optimise it
-	s = Solver(inst)
-
-	s.benders_optimise_with_master_callbacks()
+	s = run_solver(inst, config)
 
 	# if SUB_PROBLEM_TYPE == 'opt':
 	# 	s.benders_optimise_with_optimality_sub_problems()
@@ -2073,31 +2222,32 @@ if __name__ == '__main__':
 	# 	s.benders_optimise_with_feasibility_sub_problems()
 
 	# store output
-	s.check_for_feasibility_and_optimality()
-	s.process_solution_statistics()
 	if s.solFeasible == 1:
 		s.print_solution()
 
 	# check solution consistency
-	if CHECK_SOLUTION:
+	if config.check_solution:
 		print('\nVerifying solution:')
 		check_solution_benders(s.optimalCycleTime, s.taskAssignment, s.startTimes, s.curStationLoad, inst)
 
-	s.save_solution('summary_results_{}.txt'.format(EXPERIMENT_TOKEN))
-	if PRINT_STATISTICS:
+	s.save_solution('summary_results_{}.txt'.format(config.experiment_token))
+	if config.statistics:
 		s.print_statistics()
 
 	# print total runtime
 	end = time.time()
-	if not args.quiet:
+	if config.profile is not None:
+		PROFILER.print_report(end-startAll)
+	if not config.quiet:
 		print('\n! Language runtime:\t{:.4f}'.format(end-startAll-sum(s.optimisation_times)))
-	if args.human_readable:
-		if args.very_quiet:
+	if config.human_readable:
+		if config.very_quiet:
 			print('')
 		print('\n! Total runtime:\t{:.4f}\n'.format(end-startAll))
 	else:
 		print(end-startAll)
 
-	# pdb.set_trace()
+if __name__ == '__main__':
+	main()
 
 # EOF #
\ No newline at end of file
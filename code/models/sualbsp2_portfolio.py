@@ -0,0 +1,237 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Portfolio of SUALBSP-2 solvers
+
+# This file contains:
+# 	-A portfolio runner racing several models/configurations on the same
+#	 instance, one process per configuration
+#	-The solvers share their incumbent cycle times and lower bounds through
+#	 a shared-memory channel, and all are stopped once one proves optimality
+#	 or the best incumbent meets the best lower bound (closed by bounds)
+
+# Packages
+import os
+import sys
+import time
+import shlex
+import argparse
+import subprocess
+
+# User-defined Packages
+from ALB_incumbent_channel import IncumbentChannel, NO_INCUMBENT
+
+# initilise settings for argument parser
+parser = argparse.ArgumentParser()
+parser.add_argument('file', help='instance file')
+parser.add_argument('-q', '--quiet', help='Some output', action='store_true')
+parser.add_argument('-H', '--human-readable', help='Human readable output', action='store_true')
+parser.add_argument('-m', '--model-config', type=str, action='append', default=None,
+					help='Model and flags to race, e.g. "sualbsp2_benders -gb -ic3 -sps mip". '
+						 'Can be given several times, defaults to all four models')
+parser.add_argument('-t', '--time-limit', type=float, default=1800,
+					help='Optimisation time limit of each solver.')
+parser.add_argument('-et', '--experiment-token', type=int, default=0,
+					help='Indicator for which experiment is being run')
+parser.add_argument('-g', '--grace-period', type=float, default=10,
+					help='Time given to solvers to exit after being asked to stop')
+parser.add_argument('-pi', '--poll-interval', type=float, default=0.2,
+					help='Time between checks of the incumbent channel')
+args = parser.parse_args()
+
+# argument definitions
+TIMELIMIT = args.time_limit
+EXPERIMENT_TOKEN = args.experiment_token
+GRACE_PERIOD = args.grace_period
+POLL_INTERVAL = args.poll_interval
+
+DEFAULT_CONFIGS = ['sualbsp2_fsbf',
+				   'sualbsp2_ssbf',
+				   'sualbsp2_scbf',
+				   'sualbsp2_benders -gb -ic3 -sps mip']
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Class defining a single solver process in the portfolio
+class PortfolioMember:
+	def __init__(self, slot, config, channelName):
+		self.slot = slot
+		self.config = config
+		configArgs = shlex.split(config)
+		self.model = configArgs[0]
+		# each member gets its own token so the summary and sub-problem files never clash
+		self.token = EXPERIMENT_TOKEN*100 + slot
+		self.outputFile = 'portfolio-output_{}_{}.txt'.format(EXPERIMENT_TOKEN, slot)
+		self.command = [sys.executable, os.path.join(MODELS_DIR, '{}.py'.format(self.model)),
+						'-H', '-s', '-q', '-t', str(TIMELIMIT), '-et', str(self.token),
+						'-pc', channelName, '-ps', str(slot)] + configArgs[1:] + [args.file]
+		self.process = None
+		self.runtime = None
+
+	def start(self):
+		self.startTime = time.time()
+		with open(self.outputFile, 'w') as f:
+			self.process = subprocess.Popen(self.command, stdout=f, stderr=subprocess.STDOUT)
+
+	def poll(self):
+		if self.runtime is None and self.process.poll() is not None:
+			self.runtime = time.time() - self.startTime
+		return self.process.poll()
+
+	def stop(self):
+		if self.process.poll() is None:
+			self.process.terminate()
+
+	def kill(self):
+		if self.process.poll() is None:
+			self.process.kill()
+		self.process.wait()
+
+	def read_summary(self):
+		# first three columns of every model's summary are feasible, optimal, cycle
+		try:
+			with open('summary_results_{}.txt'.format(self.token), 'r') as f:
+				row = f.readline().strip().split(',')
+			os.remove('summary_results_{}.txt'.format(self.token))
+		except FileNotFoundError:
+			return None
+		# a solver which crashed while writing its summary leaves an empty or short row
+		if len(row) < 3:
+			return None
+		return row
+
+class Portfolio:
+	def __init__(self, configs):
+		self.channel = IncumbentChannel(numSlots=len(configs))
+		self.members = [ PortfolioMember(slot, config, self.channel.name)
+						 for slot, config in enumerate(configs) ]
+
+	def race(self):
+		start = time.time()
+		for member in self.members:
+			member.start()
+
+		self.winner = None
+		self.closedByBounds = False
+		stopTime = None
+		while True:
+			running = [ member for member in self.members if member.poll() is None ]
+			if stopTime is None:
+				self.winner = self.channel.optimal_slot()
+				if self.winner is not None:
+					if not args.quiet:
+						print('{:.1f}s: {} proved optimality'.format(time.time()-start,
+																	 self.members[self.winner].config))
+				else:
+					self.closedByBounds = self.channel.closed_by_bounds()
+					if self.closedByBounds and not args.quiet:
+						print('{:.1f}s: incumbent closed by bounds'.format(time.time()-start))
+				if self.winner is not None or self.closedByBounds:
+					# ask the remaining solvers to stop and give them time to write their output
+					self.channel.request_stop()
+					stopTime = time.time()
+			if not running:
+				break
+			# give up on solvers which do not respect their time limit or the stop request
+			if stopTime is not None and time.time() - stopTime > GRACE_PERIOD:
+				for member in running:
+					member.stop()
+			if time.time() - start > TIMELIMIT + GRACE_PERIOD:
+				self.channel.request_stop()
+				for member in running:
+					member.stop()
+				if time.time() - start > TIMELIMIT + 2*GRACE_PERIOD:
+					for member in running:
+						member.kill()
+			time.sleep(POLL_INTERVAL)
+		self.runtime = time.time() - start
+
+		for member in self.members:
+			member.kill()
+
+		self.bestCycleTime, bestSlot = self.channel.best_incumbent()
+		self.bestCycleTimeLB = self.channel.best_lower_bound()
+		self.summaries = [ member.read_summary() for member in self.members ]
+		# otherwise credit the best incumbent only to a member which exited cleanly,
+		# not to one which crashed (or was killed) after publishing it. An incumbent
+		# closed by the bounds of several members has no single winner
+		if self.winner is None and not self.closedByBounds and bestSlot is not None:
+			if self.members[bestSlot].process.returncode == 0 and self.summaries[bestSlot] is not None:
+				self.winner = bestSlot
+		self.channel.close()
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	# OUTPUT METHODS
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	def process_solution_statistics(self):
+		if self.bestCycleTime == NO_INCUMBENT:
+			self.solFeasible = 0
+			self.solOptimal = 0
+			self.optimalCycleTime = 0
+			self.gap = 100
+		else:
+			self.solFeasible = 1
+			self.optimalCycleTime = round(self.bestCycleTime)
+			self.solOptimal = int(self.bestCycleTime <= self.bestCycleTimeLB)
+			if self.bestCycleTimeLB > 0:
+				self.gap = round(100*(self.bestCycleTime - self.bestCycleTimeLB)/self.bestCycleTime,2)
+			else:
+				self.gap = 100
+		self.statsTotalRuntime = round(self.runtime,4)
+
+	def print_solution(self):
+		if args.human_readable:
+			print('\n! ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ ')
+			print('! \tPORTFOLIO ')
+			for member, summary in zip(self.members, self.summaries):
+				if summary is None:
+					result = 'no output'
+				else:
+					result = 'feasible = {}, optimal = {}, cycle = {}'.format(*summary[:3])
+				print('! {}{}:\t{}'.format('*' if member.slot == self.winner else ' ',
+											member.config, result))
+			if self.winner is None and self.closedByBounds:
+				print('! Closed by bounds')
+			print('! Cycle Time:\t{}'.format(self.optimalCycleTime))
+			print('! Gap:\t\t{}'.format(self.gap))
+		else:
+			print(self.optimalCycleTime)
+
+	def save_solution(self, results_file):
+		with open(results_file, 'w', newline='') as f:
+			if self.winner is None:
+				winnerModel = 'bounds' if self.closedByBounds else 'none'
+			else:
+				winnerModel = self.members[self.winner].model
+			f.write('{},{},{},{},{},{}\n'.format(self.solFeasible, self.solOptimal,
+												  self.optimalCycleTime, self.gap,
+												  self.statsTotalRuntime, winnerModel))
+
+# Script to race the portfolio on an instance and output the best solution
+if __name__ == '__main__':
+	start = time.time()
+
+	filename = args.file
+	if args.human_readable:
+		print('Instance:', filename)
+	else:
+		print(filename)
+
+	if args.model_config is None:
+		configs = DEFAULT_CONFIGS
+	else:
+		configs = args.model_config
+
+	p = Portfolio(configs)
+	p.race()
+
+	p.process_solution_statistics()
+	p.print_solution()
+	p.save_solution('summary_results_{}.txt'.format(EXPERIMENT_TOKEN))
+
+	end = time.time()
+	if args.human_readable:
+		print('! Total runtime:\t{:.4f}'.format(end-start))
+	else:
+		print(end-start)
+
+# EOF #
@@ -9,36 +9,63 @@
 
 # Packages
 import sys
-import pdb 
+import copy
 import time
 # import itertools
 import csv
 import argparse
-import numpy as np
-import networkx as nx
-from gurobipy import *
 
 # User-defined Packages
 from ALB_instance_storage import AssemblyLineInstance
+from ALB_bound_exchange import FileBoundExchange, callback_exchange_bounds
+from ALB_results_store import ResultsStore, MIP_COLUMNS, configuration_key
+from ALB_solver_config import SolverConfig, SolveResult
+from ALB_preprocessing import preprocess_instance, fix_by_reduced_costs
+
+# gurobipy is only imported once a Gurobi model is built (see import_gurobi), so
+# CP sub-problem runs and library imports of this module do not pay for it
+GRB = None
+Model = None
+
+def import_gurobi():
+	global GRB, Model
+	if Model is None:
+		from gurobipy import GRB, Model
 
 # initilise settings for argument parser
-parser = argparse.ArgumentParser()
-parser.add_argument('file', help='instance file')
-parser.add_argument('-q', '--quiet', help='Some output', action='store_true')
-parser.add_argument('-vq', '--very-quiet', help='Minimal output', action='store_true')
-parser.add_argument('-s', '--statistics', help='Print statistics', action='store_true')
-parser.add_argument('-c', '--check-solution', help='Check solution', action='store_true')
-parser.add_argument('-H', '--human-readable', help='Human readable output', action='store_true')
-parser.add_argument('-b', '--backwardSU-type', type=str, default='copy-forward-setups',
-					help='Type of backward setup times to use. Options include:' 
-						 '{just-forward-setups}')
-parser.add_argument('-t', '--time-limit', type=float, default=1800,
-					help='Optimisation time limit.')
-parser.add_argument('-et', '--experiment-token', type=int, default=0,
-					help='Indicator for which experiment is being run')
-parser.add_argument('-v1', '--valid-ineq-1', help='Use this valid inequality', action='store_true')
-parser.add_argument('-v2', '--valid-ineq-2', help='Use this valid inequality', action='store_true')
-args = parser.parse_args()
+def create_parser():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('file', help='instance file')
+	parser.add_argument('-q', '--quiet', help='Some output', action='store_true')
+	parser.add_argument('-vq', '--very-quiet', help='Minimal output', action='store_true')
+	parser.add_argument('-s', '--statistics', help='Print statistics', action='store_true')
+	parser.add_argument('-c', '--check-solution', help='Check solution', action='store_true')
+	parser.add_argument('-H', '--human-readable', help='Human readable output', action='store_true')
+	parser.add_argument('-b', '--backwardSU-type', type=str, default='copy-forward-setups',
+						help='Type of backward setup times to use. Options include:' 
+							 '{just-forward-setups}')
+	parser.add_argument('-t', '--time-limit', type=float, default=1800,
+						help='Optimisation time limit.')
+	parser.add_argument('-wl', '--work-limit', type=float, default=None,
+						help='Deterministic work limit (Gurobi work units), for runs that are '
+							 'reproducible across machines. The time limit still applies')
+	parser.add_argument('-et', '--experiment-token', type=int, default=0,
+						help='Indicator for which experiment is being run')
+	parser.add_argument('-v1', '--valid-ineq-1', help='Use this valid inequality', action='store_true')
+	parser.add_argument('-v2', '--valid-ineq-2', help='Use this valid inequality', action='store_true')
+	parser.add_argument('-pc', '--portfolio-channel', type=str, default=None,
+						help='Name of the shared incumbent channel when racing in a portfolio')
+	parser.add_argument('-ps', '--portfolio-slot', type=int, default=0,
+						help='Slot of this solver in the portfolio incumbent channel')
+	parser.add_argument('-bx', '--bound-exchange', type=str, default=None,
+						help='File through which cycle time upper bounds are shared with other solvers')
+	parser.add_argument('-pp', '--preprocess', help='Restrict the model to the station windows of the tasks and '
+						'fix variables by their reduced costs', action='store_true')
+	parser.add_argument('-th', '--threads', type=int, default=0,
+						help='Number of threads Gurobi may use (0 for all cores)')
+	parser.add_argument('-db', '--results-db', type=str, default=None,
+						help='SQLite results store to add this run to')
+	return parser
 
 # Define globals constants
 if sys.platform == "win32":
@@ -50,43 +77,59 @@ elif sys.platform == "darwin":
 elif sys.platform == "linux" or sys.platform == "linux2":
 	INST_DIR = 'instances/'
 
-# argument definitions
-PRINT_STATISTICS = args.statistics
-BACKWARD_SETUP_TYPE = args.backwardSU_type
-VALID_INEQ_1 = args.valid_ineq_1
-VALID_INEQ_2 = args.valid_ineq_2
-
-CHECK_SOLUTION = 'tools/bin/check-solution' # create this file
-
-TIMELIMIT = args.time_limit
-EXPERIMENT_TOKEN = args.experiment_token
-
-if args.very_quiet:
-	args.quiet = True
-
 class SolverSCBF:
-	def __init__(self, inst):
+	def __init__(self, inst, config):
 		self.inst = inst
+		self.config = config
+		self.windows = None
+		if config.portfolio_channel is not None:
+			from ALB_incumbent_channel import IncumbentChannel
+			self.channel = IncumbentChannel(config.portfolio_channel, config.portfolio_slot)
+		else:
+			self.channel = None
+		# solvers in a portfolio exchange bounds through the channel unless given a file
+		if config.bound_exchange is not None:
+			self.boundExchange = FileBoundExchange(config.bound_exchange)
+		else:
+			self.boundExchange = self.channel
 		# initialise the full MIP model
+		import_gurobi()
 		self.model = Model('assemblyline')
 		self.init_model_parameters()
-		if args.quiet:
+		if self.config.quiet:
 			self.model.setParam('OutputFlag', 0)
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('Initialising the MIP...', end='')
 		self.optimisation_times = []
 		self.sequencing_times = []
 		start = time.time()
+		if self.config.preprocess:
+			# the model is built on a restricted copy of the instance
+			self.inst = copy.copy(inst)
+			self.windows = preprocess_instance(self.inst)
 		self.init_vars()
 		self.create_objective()
 		self.create_constraints()
+		self.numFixed = 0
+		if self.config.preprocess:
+			self.numFixed = fix_by_reduced_costs(self.model, self.inst.maxCycleTime)
 		self.init_time = time.time() - start
 		self.optimisation_times.append(self.init_time)
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print(' initialisation complete ({:.3f}s)'.format(self.init_time))
+			if self.config.preprocess:
+				print('Preprocessing: cycle time upper bound {}, {} variables fixed by reduced costs'.format(
+					  self.inst.maxCycleTime, self.numFixed))
 
 	def init_model_parameters(self):
-		self.model.setParam('TimeLimit', TIMELIMIT)
+		self.model.setParam('TimeLimit', self.config.time_limit)
+		if self.config.work_limit is not None:
+			self.model.setParam('WorkLimit', self.config.work_limit)
+		if self.config.threads > 0:
+			self.model.setParam('Threads', self.config.threads)
+		if self.boundExchange is not None:
+			# shared upper bounds are added as lazy constraints mid-solve
+			self.model.setParam('LazyConstraints', 1)
 
 	def init_vars(self):
 		self.cycleTime = self.model.addVar(lb=self.inst.minCycleTime, 
@@ -204,18 +247,18 @@ class SolverSCBF:
 								== self.inst.numStations ,'(61)')
 
 		# Bounds for the cycle time
-		self.model.addConstr(self.cycleTime <= self.inst.maxCycleTime, 'cycleTimeUB')
+		self.consCycleTimeUB = self.model.addConstr(self.cycleTime <= self.inst.maxCycleTime, 'cycleTimeUB')
 		self.model.addConstr(self.cycleTime >= self.inst.minCycleTime, 'cycleTimeLB')
 		
 		# Valid Inequality:
-		if VALID_INEQ_1:
+		if self.config.valid_ineq_1:
 			self.model.addConstrs(( self.ys[i,j] + self.ys[j,i] <= 1
 									for i in self.inst.tasks
 									for j in self.inst.followForw[i].intersection(self.inst.precedeForw[i])),
 									'validiIneq1')
 
 		# Valid Inequality: lower bound on the total line capacity
-		if VALID_INEQ_2:
+		if self.config.valid_ineq_2:
 			self.model.addConstr(  sum([  sum([ self.inst.forwSU[i][j]*self.ys[i,j]
 										for j in self.inst.followForw[i] ])
 										for i in self.inst.tasks ])
@@ -227,7 +270,18 @@ class SolverSCBF:
 
 	def optimise(self):
 		start = time.time()
-		self.model.optimize()
+		if self.boundExchange is not None:
+			# start from the best cycle time any other solver has found so far
+			cycleTimeUB = min(self.inst.maxCycleTime, self.boundExchange.poll_upper_bound())
+			self.consCycleTimeUB.setAttr('rhs', cycleTimeUB)
+			self.model._cycleTimeUB = cycleTimeUB
+			# share incumbents and bounds with the other solvers while solving
+			self.model._channel = self.channel
+			self.model._exchange = self.boundExchange
+			self.model._cycleTime = self.cycleTime
+			self.model.optimize(callback_exchange_bounds)
+		else:
+			self.model.optimize()
 		self.optimisation_times.append(time.time() - start)
 		# # record the results for outputting
 
@@ -274,14 +328,14 @@ class SolverSCBF:
 
 
 	def print_solution(self):
-		if args.human_readable:
-			if not args.very_quiet:
+		if self.config.human_readable:
+			if not self.config.very_quiet:
 				print('\n! ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ ')
 				print('! \tSOLUTION ')
 			else:
 				print('\n',end='')
 			print('! Cycle Time:\t{}'.format(round(self.model.objval)))
-			if not args.very_quiet:
+			if not self.config.very_quiet:
 				for k in self.inst.stations:
 					print('! Station {}'.format(k))
 					print('!    Load = \t{}'.format(self.stationLoad[k]))
@@ -294,12 +348,29 @@ class SolverSCBF:
 		# pdb.set_trace()	
 		with open(results_file, 'w', newline='') as csvfile:
 			results = csv.writer(csvfile)
-			results.writerow([self.solFeasible, self.solOptimal,
-								self.optimalCycleTime, self.gap,
-								self.statsTotalRuntime, self.statsTotalNodes])
+			results.writerow(self.results_summary())
+
+	def results_summary(self):
+		# summary statistics in the order of MIP_COLUMNS
+		return [self.solFeasible, self.solOptimal,
+				self.optimalCycleTime, self.gap,
+				self.statsTotalRuntime, self.statsTotalNodes]
+
+	def solve_result(self):
+		summary = dict(zip(MIP_COLUMNS, self.results_summary()))
+		if self.solFeasible == 1:
+			return SolveResult(summary, stationLoads=self.stationLoad)
+		return SolveResult(summary)
+
+	def save_solution_to_store(self, dbFile):
+		store = ResultsStore(dbFile)
+		store.add_run(self.inst, 'SCBF', 'na', 'na', 'na',
+					  configuration_key(vars(self.config), vars(make_config())), vars(self.config),
+					  dict(zip(MIP_COLUMNS, self.results_summary())))
+		store.close()
 
 	def print_statistics(self):
-		if args.human_readable:
+		if self.config.human_readable:
 			print('\n! ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ ')
 			print('! \tSOLUTION STATISTICS ')
 			print('! Feasible Solution:\t{}'.format(self.solFeasible))
@@ -324,13 +395,40 @@ class SolverSCBF:
 			print(max(self.optimisation_times))
 			print(sum(self.optimisation_times)/len(self.optimisation_times))
 
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# LIBRARY FUNCTIONALITY
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+def make_config(**options):
+	# the command line defaults, overridden by the given options
+	return SolverConfig(create_parser(), **options)
+
+def run_solver(inst, config):
+	# create the Solver for the given instance and configuration and optimise it
+	s = SolverSCBF(inst, config)
+	if not config.very_quiet:
+		print('Solving the MIP...')
+	s.optimise()
+	s.process_solution_statistics()
+	return s
+
+def solve(instance, config):
+	# solve an instance, given as an AssemblyLineInstance or the path of an
+	# instance file, with a SolverConfig and return the SolveResult
+	if not isinstance(instance, AssemblyLineInstance):
+		instance = AssemblyLineInstance(INST_DIR, instance)
+	return run_solver(instance, config).solve_result()
+
 # Script to create instance class, run the solver and output the solution
-if __name__ == '__main__':
+def main(argv=None):
+	parser = create_parser()
+	args = parser.parse_args(argv)
+	config = SolverConfig.from_args(parser, args)
+
 	# start total runtime timer
 	start = time.time()
 
 	filename = args.file # retrieve filename of instance to solve
-	if args.human_readable:
+	if config.human_readable:
 		print('instance:', filename)
 	else:
 		print(filename)
@@ -340,13 +438,9 @@ if __name__ == '__main__':
 	# pdb.set_trace()
 
 	# create Solver for given instance and optimise it
-	s = SolverSCBF(inst)
-	if not args.very_quiet:
-		print('Solving the MIP...')
-	s.optimise()
+	s = run_solver(inst, config)
 
 	# output
-	s.process_solution_statistics()
 	if s.solFeasible == 1:
 		s.print_solution()
 
@@ -355,23 +449,30 @@ if __name__ == '__main__':
 	# 	print('\nVerifying solution:')
 	# 	check_solution_SCBF(s.optimalCycleTime, s.taskAssignment, s.gs, s.hs, inst)
 
-	s.save_solution('summary_results_{}.txt'.format(EXPERIMENT_TOKEN))
-	if PRINT_STATISTICS:
+	s.save_solution('summary_results_{}.txt'.format(config.experiment_token))
+	if config.results_db is not None:
+		s.save_solution_to_store(config.results_db)
+	if s.channel is not None:
+		s.channel.publish_finished(s.optimalCycleTime, s.solOptimal == 1)
+	if config.statistics:
 		s.print_statistics()
 
 	# print total runtime
 	end = time.time()
 
-	if not args.quiet:
-		if args.human_readable:
+	if not config.quiet:
+		if config.human_readable:
 			print('\n! Language runtime:\t{:.4f}'.format(end-start-sum(s.optimisation_times)))
 		else:
 			print(end-start-sum(s.optimisation_times))
-	if args.human_readable:
-		if args.very_quiet:
+	if config.human_readable:
+		if config.very_quiet:
 			print('')
 		print('! Total runtime:\t{:.4f}'.format(end-start))
 	else:
 		print(end-start)
 
+if __name__ == '__main__':
+	main()
+
 # EOF #
\ No newline at end of file
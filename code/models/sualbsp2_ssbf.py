@@ -9,36 +9,66 @@
 
 # Packages
 import sys
-import pdb 
+import copy
 
 import time
 # import itertools
 import csv
 import argparse
-import numpy as np
-import networkx as nx
-from gurobipy import *
 
 # User-defined Packages
 from ALB_instance_storage import AssemblyLineInstance
+from ALB_bound_exchange import FileBoundExchange, callback_exchange_bounds
+from ALB_results_store import ResultsStore, MIP_COLUMNS, configuration_key
+from ALB_solver_config import SolverConfig, SolveResult
+from ALB_preprocessing import preprocess_instance, fix_by_reduced_costs
+from callback_SubTourElim import prepare_sub_tour_cuts, callback_user_cuts
 from solChecker import *
 
+# gurobipy is only imported once a Gurobi model is built (see import_gurobi), so
+# CP sub-problem runs and library imports of this module do not pay for it
+GRB = None
+Model = None
+
+def import_gurobi():
+	global GRB, Model
+	if Model is None:
+		from gurobipy import GRB, Model
+
 # initilise settings for argument parser
-parser = argparse.ArgumentParser()
-parser.add_argument('file', help='instance file')
-parser.add_argument('-q', '--quiet', help='Some output', action='store_true')
-parser.add_argument('-vq', '--very-quiet', help='Minimal output', action='store_true')
-parser.add_argument('-s', '--statistics', help='Print statistics', action='store_true')
-parser.add_argument('-c', '--check-solution', help='Check solution', action='store_true')
-parser.add_argument('-H', '--human-readable', help='Human readable output', action='store_true')
-parser.add_argument('-b', '--backwardSU-type', type=str, default='copy-forward-setups',
-					help='Type of backward setup times to use. Options include:' 
-						 '{just-forward-setups}')
-parser.add_argument('-t', '--time-limit', type=float, default=1800,
-					help='Optimisation time limit.')
-parser.add_argument('-et', '--experiment-token', type=int, default=0,
-					help='Indicator for which experiment is being run')
-args = parser.parse_args()
+def create_parser():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('file', help='instance file')
+	parser.add_argument('-q', '--quiet', help='Some output', action='store_true')
+	parser.add_argument('-vq', '--very-quiet', help='Minimal output', action='store_true')
+	parser.add_argument('-s', '--statistics', help='Print statistics', action='store_true')
+	parser.add_argument('-c', '--check-solution', help='Check solution', action='store_true')
+	parser.add_argument('-H', '--human-readable', help='Human readable output', action='store_true')
+	parser.add_argument('-b', '--backwardSU-type', type=str, default='copy-forward-setups',
+						help='Type of backward setup times to use. Options include:' 
+							 '{just-forward-setups}')
+	parser.add_argument('-t', '--time-limit', type=float, default=1800,
+						help='Optimisation time limit.')
+	parser.add_argument('-wl', '--work-limit', type=float, default=None,
+						help='Deterministic work limit (Gurobi work units), for runs that are '
+							 'reproducible across machines. The time limit still applies')
+	parser.add_argument('-et', '--experiment-token', type=int, default=0,
+						help='Indicator for which experiment is being run')
+	parser.add_argument('-pc', '--portfolio-channel', type=str, default=None,
+						help='Name of the shared incumbent channel when racing in a portfolio')
+	parser.add_argument('-ps', '--portfolio-slot', type=int, default=0,
+						help='Slot of this solver in the portfolio incumbent channel')
+	parser.add_argument('-bx', '--bound-exchange', type=str, default=None,
+						help='File through which cycle time upper bounds are shared with other solvers')
+	parser.add_argument('-uc', '--user-cuts', help='Separate sub-tour elimination cuts of the LP relaxation at the nodes',
+						action='store_true')
+	parser.add_argument('-pp', '--preprocess', help='Restrict the model to the station windows of the tasks and '
+						'fix variables by their reduced costs', action='store_true')
+	parser.add_argument('-th', '--threads', type=int, default=0,
+						help='Number of threads Gurobi may use (0 for all cores)')
+	parser.add_argument('-db', '--results-db', type=str, default=None,
+						help='SQLite results store to add this run to')
+	return parser
 
 # Define globals constants
 if sys.platform == "win32":
@@ -50,41 +80,61 @@ elif sys.platform == "darwin":
 elif sys.platform == "linux" or sys.platform == "linux2":
 	INST_DIR = 'instances/'
 
-# argument definitions
-PRINT_STATISTICS = args.statistics
-BACKWARD_SETUP_TYPE = args.backwardSU_type
-
-CHECK_SOLUTION = args.check_solution # create this file
-
-TIMELIMIT = args.time_limit
-EXPERIMENT_TOKEN = args.experiment_token
-
-if args.very_quiet:
-	args.quiet = True
-
 class SolverSSBF:
-	def __init__(self, inst):
+	def __init__(self, inst, config):
 		self.inst = inst
+		self.config = config
+		self.windows = None
+		if config.portfolio_channel is not None:
+			from ALB_incumbent_channel import IncumbentChannel
+			self.channel = IncumbentChannel(config.portfolio_channel, config.portfolio_slot)
+		else:
+			self.channel = None
+		# solvers in a portfolio exchange bounds through the channel unless given a file
+		if config.bound_exchange is not None:
+			self.boundExchange = FileBoundExchange(config.bound_exchange)
+		else:
+			self.boundExchange = self.channel
 		# initialise the full MIP model
+		import_gurobi()
 		self.model = Model('assemblyline')
 		self.init_model_parameters()
-		if args.quiet:
+		if self.config.quiet:
 			self.model.setParam('OutputFlag', 0)
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print('Initialising the MIP...', end='')
 		self.optimisation_times = []
 		self.sequencing_times = []
 		start = time.time()
+		if self.config.preprocess:
+			# the model is built on a restricted copy of the instance
+			self.inst = copy.copy(inst)
+			self.windows = preprocess_instance(self.inst)
 		self.init_vars()
 		self.create_objective()
 		self.create_constraints()
+		if self.config.user_cuts:
+			prepare_sub_tour_cuts(self.model, self.inst, self.xs, self.gs, self.hs, self.inst.numTasks)
+		self.numFixed = 0
+		if self.config.preprocess:
+			self.numFixed = fix_by_reduced_costs(self.model, self.inst.maxCycleTime)
 		self.init_time = time.time() - start
 		self.optimisation_times.append(self.init_time)
-		if not args.very_quiet:
+		if not self.config.very_quiet:
 			print(' initialisation complete ({:.3f}s)'.format(self.init_time))
+			if self.config.preprocess:
+				print('Preprocessing: cycle time upper bound {}, {} variables fixed by reduced costs'.format(
+					  self.inst.maxCycleTime, self.numFixed))
 
 	def init_model_parameters(self):
-		self.model.setParam('TimeLimit', TIMELIMIT)
+		self.model.setParam('TimeLimit', self.config.time_limit)
+		if self.config.work_limit is not None:
+			self.model.setParam('WorkLimit', self.config.work_limit)
+		if self.config.threads > 0:
+			self.model.setParam('Threads', self.config.threads)
+		if self.boundExchange is not None:
+			# shared upper bounds are added as lazy constraints mid-solve
+			self.model.setParam('LazyConstraints', 1)
 		# self.model.setParam('Threads',1)
 
 	def init_vars(self):
@@ -132,7 +182,7 @@ class SolverSSBF:
 							   for i in self.inst.tasks), 'oneStationPerTask')
 
 		# Encode the index of the stations which task i is assigned
-		self.model.addConstrs((sum([k*self.xs[i,k] for k in self.inst.stations]) == self.zs[i]
+		self.model.addConstrs((sum([k*self.xs[i,k] for k in self.inst.feasibleStations[i]]) == self.zs[i]
 							   for i in self.inst.tasks), 'encodeStationNums')
 
 		# pdb.set_trace()
@@ -217,12 +267,31 @@ class SolverSSBF:
 								'(51b)')
 
 		# Bounds for the cycle time
-		self.model.addConstr(self.cycleTime <= self.inst.maxCycleTime, 'cycleTimeUB')
+		self.consCycleTimeUB = self.model.addConstr(self.cycleTime <= self.inst.maxCycleTime, 'cycleTimeUB')
 		self.model.addConstr(self.cycleTime >= self.inst.minCycleTime, 'cycleTimeLB')
 
 	def optimise(self):
 		start = time.time()
-		self.model.optimize()
+		if self.boundExchange is not None:
+			# start from the best cycle time any other solver has found so far
+			cycleTimeUB = min(self.inst.maxCycleTime, self.boundExchange.poll_upper_bound())
+			self.consCycleTimeUB.setAttr('rhs', cycleTimeUB)
+			self.model._cycleTimeUB = cycleTimeUB
+			# share incumbents and bounds with the other solvers while solving
+			self.model._channel = self.channel
+			self.model._exchange = self.boundExchange
+			self.model._cycleTime = self.cycleTime
+			callback = callback_exchange_bounds
+		else:
+			callback = None
+		if self.config.user_cuts:
+			# separate the cuts first, then share bounds as before
+			self.model._nextCallback = callback
+			callback = callback_user_cuts
+		if callback is not None:
+			self.model.optimize(callback)
+		else:
+			self.model.optimize()
 		self.optimisation_times.append(time.time() - start)
 		# # record the results for outputting
 
@@ -230,7 +299,7 @@ class SolverSSBF:
 		# store assignment of tasks to stations
 		self.taskAssignment = [None for k in self.inst.stations]
 		for k in self.inst.stations:
-			self.taskAssignment[k] = { i for i in self.inst.tasks if self.xs[i,k].x > 0.5 }
+			self.taskAssignment[k] = { i for i in self.inst.feasibleTasks[k] if self.xs[i,k].x > 0.5 }
 		# store the ordering of the tasks
 		self.taskSequence = [[] for k in self.inst.stations]
 		for k in self.inst.stations:
@@ -268,14 +337,14 @@ class SolverSSBF:
 		self.statsTotalNodes = round(self.model.nodecount)
 
 	def print_solution(self):
-		if args.human_readable:
-			if not args.very_quiet:
+		if self.config.human_readable:
+			if not self.config.very_quiet:
 				print('\n! ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ ')
 				print('! \tSOLUTION ')
 			else:
 				print('\n',end='')
 			print('! Cycle Time:\t{}'.format(round(self.model.objval)))
-			if not args.very_quiet:
+			if not self.config.very_quiet:
 				for k in self.inst.stations:
 					print('! Station {}'.format(k))
 					# print('!    Load = \t{}'.format(self.stationLoad[k]))
@@ -288,12 +357,29 @@ class SolverSSBF:
 		# pdb.set_trace()	
 		with open(results_file, 'w', newline='') as csvfile:
 			results = csv.writer(csvfile)
-			results.writerow([self.solFeasible, self.solOptimal,
-								self.optimalCycleTime, self.gap,
-								self.statsTotalRuntime, self.statsTotalNodes])
+			results.writerow(self.results_summary())
+
+	def results_summary(self):
+		# summary statistics in the order of MIP_COLUMNS
+		return [self.solFeasible, self.solOptimal,
+				self.optimalCycleTime, self.gap,
+				self.statsTotalRuntime, self.statsTotalNodes]
+
+	def solve_result(self):
+		summary = dict(zip(MIP_COLUMNS, self.results_summary()))
+		if self.solFeasible == 1:
+			return SolveResult(summary, self.taskAssignment)
+		return SolveResult(summary)
+
+	def save_solution_to_store(self, dbFile):
+		store = ResultsStore(dbFile)
+		store.add_run(self.inst, 'SSBF', 'na', 'na', 'na',
+					  configuration_key(vars(self.config), vars(make_config())), vars(self.config),
+					  dict(zip(MIP_COLUMNS, self.results_summary())))
+		store.close()
 
 	def print_statistics(self):
-		if args.human_readable:
+		if self.config.human_readable:
 			print('\n! ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ ')
 			print('! \tSOLUTION STATISTICS ')
 			print('! Feasible Solution:\t{}'.format(self.solFeasible))
@@ -318,13 +404,40 @@ class SolverSSBF:
 			print(max(self.optimisation_times))
 			print(sum(self.optimisation_times)/len(self.optimisation_times))
 
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+# LIBRARY FUNCTIONALITY
+#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+def make_config(**options):
+	# the command line defaults, overridden by the given options
+	return SolverConfig(create_parser(), **options)
+
+def run_solver(inst, config):
+	# create the Solver for the given instance and configuration and optimise it
+	s = SolverSSBF(inst, config)
+	if not config.very_quiet:
+		print('Solving the MIP...')
+	s.optimise()
+	s.process_solution_statistics()
+	return s
+
+def solve(instance, config):
+	# solve an instance, given as an AssemblyLineInstance or the path of an
+	# instance file, with a SolverConfig and return the SolveResult
+	if not isinstance(instance, AssemblyLineInstance):
+		instance = AssemblyLineInstance(INST_DIR, instance)
+	return run_solver(instance, config).solve_result()
+
 # Script to create instance class, run the solver and output the solution
-if __name__ == '__main__':
+def main(argv=None):
+	parser = create_parser()
+	args = parser.parse_args(argv)
+	config = SolverConfig.from_args(parser, args)
+
 	# start total runtime timer
 	start = time.time()
 
 	filename = args.file # retrieve filename of instance to solve
-	if args.human_readable:
+	if config.human_readable:
 		print('instance:', filename)
 	else:
 		print(filename)
@@ -334,38 +447,41 @@ if __name__ == '__main__':
 	# pdb.set_trace()
 
 	# create Solver for given instance and optimise it
-	s = SolverSSBF(inst)
-	if not args.very_quiet:
-		print('Solving the MIP...')
-	s.optimise()
+	s = run_solver(inst, config)
 
 	# output
-	s.process_solution_statistics()
 	if s.solFeasible == 1:
 		s.print_solution()
 
 	# check solution consistency
-	if CHECK_SOLUTION:
+	if config.check_solution:
 		print('\nVerifying solution:')
 		check_solution_SSBF(s.optimalCycleTime, s.taskAssignment, s.gs, s.hs, inst)
 
-	s.save_solution('summary_results_{}.txt'.format(EXPERIMENT_TOKEN))
-	if PRINT_STATISTICS:
+	s.save_solution('summary_results_{}.txt'.format(config.experiment_token))
+	if config.results_db is not None:
+		s.save_solution_to_store(config.results_db)
+	if s.channel is not None:
+		s.channel.publish_finished(s.optimalCycleTime, s.solOptimal == 1)
+	if config.statistics:
 		s.print_statistics()
 
 	# print total runtime
 	end = time.time()
 
-	if not args.quiet:
-		if args.human_readable:
+	if not config.quiet:
+		if config.human_readable:
 			print('\n! Language runtime:\t{:.4f}'.format(end-start-sum(s.optimisation_times)))
 		else:
 			print(end-start-sum(s.optimisation_times))
-	if args.human_readable:
-		if args.very_quiet:
+	if config.human_readable:
+		if config.very_quiet:
 			print('')
 		print('! Total runtime:\t{:.4f}'.format(end-start))
 	else:
 		print(end-start)
 
+if __name__ == '__main__':
+	main()
+
 # EOF #
\ No newline at end of file
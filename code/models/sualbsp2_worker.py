@@ -0,0 +1,181 @@
+# Project: 	Masters Research
+# Author: 	Kenneth Young
+# Title:	Resident solver worker for the SUALBSP-2
+
+# This file contains:
+# 	-A long-lived worker process which keeps the models imported and Gurobi's
+#	 environment (and licence check) initialised, and solves the jobs given to
+#	 it one after the other through solve(instance, config) of each model
+#	-A JSON lines protocol over stdin/stdout or a local Unix socket. Each job
+#	 is one line, and its result is written back as one line as soon as it is
+#	 solved, e.g.
+#		{"id": 7, "model": "sualbsp2_benders", "instance": "InstancePath/InstanceFile.alb",
+#		 "options": {"global_bounds": true, "smartest_infer_cuts": true}}
+#	 is answered with
+#		{"id": 7, "status": "ok", "result": {"summary": {...}, "taskAssignment": [...], ...},
+#		 "walltime": 0.52}
+#	 The options are the destinations of the model's command line arguments.
+#	 A line {"command": "shutdown"} stops the worker
+# NOTE: the MiniZinc sub-problems are flattened per station, as the flattening
+#	depends on the station's data, so the worker only checks mzn2fzn is available
+
+# Example calls from the command line:
+#	python sualbsp2_worker.py < jobs.jsonl > results.jsonl
+#	python sualbsp2_worker.py -so /tmp/sualbsp2.sock
+# Explanation:
+#	The first solves the jobs in jobs.jsonl, the second waits for jobs on the
+#	given socket (e.g. socat - UNIX-CONNECT:/tmp/sualbsp2.sock < jobs.jsonl)
+
+# Packages
+import os
+import io
+import sys
+import json
+import stat
+import time
+import shutil
+import argparse
+import importlib
+import socketserver
+
+WORKER_MODELS = ['sualbsp2_fsbf', 'sualbsp2_ssbf', 'sualbsp2_scbf', 'sualbsp2_benders', 'sualbsp2_cb_benders']
+
+# initilise settings for argument parser
+def create_parser():
+	parser = argparse.ArgumentParser()
+	parser.add_argument('-so', '--socket', type=str, default=None,
+						help='Unix socket to accept jobs on (default: read jobs from stdin)')
+	parser.add_argument('-pl', '--preload', type=str, nargs='*', default=WORKER_MODELS[:4],
+						help='Models to import at start-up, the others are imported by their first job')
+	parser.add_argument('-nw', '--no-warm-up', help='Do not initialise Gurobi at start-up',
+						action='store_true')
+	return parser
+
+# Class defining the worker: the imported models and the jobs solved so far
+class SolverWorker:
+	def __init__(self, preload, warmUp=True):
+		self.modules = {}
+		self.numJobs = 0
+		for model in preload:
+			self.load_model(model)
+		self.gurobiReady = False
+		if warmUp:
+			self.warm_up_gurobi()
+
+	def load_model(self, model):
+		if model not in WORKER_MODELS:
+			raise ValueError('Unknown model {}. Options include: {}'.format(model, ', '.join(WORKER_MODELS)))
+		if model not in self.modules:
+			self.modules[model] = importlib.import_module(model)
+		return self.modules[model]
+
+	def warm_up_gurobi(self):
+		# the first model creates gurobipy's default environment, which checks the
+		# licence, and every later model of this process reuses it
+		for module in self.modules.values():
+			module.import_gurobi()
+		from gurobipy import Model
+		Model('warm-up').dispose()
+		self.gurobiReady = True
+
+	def ready_message(self):
+		return {'status': 'ready', 'pid': os.getpid(), 'models': list(self.modules),
+				'gurobi': self.gurobiReady, 'minizinc': shutil.which('mzn2fzn') is not None}
+
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	# JOBS
+	#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+	def run_job(self, job):
+		start = time.time()
+		response = {'id': job.get('id')}
+		try:
+			module = self.load_model(job.get('model', 'sualbsp2_benders'))
+			# the solvers' progress output is of no use to the caller
+			options = dict({'very_quiet': True}, **job.get('options', {}))
+			result = module.solve(job['instance'], module.make_config(**options))
+			response['status'] = 'ok'
+			response['result'] = result.to_dict()
+		except KeyError as e:
+			response['status'] = 'error'
+			response['error'] = 'Job is missing {}'.format(e)
+		except (Exception, SystemExit) as e:
+			# the models exit with a message on bad input, which must not stop the worker
+			response['status'] = 'error'
+			response['error'] = str(e).strip() or type(e).__name__
+		response['walltime'] = round(time.time() - start, 4)
+		self.numJobs += 1
+		return response
+
+	def handle_line(self, line):
+		# returns the response to the line (None for a blank line) and whether to keep going
+		line = line.strip()
+		if not line:
+			return None, True
+		try:
+			job = json.loads(line)
+		except ValueError as e:
+			return {'status': 'error', 'error': 'Invalid job: {}'.format(e)}, True
+		if job.get('command') == 'shutdown':
+			return {'status': 'shutdown', 'jobs': self.numJobs}, False
+		return self.run_job(job), True
+
+	def serve_stream(self, inFile, outFile):
+		# solve the jobs of inFile, returning False once asked to shut down
+		for line in inFile:
+			response, keepGoing = self.handle_line(line)
+			if response is not None:
+				outFile.write(json.dumps(response) + '\n')
+				outFile.flush()
+			if not keepGoing:
+				return False
+		return True
+
+# Class defining the handler of one connection to the worker's socket
+class JobStreamHandler(socketserver.StreamRequestHandler):
+	def handle(self):
+		inFile = io.TextIOWrapper(self.rfile, encoding='utf-8')
+		outFile = io.TextIOWrapper(self.wfile, encoding='utf-8', write_through=True)
+		outFile.write(json.dumps(self.server.worker.ready_message()) + '\n')
+		if not self.server.worker.serve_stream(inFile, outFile):
+			self.server.stopping = True
+
+def serve_socket(worker, socketPath):
+	# remove a socket left behind by a previous worker
+	if os.path.exists(socketPath) and stat.S_ISSOCK(os.stat(socketPath).st_mode):
+		os.unlink(socketPath)
+	server = socketserver.UnixStreamServer(socketPath, JobStreamHandler)
+	server.worker = worker
+	server.stopping = False
+	print('Worker {} listening on {}'.format(os.getpid(), socketPath), file=sys.stderr, flush=True)
+	try:
+		# one connection at a time, so the jobs never compete for the cores
+		while not server.stopping:
+			server.handle_request()
+	finally:
+		server.server_close()
+		os.unlink(socketPath)
+
+# Script to start the worker and solve the jobs given to it
+def main(argv=None):
+	args = create_parser().parse_args(argv)
+
+	if args.socket is None:
+		# the models print their progress to stdout (Gurobi from C), so the
+		# protocol keeps its own copy of stdout and the rest goes to stderr
+		protocolOut = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+		sys.stdout.flush()
+		os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+	worker = SolverWorker(args.preload, not args.no_warm_up)
+
+	if args.socket is None:
+		protocolOut.write(json.dumps(worker.ready_message()) + '\n')
+		protocolOut.flush()
+		worker.serve_stream(sys.stdin, protocolOut)
+	else:
+		serve_socket(worker, args.socket)
+
+if __name__ == '__main__':
+	main()
+
+# EOF #
@@ -7,39 +7,159 @@
 
 # Packages
 from __future__ import division
-import os, sys, pdb, csv
+import os, sys, pdb, csv, copy, sqlite3
 import numpy as np
 
 #----------------------------------------------------------------------------------------#
 # IMPORTING FILES
 
-def import_results(ResultsDir, Model, SPsolver, classNum, alpha, creator, SearchAbrv):
-
-	ResultsFilename = '{}results_{}_SP{}_class{}_alpha{}_{}_{}.txt'.format(ResultsDir,Model,SPsolver,classNum,
-																		alpha,creator,SearchAbrv)
-	try:
-		results = csv.DictReader(open(ResultsFilename))
-	except IOError:
-		results = []
-
-	return results
-
-def store_all_instances_dict(ResultsDir,Model,SPsolver,classNum,alphaList,CreatorList,SearchAbvrList):
-
-	ResultsArray = {alpha: {creator: {SearchAbrv: [] 
-												for SearchAbrv in SearchAbvrList} 
-												for creator in CreatorList} 
-												for alpha in alphaList}
-
-	for alpha in alphaList:
-		for creator in CreatorList:
-			for SearchAbrv in SearchAbvrList:
-				results = import_results(ResultsDir, Model, SPsolver,classNum, alpha, creator, SearchAbrv)
-				results = list(results)
-
-				ResultsArray[alpha][creator][SearchAbrv].append(results)
-
-	return ResultsArray
+def results_filename(ResultsDir, Model, SPsolver, classNum, alpha, creator, SearchAbrv):
+
+	return '{}results_{}_SP{}_class{}_alpha{}_{}_{}.txt'.format(ResultsDir,Model,SPsolver,classNum,
+																alpha,creator,SearchAbrv)
+
+# columns needed for the tables of each type of model
+BENDERS_TABLE_COLUMNS = ['feasible', 'optimal', 'gap', 'runtime', 'RMPtime', 'SPtime', 'iters', 'nodes',
+						 'SPnodes', 'cuts', 'numNG', 'numGUB', 'numIC', 'numIC2', 'numIC3', 'numLC']
+MIP_TABLE_COLUMNS = ['feasible', 'optimal', 'gap', 'runtime', 'nodes']
+
+def table_columns(Model):
+	if Model == 'BD':
+		return BENDERS_TABLE_COLUMNS
+	return MIP_TABLE_COLUMNS
+
+# class storing all results as one numpy array per column, with the class, alpha, creator,
+# search and cut type of each instance's result as the group keys
+class ResultsColumns():
+	def __init__(self, Model):
+		self.Model = Model
+		self.keyParts = []
+		self.valueParts = []
+
+	def add(self, keys, values):
+		# keys is a tuple of group keys shared by all rows of values (a 2D array)
+		self.keyParts.append(np.array([keys]*values.shape[0], dtype=str).reshape(-1,5))
+		self.valueParts.append(values)
+
+	def finalise(self):
+		columns = table_columns(self.Model)
+		if self.keyParts:
+			self.keys = np.concatenate(self.keyParts)
+			self.values = np.concatenate(self.valueParts)
+		else:
+			self.keys = np.empty([0,5], dtype=str)
+			self.values = np.empty([0,len(columns)])
+		# unused cuts ('-' or NULL) count as zero, as in the results files
+		self.values = np.nan_to_num(self.values)
+		self.column = { c: self.values[:,i] for i, c in enumerate(columns) }
+		return self
+
+def load_results_columns_files(ResultsDir,Model,SPsolver,ClassNumList,alphaList,SearchAbvrList,cutType):
+	# parse each results file straight into an array
+
+	columns = table_columns(Model)
+	Results = ResultsColumns(Model)
+	if Model != 'BD':
+		cutType = 'na'
+	for classNum in ClassNumList:
+		for alpha in alphaList:
+			for creator in define_creator_list(classNum):
+				for SearchAbrv in SearchAbvrList:
+					ResultsFilename = results_filename(ResultsDir,Model,SPsolver,classNum,alpha,creator,SearchAbrv)
+					try:
+						data = np.genfromtxt(ResultsFilename, delimiter=',', names=True,
+											 missing_values='-', filling_values=np.nan)
+					except (IOError, StopIteration):
+						continue
+					data = np.atleast_1d(data)
+					if data.size == 0:
+						continue
+					values = np.column_stack([ data[c].astype(float) for c in columns ])
+					Results.add((str(classNum), alpha, creator, SearchAbrv, cutType), values)
+
+	return Results.finalise()
+
+def load_results_columns_db(ResultsDb,Model,SPsolver,Config=''):
+	# a single query for every class, alpha, creator, search and cut type of the given
+	# configuration key ('' for the model's defaults, see ALB_results_store.py). Later
+	# runs of the same instance and configuration replace earlier ones
+
+	columns = table_columns(Model)
+	connection = sqlite3.connect(ResultsDb)
+	# stores made before the configuration key was added only hold default runs
+	if 'config' in [ row[1] for row in connection.execute('PRAGMA table_info(runs)') ]:
+		configColumn = 'COALESCE(config, \'\')'
+	else:
+		configColumn = '\'\''
+	rows = connection.execute(
+		'SELECT class, alpha, creator, search, cut_type, {} FROM runs WHERE id IN '
+		'(SELECT MAX(id) FROM runs WHERE model = ? AND spsolver = ? AND {} = ? '
+		'GROUP BY instance, search, cut_type)'.format(','.join(columns), configColumn),
+		[Model, SPsolver, Config]).fetchall()
+	connection.close()
+
+	Results = ResultsColumns(Model)
+	if rows:
+		Results.keyParts.append(np.array([ [ str(x) for x in row[:5] ] for row in rows ], dtype=str))
+		Results.valueParts.append(np.array([ row[5:] for row in rows ], dtype=float))
+
+	return Results.finalise()
+
+def group_row_totals(Results):
+	# sum every column over the instances of each (class, alpha, creator, search, cut type)
+	# in one grouped pass, returning the totals of each group as a RowTotal
+
+	groups, inverse = np.unique(Results.keys, axis=0, return_inverse=True)
+	inverse = inverse.reshape(-1)
+	numGroups = len(groups)
+	total = lambda weights: np.bincount(inverse, weights=weights, minlength=numGroups)
+	col = Results.column
+
+	numInst = np.bincount(inverse, minlength=numGroups)
+	feasible = col['feasible']
+	optimal = col['optimal']
+	if Results.Model == 'BD':
+		# only sub-optimal instances contribute to the gap
+		subOptimal = (feasible == 1) & (optimal != 1)
+		totals = {'TotalNodes': total(col['nodes']),
+				  'TotalSPNodes': total(col['SPnodes']),
+				  'TotalIters': total(col['iters']),
+				  'TotalCuts': total(col['cuts']),
+				  'TotalFeas': total(feasible),
+				  'TotalOpt': total(optimal),
+				  'TotalSubOptimal': total(subOptimal),
+				  'TotalPercGap': total(col['gap']*subOptimal),
+				  'TotalRMPruntime': total(col['RMPtime']),
+				  'TotalSPruntime': total(col['SPtime']),
+				  'TotalRuntime': total(col['runtime'])}
+		cutTotals = [ total(col[c]) for c in ['numNG', 'numGUB', 'numIC', 'numIC2', 'numIC3', 'numLC'] ]
+	else:
+		totals = {'TotalNodes': total(col['nodes']),
+				  'TotalPercGap': total(col['gap']*(feasible == 1)),
+				  'TotalFeas': total(feasible),
+				  'TotalOpt': total(optimal),
+				  'TotalRuntime': total(col['runtime'])}
+		cutTotals = None
+
+	GroupTotals = {}
+	for g, key in enumerate(groups):
+		r = RowTotal()
+		r.TotalNumInst = int(numInst[g])
+		for attr in totals:
+			value = totals[attr][g]
+			setattr(r, attr, int(value) if value == int(value) else float(value))
+		if cutTotals is not None:
+			r.TCutList = [ int(cutTotal[g]) for cutTotal in cutTotals ]
+		GroupTotals[tuple(key)] = r
+
+	return GroupTotals
+
+def lookup_row_totals(GroupTotals,Model,classNum,alpha,creator,SearchAbrv,cutType):
+	# groups without any results give an empty row. The row writers change the totals,
+	# so hand out a copy in case the group is written again
+	if Model != 'BD':
+		cutType = 'na'
+	return copy.deepcopy(GroupTotals.get((str(classNum), alpha, creator, SearchAbrv, cutType), RowTotal()))
 
 
 #----------------------------------------------------------------------------------------#
@@ -233,62 +353,10 @@ class RowTotal():
 		self.TotalNumInst = 0
 
 # functions to write types of rows
-def write_benders_row_simple_averages(TableFile,ResultsList,rSum,SPsolver):
-
-	# initialise totals for output
-	r = RowTotal()
-
-	numInst = len(ResultsList)
-
-	for instanceResult in ResultsList:
-		# nodes
-		r.TotalNodes += int(instanceResult['nodes'])
-
-		# SP nodes
-		r.TotalSPNodes += int(instanceResult['SPnodes'])
-
-		# iters
-		r.TotalIters += int(instanceResult['iters'])
-
-		# cuts total
-		r.TotalCuts += int(instanceResult['cuts'])
-
-		# each cut total
-		if instanceResult['numNG'] != '-':
-			r.TCutList[0] += int(instanceResult['numNG'])
-		if instanceResult['numGUB'] != '-':
-			r.TCutList[1] += int(instanceResult['numGUB'])
-		if instanceResult['numIC'] != '-':
-			r.TCutList[2] += int(instanceResult['numIC'])
-		if instanceResult['numIC2'] != '-':
-			r.TCutList[3] += int(instanceResult['numIC2'])
-		if instanceResult['numIC3'] != '-':
-			r.TCutList[4] += int(instanceResult['numIC3'])
-		if instanceResult['numLC'] != '-':
-			r.TCutList[5] += int(instanceResult['numLC'])
-
-		# feasibility
-		feasible = int(instanceResult['feasible'])
-		r.TotalFeas += feasible
+def write_benders_row_simple_averages(TableFile,r,rSum,SPsolver):
 
-		# optimality
-		optimal = int(instanceResult['optimal'])
-		r.TotalOpt += optimal
-
-		# gap percentage
-		# only add gap to running total if instance is sub-optimal
-		if feasible == 1 and optimal != 1:
-			r.TotalSubOptimal += 1
-			r.TotalPercGap += float(instanceResult['gap'])
-
-		# RMP runtime
-		r.TotalRMPruntime += float(instanceResult['RMPtime'])
-
-		# SP runtime
-		r.TotalSPruntime += float(instanceResult['SPtime'])
-
-		# total runtime
-		r.TotalRuntime += float(instanceResult['runtime'])
+	# totals for output were summed in group_row_totals
+	numInst = r.TotalNumInst
 
 	AvgNodes = r.TotalNodes/numInst
 	AvgIters = r.TotalIters/numInst
@@ -375,30 +443,10 @@ def write_benders_row_simple_summary(TableFile,rSum,SPsolver):
 		rSum.TotalPercGap,rSum.TotalNoSol,rSum.TotalOpt,rSum.TotalNumInst,rSum.TotalPercOpt,
 		rSum.TotalRMPruntime,rSum.TotalSPruntime,rSum.TotalRuntime))
 
-def write_mip_row_simple_averages(TableFile,ResultsList,rSum):
-
-	# initialise totals for output
-	r = RowTotal()
-
-	numInst = len(ResultsList)
-	# pdb.set_trace()
-	for instanceResult in ResultsList:
-		# nodes
-		r.TotalNodes += int(instanceResult['nodes'])
-
-		# gap percentage
-		if int(instanceResult['feasible']) == 1:
-			r.TotalPercGap += float(instanceResult['gap'])
-
-		# feasibility
-		r.TotalFeas += int(instanceResult['feasible'])
-
-		# optimality
-		r.TotalOpt += int(instanceResult['optimal'])
-
-		# total runtime
-		r.TotalRuntime += float(instanceResult['runtime'])
+def write_mip_row_simple_averages(TableFile,r,rSum):
 
+	# totals for output were summed in group_row_totals
+	numInst = r.TotalNumInst
 	AvgNodes = r.TotalNodes/numInst
 	AvgPercGap = r.TotalPercGap/(numInst-r.TotalNoSol)
 	r.TotalNoSol = numInst - r.TotalFeas
@@ -475,6 +523,10 @@ def main_basic_data_processing():
 	# CuttingList = ["001000", "000100", "000010", "011000", "010100", "010010", "010101", "011001"]
 	CuttingList = ["010010"]
 
+	# results store written by the solvers (-db), otherwise the per-configuration results files are used
+	# ResultsDb = "results.db"
+	ResultsDb = None
+
 	# ~~~~~~~~~~~~~~~~~~~~~~
 	# Output Directories
 	TableDir = "tables-" + Model + "/"
@@ -488,6 +540,10 @@ def main_basic_data_processing():
 
 	write_tex_file_preamble(TableFile)
 
+	# the results store holds every cut type, so load and group it only once
+	if ResultsDb is not None:
+		GroupTotals = group_row_totals(load_results_columns_db(ResultsDb,Model,lcSPsolver))
+
 	for cutType in CuttingList:
 
 		# Find directory containing desired redults
@@ -496,6 +552,11 @@ def main_basic_data_processing():
 		else:
 			ResultsDir = Model + "/results/"
 
+		# load all results for this cut type and sum them per group in one pass
+		if ResultsDb is None:
+			GroupTotals = group_row_totals(load_results_columns_files(ResultsDir,Model,lcSPsolver,ClassNumList,
+																	  alphaList,SearchAbvrList,cutType))
+
 		# write start current tex table
 		
 		if Model == 'BD':
@@ -510,9 +571,6 @@ def main_basic_data_processing():
 			# find the right creators
 			CreatorList = define_creator_list(classNum)
 
-			# store all results for this class
-			ResultsDict = store_all_instances_dict(ResultsDir,Model,lcSPsolver,classNum,alphaList,CreatorList,SearchAbvrList)
-
 			# store the overall result for this class
 			rSum = RowTotal()
 
@@ -535,14 +593,14 @@ def main_basic_data_processing():
 					# 	continue
 					for SearchAbrv in SearchAbvrList:
 
-						ResultsList = ResultsDict[alpha][creator][SearchAbrv][0]
+						r = lookup_row_totals(GroupTotals,Model,classNum,alpha,creator,SearchAbrv,cutType)
 
 						try:
 							# write content current tex table
 							if Model == 'BD':
-								rSum = write_benders_row_simple_averages(TableFile,ResultsList,rSum,SPsolver)
+								rSum = write_benders_row_simple_averages(TableFile,r,rSum,SPsolver)
 							else:
-								rSum = write_mip_row_simple_averages(TableFile,ResultsList,rSum)
+								rSum = write_mip_row_simple_averages(TableFile,r,rSum)
 						except ZeroDivisionError:
 							pdb.set_trace()
 
@@ -600,6 +658,10 @@ def main_basic_data_processing_CP():
 	# CuttingList = ["001000", "000100", "000010", "011000", "010100", "010010", "010101", "011001"]
 	CuttingList = ["010010"]
 
+	# results store written by the solvers (-db), otherwise the per-configuration results files are used
+	# ResultsDb = "results.db"
+	ResultsDb = None
+
 	# ~~~~~~~~~~~~~~~~~~~~~~
 	# Output Directories
 	TableDir = "tables-" + Model + "/"
@@ -615,6 +677,10 @@ def main_basic_data_processing_CP():
 
 	write_tex_file_preamble(TableFile)
 
+	# the results store holds every cut type, so load and group it only once
+	if ResultsDb is not None:
+		GroupTotals = group_row_totals(load_results_columns_db(ResultsDb,Model,lcSPsolver))
+
 	for cutType in CuttingList:
 
 		# Find directory containing desired redults
@@ -627,6 +693,11 @@ def main_basic_data_processing_CP():
 		else:
 			ResultsDir = Model + "/results/"
 
+		# load all results for this cut type and sum them per group in one pass
+		if ResultsDb is None:
+			GroupTotals = group_row_totals(load_results_columns_files(ResultsDir,Model,lcSPsolver,ClassNumList,
+																	  alphaList,SearchAbvrList,cutType))
+
 		# write start current tex table
 		
 		if Model == 'BD':
@@ -653,9 +724,6 @@ def main_basic_data_processing_CP():
 				# find the right creators
 				CreatorList = define_creator_list(classNum)
 
-				# store all results for this class
-				ResultsDict = store_all_instances_dict(ResultsDir,Model,lcSPsolver,classNum,alphaList,CreatorList,SearchAbvrList)
-
 				# store the overall result for this class
 				rSum = RowTotal()
 
@@ -674,14 +742,14 @@ def main_basic_data_processing_CP():
 						# 	else:
 						# 		TableFile.write("\t\t\t\t&\t\t& {\\tt %s}\t& " %(creator))
 
-						ResultsList = ResultsDict[alpha][creator][SearchAbrv][0]
+						r = lookup_row_totals(GroupTotals,Model,classNum,alpha,creator,SearchAbrv,cutType)
 
 						try:
 							# write content current tex table
 							if Model == 'BD':
-								rSum = write_benders_row_simple_averages(TableFile,ResultsList,rSum,SPsolver)
+								rSum = write_benders_row_simple_averages(TableFile,r,rSum,SPsolver)
 							else:
-								rSum = write_mip_row_simple_averages(TableFile,ResultsList,rSum)
+								rSum = write_mip_row_simple_averages(TableFile,r,rSum)
 						except ZeroDivisionError:
 							pdb.set_trace()
 